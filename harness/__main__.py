@@ -0,0 +1,25 @@
+import sys
+
+from harness import bench_workspace, compare, export, merge, npm_cache, results_db, run
+
+COMMANDS = {
+    "run": run.main,
+    "merge": merge.main,
+    "bench-workspace": bench_workspace.main,
+    "npm-cache": npm_cache.main,
+    "results-db": results_db.main,
+    "report": export.main,
+    "compare": compare.main,
+}
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: python -m harness {{{','.join(COMMANDS)}}} [options]")
+        sys.exit(2)
+    COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    main()
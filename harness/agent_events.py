@@ -0,0 +1,181 @@
+import abc
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from harness.config import AgentConfig
+
+# Item types in codex's --json stream that represent tool use
+CODEX_TOOL_ITEMS = {"command_execution", "file_change", "mcp_tool_call", "web_search"}
+
+
+@dataclass
+class AgentMetrics:
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+    turns: int = 0
+    # None when the output format does not report individual tool calls
+    tool_calls: dict[str, int] | None = field(default_factory=dict)
+    events: int = 0
+    parse_errors: int = 0
+    time_to_first_event_seconds: float | None = None
+    tokens_per_second: float | None = None
+    avg_turn_latency_seconds: float | None = None
+    max_turn_latency_seconds: float | None = None
+
+    @property
+    def total_tool_calls(self) -> int | None:
+        return sum(self.tool_calls.values()) if self.tool_calls is not None else None
+
+
+def metrics_from_dict(data: dict | None) -> AgentMetrics | None:
+    if not data:
+        return None
+    fields = AgentMetrics.__dataclass_fields__
+    return AgentMetrics(**{k: v for k, v in data.items() if k in fields})
+
+
+class EventParser(abc.ABC):
+    def __init__(self, start: float):
+        self.start = start
+        self.metrics = AgentMetrics()
+        self.turn_latencies: list[float] = []
+
+    def feed(self, line: bytes, now: float) -> None:
+        line = line.strip()
+        if not line:
+            return
+        try:
+            event = json.loads(line)
+        except ValueError:
+            self.metrics.parse_errors += 1
+            return
+        if not isinstance(event, dict):
+            return
+        self.metrics.events += 1
+        if self.metrics.time_to_first_event_seconds is None:
+            self.metrics.time_to_first_event_seconds = round(now - self.start, 3)
+        self.handle(event, now)
+
+    @abc.abstractmethod
+    def handle(self, event: dict, now: float) -> None:
+        ...
+
+    def count_tool(self, name: str) -> None:
+        self.metrics.tool_calls[name] = self.metrics.tool_calls.get(name, 0) + 1
+
+    def finish(self, wall_clock_seconds: float) -> AgentMetrics:
+        m = self.metrics
+        if self.turn_latencies:
+            m.avg_turn_latency_seconds = round(sum(self.turn_latencies) / len(self.turn_latencies), 3)
+            m.max_turn_latency_seconds = round(max(self.turn_latencies), 3)
+        if m.output_tokens and wall_clock_seconds > 0:
+            m.tokens_per_second = round(m.output_tokens / wall_clock_seconds, 2)
+        return m
+
+
+class ClaudeEventParser(EventParser):
+    # Handles both --output-format json (a single "result" object) and
+    # stream-json (system/assistant/user events followed by "result").
+    def __init__(self, start: float):
+        super().__init__(start)
+        self._turn_start = start
+        self._streamed = False
+        # stream-json emits one assistant event per content block, each with
+        # the message's id and its usage so far
+        self._message_id: str | None = None
+        self._message_usage: dict = {}
+
+    def handle(self, event: dict, now: float) -> None:
+        kind = event.get("type")
+        if kind != "result":
+            self._streamed = True
+        if kind == "assistant":
+            message = event.get("message", {})
+            message_id = message.get("id")
+            if message_id is None or message_id != self._message_id:
+                self.metrics.turns += 1
+                self.turn_latencies.append(now - self._turn_start)
+                self._turn_start = now
+                self._message_id = message_id
+                self._message_usage = {}
+            for block in message.get("content", []):
+                if isinstance(block, dict) and block.get("type") == "tool_use":
+                    self.count_tool(block.get("name", "unknown"))
+            usage = message.get("usage") or {}
+            if usage:
+                # Replace what an earlier event of this message reported
+                self._add_usage(self._message_usage, sign=-1)
+                self._add_usage(usage)
+                self._message_usage = usage
+        elif kind == "user":
+            # Tool results: the next assistant turn starts from here
+            self._turn_start = now
+        elif kind == "result":
+            usage = event.get("usage", {})
+            if usage:
+                # The result carries run totals, which supersede per-message usage
+                self.metrics.input_tokens = 0
+                self.metrics.cached_input_tokens = 0
+                self.metrics.output_tokens = 0
+                self._add_usage(usage)
+            num_turns = event.get("num_turns")
+            if num_turns and not self.turn_latencies:
+                self.metrics.turns = num_turns
+                duration_ms = event.get("duration_ms")
+                if duration_ms:
+                    self.turn_latencies = [duration_ms / 1000 / num_turns]
+
+    def finish(self, wall_clock_seconds: float) -> AgentMetrics:
+        if not self._streamed:
+            # A lone result object says nothing about tool use, and it arrives
+            # at exit, so its timing is not a time to first event
+            self.metrics.tool_calls = None
+            self.metrics.time_to_first_event_seconds = None
+        return super().finish(wall_clock_seconds)
+
+    def _add_usage(self, usage: dict, sign: int = 1) -> None:
+        cached = usage.get("cache_read_input_tokens", 0) or 0
+        self.metrics.input_tokens += sign * (
+            (usage.get("input_tokens", 0) or 0)
+            + (usage.get("cache_creation_input_tokens", 0) or 0)
+            + cached
+        )
+        self.metrics.cached_input_tokens += sign * cached
+        self.metrics.output_tokens += sign * (usage.get("output_tokens", 0) or 0)
+
+
+class CodexEventParser(EventParser):
+    def __init__(self, start: float):
+        super().__init__(start)
+        self._turn_start: float | None = None
+
+    def handle(self, event: dict, now: float) -> None:
+        kind = event.get("type")
+        if kind == "turn.started":
+            self._turn_start = now
+        elif kind in ("turn.completed", "turn.failed"):
+            self.metrics.turns += 1
+            self.turn_latencies.append(now - (self._turn_start if self._turn_start is not None else self.start))
+            self._turn_start = None
+            usage = event.get("usage") or {}
+            self.metrics.input_tokens += usage.get("input_tokens", 0) or 0
+            self.metrics.cached_input_tokens += usage.get("cached_input_tokens", 0) or 0
+            self.metrics.output_tokens += usage.get("output_tokens", 0) or 0
+        elif kind == "item.completed":
+            item_type = (event.get("item") or {}).get("type")
+            if item_type in CODEX_TOOL_ITEMS:
+                self.count_tool(item_type)
+
+
+PARSERS: dict[str, type[EventParser]] = {
+    "claude": ClaudeEventParser,
+    "codex": CodexEventParser,
+}
+
+
+def parser_for(config: AgentConfig, start: float) -> EventParser | None:
+    event_format = config.event_format or Path(config.command).name
+    parser_cls = PARSERS.get(event_format)
+    return parser_cls(start) if parser_cls else None
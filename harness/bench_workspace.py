@@ -0,0 +1,58 @@
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from harness.task_loader import load_tasks
+from harness.workspace import STRATEGIES, UnsupportedStrategy, WorkspaceProvider
+
+
+def time_strategy(strategy: str, repo_dir: Path, tests_dir: Path, iterations: int, base_dir: Path | None) -> list[float] | None:
+    provider = WorkspaceProvider(strategy, base_dir=base_dir)
+    timings = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            workspace = Path(tempfile.mkdtemp(prefix="bench-setup-", dir=base_dir))
+            try:
+                provider.materialize(repo_dir, workspace)
+                provider.materialize(tests_dir, workspace / "tests")
+            except UnsupportedStrategy:
+                return None
+            finally:
+                elapsed = time.perf_counter() - start
+                shutil.rmtree(workspace, ignore_errors=True)
+            timings.append(elapsed)
+    finally:
+        provider.close()
+    return timings
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Measure per-pair workspace setup latency for each strategy")
+    parser.add_argument("--tasks-dir", type=Path, default=Path(__file__).parent.parent / "tasks")
+    parser.add_argument("--iterations", "-n", type=int, default=20)
+    parser.add_argument("--base-dir", type=Path, help="Where to create workspaces (default: system temp dir)")
+    args = parser.parse_args(argv)
+
+    strategies = list(STRATEGIES)
+    col = 20
+    print(f"Workspace setup latency per pair, p50 / max over {args.iterations} iterations\n")
+    print(f"{'Task':<34}" + "".join(f" {s:<{col}}" for s in strategies))
+    print("-" * (34 + (col + 1) * len(strategies)))
+    for task in load_tasks(args.tasks_dir):
+        row = f"{task.name[:33]:<34}"
+        for strategy in strategies:
+            timings = time_strategy(strategy, task.repo_dir, task.tests_dir, args.iterations, args.base_dir)
+            if timings is None:
+                cell = "unsupported"
+            else:
+                cell = f"{statistics.median(timings) * 1000:.2f} / {max(timings) * 1000:.2f} ms"
+            row += f" {cell:<{col}}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
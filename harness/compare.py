@@ -0,0 +1,283 @@
+"""Compare runs against a baseline and flag performance regressions.
+
+Each run set is one or more run directories; a pair's values across the runs
+of a set are its repeats. Pairs are aligned by task and agent. Per pair, the
+repeats of the two sets are compared with a two-sided Mann-Whitney U test
+(exact for small samples). Per agent, the per-task changes are averaged and
+bootstrapped over tasks, which still works with a single run per set.
+
+A change is a regression when it is significant and worse than the threshold
+from the `compare` config block. The command exits with 1 when any candidate
+set has a regression, and with 2 on usage errors.
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from collections import Counter
+from dataclasses import asdict, dataclass
+from itertools import combinations
+from pathlib import Path
+from statistics import mean, median
+from typing import NamedTuple
+
+from harness.config import CompareConfig, load_config
+from harness.results import flatten_result, iter_results
+from harness.results_db import format_rows
+
+# Above this many rank assignments the p-value comes from the normal approximation
+EXACT_LIMIT = 20000
+
+
+class Metric(NamedTuple):
+    name: str
+    label: str
+    threshold: str
+    # Relative metrics are compared by ratio of medians and get worse as they
+    # grow; the pass rate is compared by difference of means
+    relative: bool
+
+
+METRICS = (
+    Metric("wall_clock_seconds", "Wall (s)", "max_slowdown", True),
+    Metric("cpu_seconds", "CPU (s)", "max_cpu_increase", True),
+    Metric("peak_rss_mb", "Peak RSS (MB)", "max_rss_increase", True),
+    Metric("pass_rate", "Pass rate", "max_pass_rate_drop", False),
+)
+
+
+@dataclass
+class Change:
+    agent: str
+    task: str | None  # None for the per-agent change across tasks
+    metric: str
+    baseline: float
+    candidate: float
+    change: float
+    p_value: float
+    samples: tuple[int, int]  # repeats per pair, tasks per agent
+    regression: bool = False
+    improvement: bool = False
+
+
+def metric_values(data: dict) -> dict[str, float | None]:
+    row = flatten_result(data)
+    cpu = None
+    if row["user_cpu_seconds"] is not None and row["system_cpu_seconds"] is not None:
+        cpu = row["user_cpu_seconds"] + row["system_cpu_seconds"]
+    return {
+        "wall_clock_seconds": row["wall_clock_seconds"],
+        "cpu_seconds": cpu,
+        "peak_rss_mb": row["peak_rss_mb"],
+        "pass_rate": 1.0 if row["passed"] else 0.0,
+    }
+
+
+def load_run_set(run_dirs: list[Path]) -> dict[tuple[str, str], dict[str, list[float]]]:
+    """Values of every metric per (task, agent), one per run that has the pair."""
+    pairs: dict[tuple[str, str], dict[str, list[float]]] = {}
+    for run_dir in run_dirs:
+        for _, data in iter_results(run_dir):
+            values = pairs.setdefault((data["task"], data["agent"]), {m.name: [] for m in METRICS})
+            for name, value in metric_values(data).items():
+                if value is not None:
+                    values[name].append(value)
+    return pairs
+
+
+def _midranks(values: list[float]) -> list[float]:
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def mann_whitney_p(a: list[float], b: list[float]) -> float:
+    """Two-sided p-value of the Mann-Whitney U test that a and b come from one distribution."""
+    n1, n2 = len(a), len(b)
+    if not n1 or not n2:
+        return 1.0
+    n = n1 + n2
+    ranks = _midranks(a + b)
+    expected = n1 * (n + 1) / 2
+    observed = abs(sum(ranks[:n1]) - expected)
+    if math.comb(n, n1) <= EXACT_LIMIT:
+        # Exact permutation distribution of the rank sum, ties included
+        extreme = total = 0
+        for group in combinations(ranks, n1):
+            total += 1
+            if abs(sum(group) - expected) >= observed - 1e-9:
+                extreme += 1
+        return extreme / total
+    ties = sum(t ** 3 - t for t in Counter(a + b).values())
+    variance = n1 * n2 / 12 * (n + 1 - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = max(observed - 0.5, 0) / math.sqrt(variance)
+    return min(1.0, math.erfc(z / math.sqrt(2)))
+
+
+def bootstrap_p(values: list[float], samples: int, rng: random.Random) -> float:
+    """Two-sided bootstrap p-value that the mean of values is zero."""
+    means = [mean(rng.choices(values, k=len(values))) for _ in range(samples)]
+    below = sum(m <= 0 for m in means)
+    above = sum(m >= 0 for m in means)
+    return min(1.0, 2 * (min(below, above) + 1) / (samples + 1))
+
+
+def _judge(change: Change, metric: Metric, config: CompareConfig) -> Change:
+    if change.p_value < config.alpha:
+        threshold = getattr(config, metric.threshold)
+        worse = change.change if metric.relative else -change.change
+        change.regression = worse > threshold
+        change.improvement = worse < 0
+    return change
+
+
+def compare_pair(
+    agent: str, task: str, metric: Metric, baseline: list[float], candidate: list[float], config: CompareConfig,
+) -> Change | None:
+    if not baseline or not candidate:
+        return None
+    if metric.relative:
+        base, cand = median(baseline), median(candidate)
+        if base <= 0:
+            return None
+        delta = cand / base - 1
+    else:
+        base, cand = mean(baseline), mean(candidate)
+        delta = cand - base
+    p = mann_whitney_p(baseline, candidate)
+    return _judge(Change(agent, task, metric.name, base, cand, delta, p, (len(baseline), len(candidate))), metric, config)
+
+
+def compare_agent(
+    agent: str, metric: Metric, per_task: list[tuple[float, float]], config: CompareConfig, rng: random.Random,
+) -> Change | None:
+    """Change across tasks from each task's (baseline, candidate) median or mean."""
+    if metric.relative:
+        per_task = [(b, c) for b, c in per_task if b > 0 and c > 0]
+        # Log ratios weigh a task that got twice as fast like one that got twice as slow
+        deltas = [math.log(c / b) for b, c in per_task]
+    else:
+        deltas = [c - b for b, c in per_task]
+    if len(deltas) < max(config.min_tasks, 1):
+        return None
+    delta = math.exp(mean(deltas)) - 1 if metric.relative else mean(deltas)
+    p = bootstrap_p(deltas, config.bootstrap_samples, rng)
+    base = mean(b for b, _ in per_task)
+    cand = mean(c for _, c in per_task)
+    return _judge(Change(agent, None, metric.name, base, cand, delta, p, (len(deltas), len(deltas))), metric, config)
+
+
+def compare_runs(
+    baseline: dict[tuple[str, str], dict[str, list[float]]],
+    candidate: dict[tuple[str, str], dict[str, list[float]]],
+    config: CompareConfig | None = None,
+) -> list[Change]:
+    """Per-agent and per-pair changes of every metric, per-agent ones first."""
+    config = config or CompareConfig()
+    rng = random.Random(0)  # Repeated comparisons give the same p-values
+    agents: dict[str, dict[str, list[tuple[float, float]]]] = {}
+    pair_changes: list[Change] = []
+    for task, agent in sorted(baseline.keys() & candidate.keys(), key=lambda k: (k[1], k[0])):
+        for metric in METRICS:
+            change = compare_pair(
+                agent, task, metric, baseline[task, agent][metric.name], candidate[task, agent][metric.name], config,
+            )
+            if change is not None:
+                pair_changes.append(change)
+                agents.setdefault(agent, {}).setdefault(metric.name, []).append((change.baseline, change.candidate))
+    agent_changes = []
+    for agent, per_metric in sorted(agents.items()):
+        for metric in METRICS:
+            change = compare_agent(agent, metric, per_metric.get(metric.name, []), config, rng)
+            if change is not None:
+                agent_changes.append(change)
+    return agent_changes + pair_changes
+
+
+def _format_value(metric: Metric, value: float) -> str:
+    return f"{value:.1f}" if metric.relative else f"{value:.0%}"
+
+
+def _format_change(metric: Metric, change: float) -> str:
+    return f"{change:+.1%}" if metric.relative else f"{change * 100:+.1f} pts"
+
+
+def format_changes(changes: list[Change]) -> str:
+    metrics = {m.name: m for m in METRICS}
+    return format_rows(
+        ["Agent", "Task", "Metric", "Baseline", "Candidate", "Change", "p", "n", "Verdict"],
+        [
+            (
+                c.agent, c.task or "(all tasks)", metrics[c.metric].label,
+                _format_value(metrics[c.metric], c.baseline), _format_value(metrics[c.metric], c.candidate),
+                _format_change(metrics[c.metric], c.change), f"{c.p_value:.3f}", f"{c.samples[0]}/{c.samples[1]}",
+                "REGRESSION" if c.regression else "improved" if c.improvement else "",
+            )
+            for c in changes
+        ],
+    )
+
+
+def _describe(run_dirs: list[Path]) -> str:
+    return ", ".join(d.name for d in run_dirs)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Compare runs against a baseline and flag regressions")
+    parser.add_argument("--config", type=Path, default=None)
+    parser.add_argument("--baseline", "-b", nargs="+", type=Path, required=True,
+                        help="Run directories of the baseline; each is one repeat")
+    parser.add_argument("--candidate", "-c", nargs="+", type=Path, action="append", required=True,
+                        help="Run directories of a candidate; repeat the flag to compare several candidates")
+    parser.add_argument("--all", action="store_true", help="List unchanged pairs too")
+    parser.add_argument("--json", type=Path, help="Also write the comparison to this file")
+    args = parser.parse_args(argv)
+
+    for run_dir in [*args.baseline, *(d for dirs in args.candidate for d in dirs)]:
+        if not run_dir.is_dir():
+            print(f"ERROR: {run_dir} is not a directory")
+            sys.exit(2)
+    config = load_config(args.config).compare or CompareConfig()
+
+    baseline = load_run_set(args.baseline)
+    report = {"baseline": [str(d) for d in args.baseline], "config": asdict(config), "candidates": []}
+    regressions = 0
+    for run_dirs in args.candidate:
+        candidate = load_run_set(run_dirs)
+        changes = compare_runs(baseline, candidate, config)
+        flagged = [c for c in changes if c.task is None or args.all or c.regression or c.improvement]
+        count = sum(c.regression for c in changes)
+        regressions += count
+
+        print(f"\n{_describe(args.baseline)} -> {_describe(run_dirs)}")
+        for label, keys in (("baseline", baseline.keys() - candidate.keys()),
+                            ("candidate", candidate.keys() - baseline.keys())):
+            if keys:
+                task, agent = min(keys)
+                print(f"WARNING: {len(keys)} pair(s) only in the {label}, e.g. {task}/{agent}")
+        print(format_changes(flagged) if flagged else "No significant changes")
+        print(f"{count} regression(s) beyond thresholds")
+        report["candidates"].append({
+            "runs": [str(d) for d in run_dirs],
+            "regressions": count,
+            "changes": [asdict(c) for c in changes],
+        })
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""ccache-style object cache for the C/C++ task builds.
+
+The harness passes CC/CXX to `make` as this file run as a script, followed by
+the real compiler. The task Makefiles compile and link in one command, so the
+wrapper compiles each source file on its own, keyed by its preprocessed text,
+the compiler and the flags, and then links the objects. Only sources whose
+preprocessed text changed are compiled again.
+
+Every wrapper invocation starts a fresh interpreter, so this module only uses
+the standard library and is run with `python -S`.
+"""
+import argparse
+import hashlib
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+SOURCE_SUFFIXES = {".c", ".cc", ".cpp", ".cxx", ".c++", ".C"}
+# Options whose value is the next argument
+TAKES_VALUE = {
+    "-o", "-I", "-D", "-U", "-include", "-imacros", "-isystem", "-iquote", "-idirafter",
+    "-L", "-l", "-Xlinker", "-MF", "-MT", "-MQ",
+}
+LINK_ONLY = {"-static", "-shared", "-rdynamic", "-pie", "-no-pie"}
+LINK_ONLY_PREFIXES = ("-l", "-L", "-Wl,")
+# Invocations that do not produce objects from C/C++ sources
+UNCACHEABLE = {"-E", "-S", "-x", "-", "-save-temps", "-M", "-MM", "-MD", "-MMD"}
+
+
+class CompileCache:
+    def __init__(self, store: Path, cc: str = "gcc", cxx: str = "g++"):
+        self.store = store
+        self.cc = cc
+        self.cxx = cxx
+        self.stats = {"hits": 0, "misses": 0, "uncacheable": 0}
+
+    def make_vars(self, stats_file: Path) -> str:
+        """CC=... CXX=... arguments for make that route compiles through the cache."""
+        def wrapper(compiler: str) -> str:
+            parts = [sys.executable, "-S", __file__, "--store", str(self.store), "--stats", str(stats_file), compiler]
+            return shlex.quote(" ".join(shlex.quote(part) for part in parts))
+
+        return f"CC={wrapper(self.cc)} CXX={wrapper(self.cxx)}"
+
+    def collect(self, stats_file: Path) -> dict:
+        """Count the outcomes the wrappers recorded in stats_file and add them to the run totals."""
+        stats = {"hits": 0, "misses": 0, "uncacheable": 0}
+        try:
+            outcomes = stats_file.read_text().split()
+        except OSError:
+            outcomes = []
+        for outcome in outcomes:
+            if outcome in stats:
+                stats[outcome] += 1
+        for key, count in stats.items():
+            self.stats[key] += count
+        return stats
+
+
+def split_args(args: list[str]) -> tuple[list[str], list[str], list[str], str | None, bool] | None:
+    """Split a compiler command line into sources, compile flags, link inputs, output and -c.
+
+    Returns None for command lines the cache does not handle.
+    """
+    sources, flags, link = [], [], []
+    output = None
+    compile_only = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in UNCACHEABLE or arg.startswith("@"):
+            return None
+        if arg in TAKES_VALUE:
+            if i + 1 >= len(args):
+                return None
+            value = args[i + 1]
+            if arg == "-o":
+                output = value
+            elif arg in ("-L", "-l", "-Xlinker"):
+                link += [arg, value]
+            else:
+                flags += [arg, value]
+            i += 2
+            continue
+        if arg == "-c":
+            compile_only = True
+        elif arg in LINK_ONLY or arg.startswith(LINK_ONLY_PREFIXES):
+            link.append(arg)
+        elif not arg.startswith("-") and Path(arg).suffix in SOURCE_SUFFIXES:
+            sources.append(arg)
+        elif not arg.startswith("-"):
+            # Objects and archives
+            link.append(arg)
+        else:
+            flags.append(arg)
+        i += 1
+    if compile_only and output is not None and len(sources) > 1:
+        return None
+    return sources, flags, link, output, compile_only
+
+
+def _compiler_id(compiler: str) -> str:
+    path = shutil.which(compiler) or compiler
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path
+    return f"{os.path.realpath(path)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def compile_source(compiler: str, flags: list[str], source: str, obj: str, store: Path) -> tuple[int, str]:
+    """Compile source to obj through the cache; returns (exit code, "hits" or "misses")."""
+    compile_cmd = [compiler, *flags, "-c", source, "-o", obj]
+    pre = subprocess.run([compiler, *flags, "-E", source], capture_output=True)
+    if pre.returncode != 0:
+        # Let the real compile report the error
+        return subprocess.run(compile_cmd).returncode, "uncacheable"
+
+    h = hashlib.sha256()
+    for part in (_compiler_id(compiler), Path(source).suffix, *flags):
+        h.update(part.encode() + b"\0")
+    # With -g the preprocessor records the working directory for the debug info.
+    # Leaving it out lets workspaces share objects; they only disagree on
+    # DW_AT_comp_dir, which the test runs never look at.
+    h.update(pre.stdout.replace(f'# 1 "{os.getcwd()}//"\n'.encode(), b""))
+    key = h.hexdigest()
+    entry = store / key[:2] / key
+
+    try:
+        shutil.copyfile(entry.with_suffix(".o"), obj)
+        # Replay the warnings of the original compile
+        sys.stderr.buffer.write(entry.with_suffix(".stderr").read_bytes())
+        return 0, "hits"
+    except FileNotFoundError:
+        pass
+
+    result = subprocess.run(compile_cmd, stderr=subprocess.PIPE)
+    sys.stderr.buffer.write(result.stderr)
+    if result.returncode == 0:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # The object is published last, so a visible object always has its stderr
+        _publish(entry.with_suffix(".stderr"), result.stderr)
+        _publish(entry.with_suffix(".o"), Path(obj).read_bytes())
+    return result.returncode, "misses"
+
+
+def _publish(dest: Path, data: bytes) -> None:
+    # Concurrent builds of the same source race to write identical bytes
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}")
+    tmp.write_bytes(data)
+    os.replace(tmp, dest)
+
+
+def run(compiler: str, args: list[str], store: Path, stats_file: Path | None) -> int:
+    outcomes = []
+
+    def record() -> None:
+        if stats_file is not None and outcomes:
+            with open(stats_file, "a") as f:
+                f.write("\n".join(outcomes) + "\n")
+
+    split = split_args(args)
+    if split is None or not split[0]:
+        if split is None:
+            outcomes.append("uncacheable")
+        record()
+        return subprocess.run([compiler, *args]).returncode
+
+    sources, flags, link, output, compile_only = split
+    obj_dir = None if compile_only else tempfile.mkdtemp(prefix="bench-cc-")
+    try:
+        objects = []
+        returncode = 0
+        for index, source in enumerate(sources):
+            if compile_only:
+                obj = output if output is not None else Path(source).with_suffix(".o").name
+            else:
+                obj = os.path.join(obj_dir, f"{index}-{Path(source).stem}.o")
+            code, outcome = compile_source(compiler, flags, source, obj, store)
+            outcomes.append(outcome)
+            objects.append(obj)
+            returncode = returncode or code
+        if returncode or compile_only:
+            return returncode
+        link_cmd = [compiler, *flags, *objects, *link] + (["-o", output] if output else [])
+        return subprocess.run(link_cmd).returncode
+    finally:
+        record()
+        if obj_dir is not None:
+            shutil.rmtree(obj_dir, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile through the harness compile cache")
+    parser.add_argument("--store", type=Path, required=True)
+    parser.add_argument("--stats", type=Path)
+    parser.add_argument("compiler")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    ns = parser.parse_args(argv)
+    return run(ns.compiler, ns.args, ns.store, ns.stats)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
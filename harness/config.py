@@ -10,13 +10,92 @@ class AgentConfig:
     args: list[str]
     model: str | None
     timeout_seconds: int
+    max_concurrency: int | None = None
+    event_format: str | None = None
 
 
 @dataclass
 class TestRunnerConfig:
+    __test__ = False
+
     language: str
     command: str
     pattern: str
+    dependencies: str | None = None
+    report: str | None = None
+    timeout_seconds: int = 120
+
+
+@dataclass
+class TestTimeoutConfig:
+    __test__ = False
+
+    adaptive: bool = False
+    percentile: float = 95
+    factor: float = 3.0
+    min_seconds: float = 10
+    max_seconds: float = 600
+    min_samples: int = 3
+    history_runs: int = 20
+
+
+@dataclass
+class CompareConfig:
+    alpha: float = 0.05
+    max_slowdown: float = 0.10
+    max_cpu_increase: float = 0.20
+    max_rss_increase: float = 0.20
+    max_pass_rate_drop: float = 0.05
+    bootstrap_samples: int = 2000
+    min_tasks: int = 5
+
+
+@dataclass
+class TmpfsConfig:
+    path: str
+    budget_mb: int
+    build_estimate_mb: dict[str, int]
+
+
+@dataclass
+class NpmCacheConfig:
+    path: str
+    offline: bool = False
+
+
+@dataclass
+class CompileCacheConfig:
+    path: str
+    enabled: bool = False
+    cc: str = "gcc"
+    cxx: str = "g++"
+
+
+@dataclass
+class ResultsDBConfig:
+    path: str
+
+
+@dataclass
+class TestCacheConfig:
+    __test__ = False
+
+    path: str
+
+
+@dataclass
+class PytestServerConfig:
+    enabled: bool = False
+    python: str = "python3"
+
+
+@dataclass
+class IsolationConfig:
+    enabled: bool = False
+    cpus: float | None = None
+    memory_mb: int | None = None
+    pin_cpus: bool = False
+    cgroup: str | None = None
 
 
 @dataclass
@@ -24,6 +103,18 @@ class BenchmarkConfig:
     agents: list[AgentConfig]
     test_runners: dict[str, TestRunnerConfig]
     results_dir: str
+    workspace_strategy: str = "auto"
+    workspace_prewarm: int = 0
+    workspace_tmpfs: TmpfsConfig | None = None
+    workspace_cleanup_queue: int = 8
+    isolation: IsolationConfig | None = None
+    npm_cache: NpmCacheConfig | None = None
+    compile_cache: CompileCacheConfig | None = None
+    pytest_server: PytestServerConfig | None = None
+    test_timeouts: TestTimeoutConfig | None = None
+    test_cache: TestCacheConfig | None = None
+    results_db: ResultsDBConfig | None = None
+    compare: CompareConfig | None = None
 
 
 def load_config(path: Path = None) -> BenchmarkConfig:
@@ -40,6 +131,8 @@ def load_config(path: Path = None) -> BenchmarkConfig:
             args=cfg["args"],
             model=cfg.get("model"),
             timeout_seconds=cfg.get("timeout_seconds", 300),
+            max_concurrency=cfg.get("max_concurrency"),
+            event_format=cfg.get("event_format"),
         ))
 
     test_runners = {}
@@ -48,10 +141,101 @@ def load_config(path: Path = None) -> BenchmarkConfig:
             language=lang,
             command=cfg["command"],
             pattern=cfg["pattern"],
+            dependencies=cfg.get("dependencies"),
+            report=cfg.get("report"),
+            timeout_seconds=cfg.get("timeout_seconds", 120),
+        )
+
+    workspace = raw.get("workspace", {})
+    tmpfs = None
+    if workspace.get("tmpfs"):
+        tmpfs = TmpfsConfig(
+            path=workspace["tmpfs"].get("path", "/dev/shm"),
+            budget_mb=workspace["tmpfs"].get("budget_mb", 1024),
+            build_estimate_mb=workspace["tmpfs"].get("build_estimate_mb", {}),
+        )
+
+    isolation = raw.get("isolation")
+    if isolation is not None:
+        isolation = IsolationConfig(
+            enabled=isolation.get("enabled", False),
+            cpus=isolation.get("cpus"),
+            memory_mb=isolation.get("memory_mb"),
+            pin_cpus=isolation.get("pin_cpus", False),
+            cgroup=isolation.get("cgroup"),
+        )
+
+    npm_cache = None
+    if raw.get("npm_cache"):
+        npm_cache = NpmCacheConfig(
+            path=raw["npm_cache"].get("path", ".cache/npm"),
+            offline=raw["npm_cache"].get("offline", False),
+        )
+
+    compile_cache = None
+    if raw.get("compile_cache"):
+        compile_cache = CompileCacheConfig(
+            path=raw["compile_cache"].get("path", ".cache/compile"),
+            enabled=raw["compile_cache"].get("enabled", False),
+            cc=raw["compile_cache"].get("cc", "gcc"),
+            cxx=raw["compile_cache"].get("cxx", "g++"),
+        )
+
+    results_db = None
+    if raw.get("results_db"):
+        results_db = ResultsDBConfig(path=raw["results_db"].get("path", "results/results.db"))
+
+    test_cache = None
+    if raw.get("test_cache"):
+        test_cache = TestCacheConfig(path=raw["test_cache"].get("path", ".cache/tests"))
+
+    pytest_server = None
+    if raw.get("pytest_server"):
+        pytest_server = PytestServerConfig(
+            enabled=raw["pytest_server"].get("enabled", False),
+            python=raw["pytest_server"].get("python", "python3"),
+        )
+
+    test_timeouts = raw.get("test_timeouts")
+    if test_timeouts is not None:
+        defaults = TestTimeoutConfig()
+        test_timeouts = TestTimeoutConfig(
+            adaptive=test_timeouts.get("adaptive", defaults.adaptive),
+            percentile=test_timeouts.get("percentile", defaults.percentile),
+            factor=test_timeouts.get("factor", defaults.factor),
+            min_seconds=test_timeouts.get("min_seconds", defaults.min_seconds),
+            max_seconds=test_timeouts.get("max_seconds", defaults.max_seconds),
+            min_samples=test_timeouts.get("min_samples", defaults.min_samples),
+            history_runs=test_timeouts.get("history_runs", defaults.history_runs),
+        )
+
+    compare = raw.get("compare")
+    if compare is not None:
+        defaults = CompareConfig()
+        compare = CompareConfig(
+            alpha=compare.get("alpha", defaults.alpha),
+            max_slowdown=compare.get("max_slowdown", defaults.max_slowdown),
+            max_cpu_increase=compare.get("max_cpu_increase", defaults.max_cpu_increase),
+            max_rss_increase=compare.get("max_rss_increase", defaults.max_rss_increase),
+            max_pass_rate_drop=compare.get("max_pass_rate_drop", defaults.max_pass_rate_drop),
+            bootstrap_samples=compare.get("bootstrap_samples", defaults.bootstrap_samples),
+            min_tasks=compare.get("min_tasks", defaults.min_tasks),
         )
 
     return BenchmarkConfig(
         agents=agents,
         test_runners=test_runners,
         results_dir=raw.get("results_dir", "results"),
+        workspace_strategy=workspace.get("strategy", "auto"),
+        workspace_prewarm=workspace.get("prewarm", 0),
+        workspace_tmpfs=tmpfs,
+        workspace_cleanup_queue=workspace.get("cleanup_queue", 8),
+        isolation=isolation,
+        npm_cache=npm_cache,
+        compile_cache=compile_cache,
+        pytest_server=pytest_server,
+        test_timeouts=test_timeouts,
+        test_cache=test_cache,
+        results_db=results_db,
+        compare=compare,
     )
@@ -0,0 +1,229 @@
+"""Export per-pair results of one or more runs as CSV, JSON Lines and HTML.
+
+Results are read one file at a time and written out as they are read, so
+the size of the matrix only affects the size of the output files. The HTML
+page is self-contained: its tables are sorted, filtered and paginated in the
+browser.
+"""
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+
+from harness.results import flatten_result, iter_results, score_from_result
+from harness.scoring import SummaryAggregator
+
+FORMATS = ("csv", "jsonl", "html")
+OUTPUT_NAMES = {"csv": "results.csv", "jsonl": "results.jsonl", "html": "report.html"}
+# Columns of the flat rows, in output order
+COLUMNS = ["run_id", *flatten_result({"task": "", "agent": ""})]
+HTML_HIDDEN = {"fingerprint", "dry_run", "read_bytes", "write_bytes"}
+SUMMARY_COLUMNS = [
+    "run_id", "agent", "total_tasks", "tasks_fully_passed", "avg_correctness", "avg_speed_seconds",
+    "speed_p50_seconds", "speed_p90_seconds", "speed_p99_seconds", "timeout_rate", "tasks_solved_per_hour",
+    "correctness_per_second", "avg_cpu_seconds", "max_peak_rss_mb", "total_output_tokens", "stray_processes",
+]
+
+
+def iter_rows(run_dirs: list[Path]):
+    """Yield (run_id, result document) for every result in run_dirs, in order."""
+    for run_dir in run_dirs:
+        for _, data in iter_results(run_dir):
+            yield run_dir.name, data
+
+
+def export(run_dirs: list[Path], output_dir: Path, formats: tuple[str, ...] = FORMATS) -> dict[str, Path]:
+    """Write the requested formats to output_dir; returns the path of each."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = {fmt: output_dir / OUTPUT_NAMES[fmt] for fmt in formats}
+    aggregators: dict[str, SummaryAggregator] = {}
+    with _Writers(paths) as writers:
+        for run_id, data in iter_rows(run_dirs):
+            row = {"run_id": run_id, **flatten_result(data)}
+            writers.write(row)
+            aggregators.setdefault(run_id, SummaryAggregator()).add(score_from_result(data))
+        summary_rows = [
+            {"run_id": run_id, "agent": agent, **{k: v for k, v in agent_summary.items() if k in SUMMARY_COLUMNS}}
+            for run_id, aggregator in aggregators.items()
+            for agent, agent_summary in aggregator.summary().items()
+        ]
+        writers.finish(summary_rows)
+    return paths
+
+
+class _Writers:
+    def __init__(self, paths: dict[str, Path]):
+        self.paths = paths
+        self.files = {}
+        self.csv = None
+        self.rows = 0
+
+    def __enter__(self) -> "_Writers":
+        for fmt, path in self.paths.items():
+            self.files[fmt] = open(path, "w", newline="" if fmt == "csv" else None)
+        if "csv" in self.files:
+            self.csv = csv.DictWriter(self.files["csv"], COLUMNS)
+            self.csv.writeheader()
+        if "html" in self.files:
+            head, _ = HTML_TEMPLATE.split("{rows}")
+            self.files["html"].write(head.replace("{columns}", _script_json(
+                [c for c in COLUMNS if c not in HTML_HIDDEN]
+            )))
+        return self
+
+    def write(self, row: dict) -> None:
+        if self.csv is not None:
+            self.csv.writerow(row)
+        if "jsonl" in self.files:
+            self.files["jsonl"].write(json.dumps(row) + "\n")
+        if "html" in self.files:
+            values = [row[c] for c in COLUMNS if c not in HTML_HIDDEN]
+            self.files["html"].write(("," if self.rows else "") + _script_json(values) + "\n")
+        self.rows += 1
+
+    def finish(self, summary_rows: list[dict]) -> None:
+        if "html" in self.files:
+            _, tail = HTML_TEMPLATE.split("{rows}")
+            tail = tail.replace("{summary_columns}", _script_json(SUMMARY_COLUMNS))
+            tail = tail.replace("{summary_rows}", _script_json(
+                [[row.get(c) for c in SUMMARY_COLUMNS] for row in summary_rows]
+            ))
+            self.files["html"].write(tail)
+
+    def __exit__(self, *exc) -> None:
+        for f in self.files.values():
+            f.close()
+
+
+def _script_json(value) -> str:
+    # "</script>" or "<!--" in an error message must not end or disturb the data block
+    return json.dumps(value).replace("<", "\\u003c")
+
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Benchmark results</title>
+<style>
+body { font: 14px system-ui, sans-serif; margin: 1.5em; color: #222; }
+h1 { font-size: 1.4em; } h2 { font-size: 1.1em; margin-top: 2em; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; white-space: nowrap; }
+td.num { text-align: right; font-variant-numeric: tabular-nums; }
+td.error { white-space: normal; max-width: 30em; color: #a00; }
+th { cursor: pointer; background: #f4f4f4; position: sticky; top: 0; user-select: none; }
+th.asc::after { content: " \\25B2"; } th.desc::after { content: " \\25BC"; }
+tr.fail td:first-child { border-left: 3px solid #c33; }
+.controls { margin: 0.8em 0; display: flex; gap: 1em; align-items: center; }
+.scroll { overflow-x: auto; }
+</style>
+</head>
+<body>
+<h1>Benchmark results</h1>
+<h2>Summary</h2>
+<div class="controls" id="summary-controls"></div>
+<div class="scroll"><table id="summary"></table></div>
+<h2>Results</h2>
+<div class="controls" id="results-controls"></div>
+<div class="scroll"><table id="results"></table></div>
+<script>
+const RESULT_COLUMNS = {columns};
+const RESULT_ROWS = [
+{rows}];
+const SUMMARY_COLUMNS = {summary_columns};
+const SUMMARY_ROWS = {summary_rows};
+
+function sortableTable(table, controls, columns, rows, pageSize) {
+  const state = { key: -1, asc: true, page: 0, filter: "", size: pageSize };
+  const filterInput = Object.assign(document.createElement("input"), { placeholder: "Filter", type: "search" });
+  const sizeSelect = document.createElement("select");
+  for (const n of [25, 50, 100, 500]) sizeSelect.add(new Option(n + " per page", n, false, n === pageSize));
+  const prev = Object.assign(document.createElement("button"), { textContent: "\\u2190 Prev" });
+  const next = Object.assign(document.createElement("button"), { textContent: "Next \\u2192" });
+  const info = document.createElement("span");
+  controls.append(filterInput, sizeSelect, prev, next, info);
+  filterInput.oninput = () => { state.filter = filterInput.value.toLowerCase(); state.page = 0; render(); };
+  sizeSelect.onchange = () => { state.size = +sizeSelect.value; state.page = 0; render(); };
+  prev.onclick = () => { state.page--; render(); };
+  next.onclick = () => { state.page++; render(); };
+
+  const head = table.createTHead().insertRow();
+  columns.forEach((name, i) => {
+    const th = document.createElement("th");
+    th.textContent = name;
+    th.onclick = () => { state.asc = state.key === i ? !state.asc : true; state.key = i; render(); };
+    head.appendChild(th);
+  });
+  const body = table.createTBody();
+  const failed = columns.indexOf("passed");
+  const error = columns.indexOf("error");
+
+  function compare(a, b) {
+    if (a === b) return 0;
+    if (a === null) return 1;
+    if (b === null) return -1;
+    return (typeof a === "number" && typeof b === "number" ? a - b : String(a).localeCompare(String(b)));
+  }
+
+  function render() {
+    let view = state.filter
+      ? rows.filter(r => r.some(v => v !== null && String(v).toLowerCase().includes(state.filter)))
+      : rows.slice();
+    if (state.key >= 0) {
+      view.sort((a, b) => (state.asc ? 1 : -1) * compare(a[state.key], b[state.key]));
+    }
+    const pages = Math.max(1, Math.ceil(view.length / state.size));
+    state.page = Math.min(Math.max(state.page, 0), pages - 1);
+    body.replaceChildren();
+    for (const r of view.slice(state.page * state.size, (state.page + 1) * state.size)) {
+      const tr = body.insertRow();
+      if (failed >= 0 && r[failed] === false) tr.className = "fail";
+      r.forEach((v, i) => {
+        const td = tr.insertCell();
+        td.textContent = v === null ? "" : typeof v === "number" && !Number.isInteger(v) ? v.toFixed(2) : String(v);
+        if (typeof v === "number") td.className = "num";
+        if (i === error) td.className = "error";
+      });
+    }
+    head.querySelectorAll("th").forEach((th, i) => {
+      th.className = i === state.key ? (state.asc ? "asc" : "desc") : "";
+    });
+    prev.disabled = state.page === 0;
+    next.disabled = state.page >= pages - 1;
+    info.textContent = `${view.length} row(s), page ${state.page + 1} of ${pages}`;
+  }
+  render();
+}
+
+sortableTable(document.getElementById("summary"), document.getElementById("summary-controls"),
+  SUMMARY_COLUMNS, SUMMARY_ROWS, 25);
+sortableTable(document.getElementById("results"), document.getElementById("results-controls"),
+  RESULT_COLUMNS, RESULT_ROWS, 50);
+</script>
+</body>
+</html>
+"""
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Export run results as CSV, JSON Lines and a static HTML report")
+    parser.add_argument("run_dirs", nargs="+", type=Path, help="Run directories to export")
+    parser.add_argument("--output", "-o", type=Path,
+                        help="Directory for the exported files (default: the first run directory)")
+    parser.add_argument("--format", "-f", dest="formats", action="append", choices=FORMATS,
+                        help="Format to write; repeat for several (default: all)")
+    args = parser.parse_args(argv)
+
+    for run_dir in args.run_dirs:
+        if not run_dir.is_dir():
+            print(f"ERROR: {run_dir} is not a directory")
+            sys.exit(1)
+    paths = export(args.run_dirs, args.output or args.run_dirs[0], tuple(args.formats or FORMATS))
+    for fmt, path in paths.items():
+        print(f"  {fmt}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import hashlib
+import os
+from pathlib import Path
+
+
+def hash_tree(root: Path, h=None, exclude: frozenset[str] = frozenset()):
+    if h is None:
+        h = hashlib.sha256()
+    if not root.exists():
+        h.update(b"<missing>")
+        return h
+    _hash_dir(root, "", h, exclude)
+    return h
+
+
+def _hash_dir(directory: Path, prefix: str, h, exclude: frozenset[str]) -> None:
+    # Siblings in name order with each directory's contents right after it is
+    # the order of sorted(root.rglob("*")), but excluded directories are never
+    # entered. Like rglob, symlinked directories are not followed.
+    try:
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except PermissionError:
+        return
+    for entry in entries:
+        if entry.name in exclude:
+            continue
+        rel = prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            _hash_dir(Path(entry.path), rel + "/", h, exclude)
+        elif entry.is_file():
+            h.update(rel.encode())
+            h.update(b"\0")
+            h.update(hashlib.sha256(Path(entry.path).read_bytes()).digest())
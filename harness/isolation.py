@@ -0,0 +1,208 @@
+import math
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from harness.config import IsolationConfig
+
+CGROUP_FS = Path("/sys/fs/cgroup")
+CONTROLLERS = ("cpu", "memory", "cpuset")
+CPU_PERIOD_US = 100_000
+
+# Commands are started through /bin/sh so that the limits apply before the
+# command runs and to everything it spawns. Writing 0 to cgroup.procs moves the
+# writing process, i.e. the shell that then execs the command.
+_CGROUP_EXEC = 'echo 0 > "$1" || exit 126; shift; exec "$@"'
+_RLIMIT_EXEC = 'ulimit -d "$1" || exit 126; shift; exec "$@"'
+
+
+class IsolationUnavailable(Exception):
+    pass
+
+
+def own_cgroup() -> Path | None:
+    try:
+        lines = Path("/proc/self/cgroup").read_text().splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        if line.startswith("0::"):
+            return CGROUP_FS / line[3:].lstrip("/")
+    return None
+
+
+def prepare_cgroup_root(configured: str | None = None) -> Path:
+    if not (CGROUP_FS / "cgroup.controllers").exists():
+        raise IsolationUnavailable(f"no cgroup v2 hierarchy at {CGROUP_FS}")
+    root = Path(configured) if configured else own_cgroup()
+    if root is None or not root.is_dir():
+        raise IsolationUnavailable("cannot find the harness's cgroup")
+    available = (root / "cgroup.controllers").read_text().split()
+    missing = [c for c in CONTROLLERS if c not in available]
+    if missing:
+        raise IsolationUnavailable(f"{', '.join(missing)} not delegated to {root}")
+    try:
+        if not configured:
+            # Only leaf groups may hold processes once controllers are enabled
+            # for children, so the harness moves itself into a leaf of its own.
+            leaf = root / "harness"
+            leaf.mkdir(exist_ok=True)
+            (leaf / "cgroup.procs").write_text(str(os.getpid()))
+        (root / "cgroup.subtree_control").write_text(" ".join(f"+{c}" for c in CONTROLLERS))
+    except OSError as e:
+        raise IsolationUnavailable(f"cannot set up {root}: {e}") from e
+    return root
+
+
+def _read_keyed(path: Path) -> dict[str, int]:
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return {}
+    return {key: int(value) for key, value in (line.split() for line in lines if line)}
+
+
+def _format_cpus(cpus: list[int]) -> str:
+    return ",".join(str(cpu) for cpu in cpus)
+
+
+class Sandbox:
+    """Limits for the processes of one agent or test run.
+
+    wrap() prefixes a command so that it starts inside the sandbox; the same
+    sandbox may be used for several commands in sequence. close() returns what
+    the sandbox observed and removes it.
+    """
+
+    def __init__(self, mode: str, prefix: list[str], limits: dict, group: Path | None = None):
+        self.mode = mode
+        self.prefix = prefix
+        self.limits = limits
+        self.group = group
+
+    def wrap(self, args: list[str] | str, shell: bool = False) -> list[str]:
+        command = ["/bin/sh", "-c", args] if shell else list(args)
+        return [*self.prefix, *command]
+
+    def close(self) -> dict:
+        report = {"mode": self.mode, **self.limits}
+        if self.group is None:
+            return report
+        cpu = _read_keyed(self.group / "cpu.stat")
+        events = _read_keyed(self.group / "memory.events")
+        try:
+            peak = int((self.group / "memory.peak").read_text())
+        except (OSError, ValueError):
+            peak = None
+        report.update(
+            cpu_seconds=round(cpu.get("usage_usec", 0) / 1e6, 3),
+            throttled_periods=cpu.get("nr_throttled", 0),
+            throttled_seconds=round(cpu.get("throttled_usec", 0) / 1e6, 3),
+            memory_peak_mb=round(peak / (1024 * 1024), 1) if peak is not None else None,
+            memory_max_events=events.get("max", 0),
+            oom_kills=events.get("oom_kill", 0),
+        )
+        self._remove()
+        return report
+
+    def _remove(self) -> None:
+        # Process-tree teardown has normally emptied the group already;
+        # cgroup.kill catches anything that slipped past it.
+        try:
+            (self.group / "cgroup.kill").write_text("1")
+        except OSError:
+            pass
+        for _ in range(20):
+            try:
+                self.group.rmdir()
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                time.sleep(0.05)
+
+
+class Isolation:
+    def __init__(self, config: IsolationConfig, jobs: int = 1):
+        self.config = config
+        self.cgroup_root: Path | None = None
+        self.fallback_reason: str | None = None
+        try:
+            self.cgroup_root = prepare_cgroup_root(config.cgroup)
+        except IsolationUnavailable as e:
+            self.fallback_reason = str(e)
+        self._taskset = shutil.which("taskset")
+
+        available = sorted(os.sched_getaffinity(0))
+        size = math.ceil(config.cpus) if config.cpus else max(1, len(available) // max(1, jobs))
+        size = min(size, len(available))
+        self.cpu_slots: list[list[int]] = [
+            available[i:i + size] for i in range(0, len(available) - size + 1, size)
+        ] if config.pin_cpus else []
+        self._slot_users = [0] * len(self.cpu_slots)
+
+    @property
+    def mode(self) -> str:
+        return "cgroup" if self.cgroup_root is not None else "rlimit"
+
+    def describe(self) -> str:
+        if self.cgroup_root is not None:
+            text = f"cgroup v2 groups under {self.cgroup_root}"
+        else:
+            text = f"taskset/rlimit fallback ({self.fallback_reason}; CPU quota not enforced)"
+        if self.cpu_slots:
+            text += f", {len(self.cpu_slots)} CPU set(s) of {len(self.cpu_slots[0])}"
+        return text
+
+    def acquire_cpus(self) -> list[int] | None:
+        # More concurrent pairs than CPU sets share the least used set
+        if not self.cpu_slots:
+            return None
+        index = min(range(len(self.cpu_slots)), key=self._slot_users.__getitem__)
+        self._slot_users[index] += 1
+        return self.cpu_slots[index]
+
+    def release_cpus(self, cpus: list[int] | None) -> None:
+        if cpus is not None:
+            self._slot_users[self.cpu_slots.index(cpus)] -= 1
+
+    def sandbox(self, name: str, cpus: list[int] | None = None) -> Sandbox:
+        limits = {
+            "cpus": _format_cpus(cpus) if cpus else None,
+            "cpu_quota": self.config.cpus,
+            "memory_mb": self.config.memory_mb,
+        }
+        if self.cgroup_root is not None:
+            return self._cgroup_sandbox(name, cpus, limits)
+
+        prefix = []
+        if self.config.memory_mb:
+            prefix += ["/bin/sh", "-c", _RLIMIT_EXEC, "isolate", str(self.config.memory_mb * 1024)]
+        if cpus and self._taskset:
+            prefix += [self._taskset, "-c", _format_cpus(cpus)]
+        elif cpus:
+            limits["cpus"] = None
+        limits["cpu_quota"] = None
+        return Sandbox("rlimit", prefix, limits)
+
+    def _cgroup_sandbox(self, name: str, cpus: list[int] | None, limits: dict) -> Sandbox:
+        group = self.cgroup_root / f"{name}-{uuid.uuid4().hex[:8]}"
+        group.mkdir()
+        try:
+            if self.config.cpus:
+                (group / "cpu.max").write_text(f"{int(self.config.cpus * CPU_PERIOD_US)} {CPU_PERIOD_US}")
+            if self.config.memory_mb:
+                (group / "memory.max").write_text(str(self.config.memory_mb * 1024 * 1024))
+                try:
+                    # Hitting the ceiling should OOM-kill, not swap
+                    (group / "memory.swap.max").write_text("0")
+                except OSError:
+                    pass
+            if cpus:
+                (group / "cpuset.cpus").write_text(_format_cpus(cpus))
+        except OSError:
+            group.rmdir()
+            raise
+        return Sandbox("cgroup", ["/bin/sh", "-c", _CGROUP_EXEC, "isolate", str(group / "cgroup.procs")], limits, group)
@@ -0,0 +1,75 @@
+import argparse
+import json
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from harness.results import iter_results, score_from_result
+from harness.run import print_results, save_summary
+from harness.scoring import TaskScore
+
+
+def merge_runs(run_dirs: list[Path], output_dir: Path) -> list[TaskScore]:
+    seen: dict[tuple[str, str], Path] = {}
+    scores: list[TaskScore] = []
+    expected: set[tuple[str, str]] = set()
+    shards: dict[int, set[int]] = {}
+
+    for run_dir in run_dirs:
+        if not run_dir.is_dir():
+            raise ValueError(f"{run_dir} is not a directory")
+        manifest = run_dir / "shard.json"
+        if manifest.exists():
+            meta = json.loads(manifest.read_text())
+            index, count = meta["shard"]
+            shards.setdefault(count, set()).add(index)
+            expected.update((task, agent) for task, agent in meta["pairs"])
+
+        for path, data in iter_results(run_dir):
+            key = (data["task"], data["agent"])
+            if key in seen:
+                raise ValueError(f"{key[0]}/{key[1]} appears in both {seen[key]} and {run_dir}")
+            seen[key] = run_dir
+            scores.append(score_from_result(data))
+
+    if len(shards) > 1:
+        raise ValueError(f"Shards come from different partitions: {sorted(shards)}")
+    for count, indices in shards.items():
+        missing = sorted(set(range(1, count + 1)) - indices)
+        if missing:
+            print(f"WARNING: missing shard(s) {', '.join(f'{i}/{count}' for i in missing)}")
+    incomplete = sorted(expected - seen.keys())
+    if incomplete:
+        print(f"WARNING: {len(incomplete)} scheduled pair(s) have no result, e.g. {incomplete[0][0]}/{incomplete[0][1]}")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for run_dir in run_dirs:
+        for agent_dir in (p for p in run_dir.iterdir() if p.is_dir()):
+            shutil.copytree(agent_dir, output_dir / agent_dir.name, dirs_exist_ok=True)
+
+    scores.sort(key=lambda s: (s.task, s.agent))
+    save_summary(output_dir, scores)
+    return scores
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Merge per-shard benchmark results into one run")
+    parser.add_argument("run_dirs", nargs="+", type=Path, help="Result directories to merge")
+    parser.add_argument("--output", "-o", type=Path,
+                        help="Merged run directory (default: a new run next to the first input)")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output or args.run_dirs[0].parent / datetime.now().strftime("%Y-%m-%d-%H%M%S-merged")
+    try:
+        scores = merge_runs(args.run_dirs, output_dir)
+    except ValueError as e:
+        print(f"Cannot merge: {e}")
+        sys.exit(1)
+
+    print_results(scores)
+    print(f"\nMerged {len(scores)} results into {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import hashlib
+import platform
+import shutil
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+from harness.config import load_config
+from harness.process import run_process
+from harness.task_loader import load_tasks
+from harness.workspace import link_tree
+
+MANIFESTS = ("package.json", "package-lock.json")
+INSTALL_TIMEOUT = 600
+NPM_FLAGS = ["--no-audit", "--no-fund", "--quiet"]
+
+
+class NpmCacheError(Exception):
+    pass
+
+
+def _node_version() -> str:
+    # Native addons are built against a particular node ABI
+    try:
+        return subprocess.run(["node", "--version"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "none"
+
+
+class NpmCache:
+    """node_modules trees keyed by a hash of package.json and package-lock.json.
+
+    Each store entry holds the manifests it was installed from and the
+    resulting node_modules; entries are never modified once they exist, so
+    workspaces get reflinks or hard links to them rather than copies.
+    """
+
+    def __init__(self, store: Path, offline: bool = False):
+        self.store = store
+        self.offline = offline
+        self.hits = 0
+        self.installs = 0
+        self._node_version: str | None = None
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._warned_copy = False
+
+    def key(self, project_dir: Path) -> str | None:
+        if not (project_dir / "package.json").is_file():
+            return None
+        if self._node_version is None:
+            self._node_version = _node_version()
+        h = hashlib.sha256(f"{self._node_version}\0{platform.machine()}\0".encode())
+        for name in MANIFESTS:
+            path = project_dir / name
+            h.update(f"\0{name}\0".encode())
+            if path.is_file():
+                h.update(path.read_bytes())
+        return h.hexdigest()[:32]
+
+    async def ensure(self, project_dir: Path, log_dir: Path | None = None) -> Path | None:
+        """Return the store entry for project_dir's dependencies, installing them on a miss."""
+        key = await asyncio.to_thread(self.key, project_dir)
+        if key is None:
+            return None
+        entry = self.store / key
+        # Pairs sharing a dependency set wait for one install instead of racing
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if (entry / "node_modules").is_dir():
+                self.hits += 1
+                return entry
+            if self.offline:
+                raise NpmCacheError(f"npm dependencies {key} are not in the offline store {self.store}")
+            await self._install(project_dir, entry, log_dir)
+            self.installs += 1
+            return entry
+
+    async def materialize(self, workspace: Path, log_dir: Path | None = None) -> str | None:
+        entry = await self.ensure(workspace, log_dir)
+        if entry is None:
+            return None
+        strategy = await asyncio.to_thread(link_tree, entry / "node_modules", workspace / "node_modules")
+        if strategy == "copy" and not self._warned_copy:
+            self._warned_copy = True
+            print(f"WARNING: node_modules is copied from the npm cache into every workspace: {self.store} "
+                  f"and {workspace.parent} are not on one filesystem")
+        return strategy
+
+    async def _install(self, project_dir: Path, entry: Path, log_dir: Path | None) -> None:
+        staging = self.store / f".tmp-{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+        try:
+            for name in MANIFESTS:
+                if (project_dir / name).is_file():
+                    shutil.copy2(project_dir / name, staging / name)
+            command = "ci" if (staging / "package-lock.json").is_file() else "install"
+            result = await run_process(
+                ["npm", command, *NPM_FLAGS], cwd=staging, timeout=INSTALL_TIMEOUT,
+                stdout_log=log_dir / "npm-install.stdout.log" if log_dir else None,
+                stderr_log=log_dir / "npm-install.stderr.log" if log_dir else None,
+            )
+            if result.timed_out:
+                raise NpmCacheError(f"npm {command} timed out after {INSTALL_TIMEOUT}s")
+            if result.returncode != 0:
+                # npm ends with pointers to its debug log; the first error line says what went wrong
+                errors = [line for line in result.stderr.splitlines() if "error" in line.lower()]
+                raise NpmCacheError(f"npm {command} failed: {errors[0] if errors else f'exit code {result.returncode}'}")
+            (staging / "node_modules").mkdir(exist_ok=True)
+            try:
+                # Another harness sharing the store may have installed the same set first
+                staging.rename(entry)
+            except OSError:
+                if not (entry / "node_modules").is_dir():
+                    raise
+        finally:
+            if staging.exists():
+                await asyncio.to_thread(shutil.rmtree, staging, True)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Install the npm dependencies of every task into the npm cache")
+    parser.add_argument("--tasks-dir", type=Path, default=Path(__file__).parent.parent / "tasks")
+    parser.add_argument("--config", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if config.npm_cache is None:
+        print("No npm_cache configured.")
+        sys.exit(1)
+    cache = NpmCache(Path(__file__).parent.parent / config.npm_cache.path)
+
+    async def seed() -> None:
+        for task in load_tasks(args.tasks_dir):
+            entry = await cache.ensure(task.repo_dir)
+            if entry is not None:
+                print(f"  {task.name}: {entry.name}")
+
+    try:
+        asyncio.run(seed())
+    except NpmCacheError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    print(f"{cache.installs} installed, {cache.hits} already cached in {cache.store}")
+
+
+if __name__ == "__main__":
+    main()
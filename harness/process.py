@@ -0,0 +1,303 @@
+import asyncio
+import os
+import signal
+import subprocess
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from harness.isolation import Sandbox
+from harness.resources import ProcessTreeSampler, ResourceUsage, has_procfs, pipe_holders, tree_members
+
+# Only the beginning and end of each stream are kept in memory; the full
+# stream goes to the log file when one is given.
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 1024 * 1024
+_CHUNK = 64 * 1024
+# Longest stdout line handed to a line consumer; longer lines are skipped
+MAX_LINE_BYTES = 16 * 1024 * 1024
+# How long a process tree gets between SIGTERM and SIGKILL
+TERM_GRACE_SECONDS = 2.0
+# SIGKILL sweeps before giving up on a tree that keeps forking
+KILL_ROUNDS = 5
+_POLL_SECONDS = 0.05
+# How long to keep reading pipes after the tree is gone; anything still
+# holding them open has escaped the tree and is found by the pipes it holds
+PIPE_DRAIN_SECONDS = 1.0
+
+
+@dataclass
+class ProcessResult:
+    returncode: int | None
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    resources: ResourceUsage | None = None
+    # Processes left behind after the main process exited, all of which were killed
+    stray_processes: int = 0
+    # From start until the main process exited or timed out, without teardown
+    wall_clock_seconds: float = 0.0
+
+
+class OutputCapture:
+    def __init__(self, log_path: Path | None = None, head_bytes: int = HEAD_BYTES, tail_bytes: int = TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.total_bytes = 0
+        self._head = bytearray()
+        self._tail: deque[bytes] = deque()
+        self._tail_size = 0
+        self._log = None
+        if log_path is not None:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(log_path, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.total_bytes += len(chunk)
+        if self._log is not None:
+            self._log.write(chunk)
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += chunk[:room]
+            chunk = chunk[room:]
+        if not chunk:
+            return
+        self._tail.append(chunk)
+        self._tail_size += len(chunk)
+        while self._tail_size - len(self._tail[0]) >= self.tail_bytes:
+            self._tail_size -= len(self._tail.popleft())
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_bytes > len(self._head) + self._tail_size
+
+    def text(self) -> str:
+        tail = b"".join(self._tail)
+        if not self.truncated:
+            return (bytes(self._head) + tail).decode(errors="replace")
+        tail = tail[-self.tail_bytes:]
+        skipped = self.total_bytes - len(self._head) - len(tail)
+        return (
+            bytes(self._head).decode(errors="replace")
+            + f"\n... [{skipped} bytes truncated] ...\n"
+            + tail.decode(errors="replace")
+        )
+
+
+class LineSplitter:
+    def __init__(self, on_line: Callable[[bytes, float], None], max_line_bytes: int = MAX_LINE_BYTES):
+        self.on_line = on_line
+        self.max_line_bytes = max_line_bytes
+        self.dropped_lines = 0
+        self._partial = bytearray()
+        self._overflow = False
+
+    def write(self, chunk: bytes) -> None:
+        now = time.monotonic()
+        *lines, rest = chunk.split(b"\n")
+        for line in lines:
+            if not self._overflow:
+                self._partial += line
+                self.on_line(bytes(self._partial), now)
+            self._partial.clear()
+            self._overflow = False
+        if not self._overflow:
+            self._partial += rest
+            if len(self._partial) > self.max_line_bytes:
+                self._partial.clear()
+                self._overflow = True
+                self.dropped_lines += 1
+
+    def close(self) -> None:
+        if self._partial and not self._overflow:
+            self.on_line(bytes(self._partial), time.monotonic())
+        self._partial.clear()
+
+
+async def run_process(
+    args: list[str] | str,
+    cwd: Path | None = None,
+    timeout: float | None = None,
+    shell: bool = False,
+    stdout_log: Path | None = None,
+    stderr_log: Path | None = None,
+    on_stdout_line: Callable[[bytes, float], None] | None = None,
+    sandbox: Sandbox | None = None,
+) -> ProcessResult:
+    if sandbox is not None:
+        args, shell = sandbox.wrap(args, shell), False
+    # Popen plus our own wait4() instead of asyncio subprocesses: asyncio's child
+    # watcher reaps the process itself and throws away its rusage. Each process
+    # gets its own session so that everything it spawns can be found and torn down.
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        args, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        cwd=str(cwd) if cwd else None, start_new_session=True,
+    )
+    pipes = {os.fstat(proc.stdout.fileno()).st_ino, os.fstat(proc.stderr.fileno()).st_ino}
+    loop = asyncio.get_running_loop()
+    out = OutputCapture(stdout_log)
+    err = OutputCapture(stderr_log)
+    lines = LineSplitter(on_stdout_line) if on_stdout_line else None
+    sampler = ProcessTreeSampler(proc.pid)
+    sampling = asyncio.ensure_future(sampler.run())
+    exited = asyncio.ensure_future(_wait_exit(proc.pid))
+    stdout_transport, stdout_reader = await _reader(loop, proc.stdout)
+    stderr_transport, stderr_reader = await _reader(loop, proc.stderr)
+    pumps = asyncio.gather(_pump(stdout_reader, out, lines), _pump(stderr_reader, err))
+
+    timed_out = False
+    try:
+        try:
+            await asyncio.wait_for(asyncio.shield(exited), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        except asyncio.CancelledError:
+            sampling.cancel()
+            await terminate_tree(proc.pid, dict(sampler.seen), exited, grace=0)
+            await exited
+            raise
+        elapsed = time.monotonic() - start
+        sampling.cancel()
+        strays = await terminate_tree(proc.pid, dict(sampler.seen), exited)
+        status, rusage = await exited
+        try:
+            await asyncio.wait_for(asyncio.shield(pumps), PIPE_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            # Escaped the tree before it was ever sampled (e.g. an immediate
+            # setsid) but still holds the pipes: kill it and whatever it spawned
+            holders = await asyncio.to_thread(pipe_holders, pipes)
+            strays += max(await terminate_tree(proc.pid, holders), 1)
+            try:
+                await asyncio.wait_for(asyncio.shield(pumps), PIPE_DRAIN_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        sampling.cancel()
+        pumps.cancel()
+        await asyncio.gather(pumps, return_exceptions=True)
+        stdout_transport.close()
+        stderr_transport.close()
+        out.close()
+        err.close()
+        if lines is not None:
+            lines.close()
+
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return ProcessResult(
+        returncode=None if timed_out else proc.returncode,
+        stdout=out.text(),
+        stderr=err.text(),
+        timed_out=timed_out,
+        stdout_bytes=out.total_bytes,
+        stderr_bytes=err.total_bytes,
+        resources=sampler.usage(rusage),
+        stray_processes=strays,
+        wall_clock_seconds=elapsed,
+    )
+
+
+async def terminate_tree(
+    root: int,
+    known: dict[int, int],
+    exited: asyncio.Future | None = None,
+    grace: float = TERM_GRACE_SECONDS,
+) -> int:
+    """SIGTERM everything left of root's process tree, then SIGKILL what survives the grace period.
+
+    The root itself is only signalled while `exited` is pending, i.e. before it
+    has been reaped and its pid could be reused. Returns how many processes
+    other than the root were still alive at the start.
+    """
+    strays = None
+    termed: set[int] = set()
+    group_termed = False
+    deadline = time.monotonic() + grace
+    kill_rounds = 0
+    while True:
+        members = await asyncio.to_thread(tree_members, root, known)
+        known.update(members)
+        targets = list(members)
+        if exited is not None and not exited.done():
+            targets.append(root)
+        # The tree started its own session, so its process group is the root's
+        # pid. The group is always signalled too; without procfs it is also the
+        # only way to tell whether anything is left (zombies included).
+        group_alive = not has_procfs() and _signal_group(root, 0)
+        if strays is None:
+            strays = len(members) or int(group_alive and not targets)
+        if (not targets and not group_alive) or kill_rounds >= KILL_ROUNDS:
+            return strays
+        if time.monotonic() < deadline:
+            for pid in targets:
+                if pid not in termed:
+                    _signal(pid, signal.SIGTERM)
+                    termed.add(pid)
+            if not group_termed:
+                _signal_group(root, signal.SIGTERM)
+                group_termed = True
+        else:
+            # Repeated sweeps catch children forked while the tree was dying
+            kill_rounds += 1
+            for pid in targets:
+                _signal(pid, signal.SIGKILL)
+            _signal_group(root, signal.SIGKILL)
+        await asyncio.sleep(_POLL_SECONDS)
+
+
+async def _reader(loop: asyncio.AbstractEventLoop, pipe) -> tuple[asyncio.ReadTransport, asyncio.StreamReader]:
+    reader = asyncio.StreamReader(limit=_CHUNK)
+    transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return transport, reader
+
+
+async def _pump(stream: asyncio.StreamReader, capture: OutputCapture, lines: LineSplitter | None = None) -> None:
+    while chunk := await stream.read(_CHUNK):
+        capture.write(chunk)
+        if lines is not None:
+            lines.write(chunk)
+
+
+async def _wait_exit(pid: int):
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        # No pidfd support: block a worker thread instead
+        _, status, rusage = await asyncio.to_thread(os.wait4, pid, 0)
+        return status, rusage
+
+    loop = asyncio.get_running_loop()
+    ready = loop.create_future()
+    loop.add_reader(pidfd, lambda: ready.done() or ready.set_result(None))
+    try:
+        await ready
+    finally:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+    _, status, rusage = os.wait4(pid, 0)
+    return status, rusage
+
+
+def _signal_group(pgid: int, sig: int) -> bool:
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+def _signal(pid: int, sig: int) -> None:
+    # Not Popen.kill(): it polls first and could reap the child behind wait4()'s back
+    try:
+        os.kill(pid, sig)
+    except ProcessLookupError:
+        pass
@@ -0,0 +1,251 @@
+"""Forkserver for pytest runs.
+
+`serve` runs in a long-lived interpreter with pytest and its plugins already
+imported. For every request it forks a child, which takes over the client's
+stdin/stdout/stderr, working directory, environment and resource limits, starts
+its own session and runs pytest.main(). Nothing of the agent's code is ever
+imported into the server, so every run starts from the same clean state.
+
+`connect` is the client, used in place of `python -m pytest` in test runner
+commands. It only needs the standard library and runs under `python -S`. It
+passes its standard streams to the server and exits with pytest's exit code.
+When the client dies (for example when a test run times out), the server kills
+the child's process group. Without a reachable server, the client execs the
+fallback interpreter with `-m pytest` instead.
+"""
+import argparse
+import json
+import os
+import selectors
+import shlex
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+START_TIMEOUT = 30
+_MAX_REQUEST = 1 << 20
+
+
+class PytestForkServer:
+    def __init__(self, python: str = "python3"):
+        self.python = python
+        self.proc: subprocess.Popen | None = None
+        self._dir: Path | None = None
+        self.socket_path: Path | None = None
+
+    def start(self) -> bool:
+        """Start the server; returns False (and leaves it stopped) if it does not come up."""
+        self._dir = Path(tempfile.mkdtemp(prefix="bench-pytest-"))
+        self.socket_path = self._dir / "server.sock"
+        self.proc = subprocess.Popen(
+            [self.python, "-m", "harness.pytest_server", "serve", str(self.socket_path)],
+            cwd=REPO_ROOT, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL, start_new_session=True,
+        )
+        selector = selectors.DefaultSelector()
+        selector.register(self.proc.stdout, selectors.EVENT_READ)
+        ready = selector.select(START_TIMEOUT) and self.proc.stdout.readline().strip() == b"ready"
+        selector.close()
+        if not ready:
+            self.stop()
+        return bool(ready)
+
+    def command(self) -> str:
+        """Shell words that run pytest through this server."""
+        return shlex.join([
+            sys.executable, "-S", __file__, "connect", "--fallback", self.python, str(self.socket_path), "--",
+        ])
+
+    def stop(self) -> None:
+        if self.proc is not None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+            self.proc.stdout.close()
+            self.proc = None
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+
+def connect(socket_path: str, fallback: str, args: list[str]) -> int:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        os.execvp(fallback, [fallback, "-m", "pytest", *args])
+    request = json.dumps({"args": args, "cwd": os.getcwd(), "env": dict(os.environ)}).encode()
+    socket.send_fds(sock, [request], [0, 1, 2])
+    # The server answers with the child's pid, then with its exit code
+    returncode = None
+    while message := sock.recv(4096):
+        returncode = json.loads(message).get("returncode", returncode)
+    if returncode is None:
+        print("pytest forkserver went away", file=sys.stderr)
+        return 1
+    return returncode
+
+
+def serve(socket_path: str) -> None:
+    import importlib
+    from importlib.metadata import entry_points
+
+    import _pytest.config
+    import pytest
+
+    for name in _pytest.config.default_plugins:
+        try:
+            importlib.import_module(f"_pytest.{name}")
+        except ImportError:
+            pass
+    for plugin in entry_points(group="pytest11"):
+        try:
+            plugin.load()
+        except Exception:
+            pass
+    # `python -m` put the harness checkout first on sys.path; children get the
+    # workspace there instead, as `python -m pytest` in the workspace would.
+    base_path = sys.path[1:]
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    listener.bind(socket_path)
+    listener.listen(64)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    # Children are reaped through their pidfds
+    running: dict[int, tuple[socket.socket, int]] = {}
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print("ready", flush=True)
+
+    while True:
+        for key, _ in selector.select():
+            kind = key.data
+            if kind == "accept":
+                conn, _ = listener.accept()
+                try:
+                    request, fds, _, _ = socket.recv_fds(conn, _MAX_REQUEST, 3)
+                    request = json.loads(request)
+                except (OSError, ValueError):
+                    conn.close()
+                    continue
+                client_pid = struct.unpack("3i", conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, 12))[0]
+                sys.stdout.flush()
+                sys.stderr.flush()
+                pid = os.fork()
+                if pid == 0:
+                    listener.close()
+                    conn.close()
+                    for other, _ in running.values():
+                        other.close()
+                    _run_child(request, fds, client_pid, base_path, pytest)
+                for fd in fds:
+                    os.close(fd)
+                pidfd = os.pidfd_open(pid)
+                running[pid] = (conn, pidfd)
+                conn.send(json.dumps({"pid": pid}).encode())
+                selector.register(conn, selectors.EVENT_READ, ("client", pid))
+                selector.register(pidfd, selectors.EVENT_READ, ("exit", pid))
+            elif kind[0] == "client":
+                # The client only ever closes its end: it was killed or timed out
+                _kill_group(kind[1])
+                selector.unregister(key.fileobj)
+            else:
+                pid = kind[1]
+                conn, pidfd = running.pop(pid)
+                # Clean up anything the run left behind before the pid can be reused
+                _kill_group(pid)
+                _, status = os.waitpid(pid, 0)
+                selector.unregister(pidfd)
+                os.close(pidfd)
+                try:
+                    selector.unregister(conn)
+                except KeyError:
+                    pass
+                try:
+                    conn.send(json.dumps({"returncode": os.waitstatus_to_exitcode(status)}).encode())
+                except OSError:
+                    pass
+                conn.close()
+
+
+def _kill_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def _run_child(request: dict, fds: list[int], client_pid: int, base_path: list[str], pytest) -> None:
+    code = 1
+    try:
+        os.setsid()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        _adopt_limits(client_pid)
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.path[:] = [request["cwd"], *base_path]
+        sys.argv = ["pytest", *request["args"]]
+        code = int(pytest.main(request["args"]))
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def _adopt_limits(pid: int) -> None:
+    # Runs inherit the client's CPU affinity, rlimits and cgroup v2 group, so
+    # a sandboxed test command stays sandboxed when pytest runs here.
+    import resource
+
+    try:
+        os.sched_setaffinity(0, os.sched_getaffinity(pid))
+    except OSError:
+        pass
+    for limit in (resource.RLIMIT_DATA, resource.RLIMIT_AS, resource.RLIMIT_CPU, resource.RLIMIT_NOFILE):
+        try:
+            resource.setrlimit(limit, resource.prlimit(pid, limit))
+        except (OSError, ValueError):
+            pass
+    try:
+        for line in Path(f"/proc/{pid}/cgroup").read_text().splitlines():
+            if line.startswith("0::"):
+                Path("/sys/fs/cgroup", line[3:].lstrip("/"), "cgroup.procs").write_text("0")
+    except OSError:
+        pass
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run pytest through a forkserver")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    serve_parser = sub.add_parser("serve")
+    serve_parser.add_argument("socket")
+    connect_parser = sub.add_parser("connect")
+    connect_parser.add_argument("socket")
+    connect_parser.add_argument("--fallback", default="python3")
+    connect_parser.add_argument("args", nargs=argparse.REMAINDER)
+    ns = parser.parse_args(argv)
+    if ns.mode == "serve":
+        serve(ns.socket)
+        return 0
+    args = ns.args[1:] if ns.args[:1] == ["--"] else ns.args
+    return connect(ns.socket, ns.fallback, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
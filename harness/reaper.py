@@ -0,0 +1,76 @@
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+_STOP = object()
+
+
+class WorkspaceReaper:
+    def __init__(self, max_pending: int = 8):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._work, name="workspace-reaper", daemon=True)
+        self._lock = threading.Lock()
+        self._started = False
+        self._drained = False
+        self.submitted = 0
+        self.deleted = 0
+        # Time callers spent in submit() (rename plus waiting for queue space)
+        self.blocked_seconds = 0.0
+        # Time spent in rmtree: what cleanup used to block the run for
+        self.delete_seconds = 0.0
+
+    def submit(self, path: Path, on_done: Callable[[], None] | None = None) -> None:
+        start = time.perf_counter()
+        with self._lock:
+            if self._drained:
+                raise RuntimeError("reaper already drained")
+            if not self._started:
+                self._thread.start()
+                self._started = True
+        # Renaming first frees the workspace name immediately and gives the
+        # reaper a unique path, so a reused name can never be deleted by mistake.
+        trash = path.with_name(f".reap-{uuid.uuid4().hex}-{path.name}")
+        try:
+            os.rename(path, trash)
+        except FileNotFoundError:
+            trash = None
+        self._queue.put((trash, on_done))
+        with self._lock:
+            self.submitted += 1
+            self.blocked_seconds += time.perf_counter() - start
+
+    def drain(self) -> None:
+        with self._lock:
+            if self._drained:
+                return
+            self._drained = True
+            started = self._started
+        if started:
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _work(self) -> None:
+        while (item := self._queue.get()) is not _STOP:
+            trash, on_done = item
+            start = time.perf_counter()
+            if trash is not None:
+                shutil.rmtree(trash, ignore_errors=True)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.deleted += 1
+                self.delete_seconds += elapsed
+            if on_done is not None:
+                on_done()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workspaces": self.deleted,
+                "delete_seconds": round(self.delete_seconds, 2),
+                "blocked_seconds": round(self.blocked_seconds, 3),
+            }
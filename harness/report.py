@@ -1,8 +1,9 @@
 from harness.scoring import TaskScore, compute_summary
 
 
-def format_report(scores: list[TaskScore]) -> str:
-    summary = compute_summary(scores)
+def format_report(scores: list[TaskScore], summary: dict | None = None) -> str:
+    if summary is None:
+        summary = compute_summary(scores)
     agents = sorted(summary.keys())
     col = 15
 
@@ -52,6 +53,20 @@ def format_report(scores: list[TaskScore]) -> str:
         ("Tasks fully passed", lambda s: f"{s['tasks_fully_passed']}/{s['total_tasks']}"),
         ("Avg correctness", lambda s: str(s["avg_correctness"])),
         ("Avg speed (s)", lambda s: str(s["avg_speed_seconds"])),
+        ("Speed p50/p90 (s)", lambda s: f"{_optional(s['speed_p50_seconds'])}/{_optional(s['speed_p90_seconds'])}"),
+        ("Speed p99 (s)", lambda s: _optional(s["speed_p99_seconds"])),
+        ("Timeout rate", lambda s: f"{s['timeout_rate']:.0%}"),
+        ("Solved / hour", lambda s: _optional(s["tasks_solved_per_hour"])),
+        ("Correctness / s", lambda s: _optional(s["correctness_per_second"])),
+        ("Avg CPU (s)", lambda s: _optional(s["avg_cpu_seconds"])),
+        ("CPU / wall", lambda s: _optional(s["cpu_utilization"])),
+        ("Peak RSS (MB)", lambda s: _optional(s["max_peak_rss_mb"])),
+        ("Output tokens/s", lambda s: _optional(s["avg_tokens_per_second"])),
+        ("Avg turns", lambda s: _optional(s["avg_turns"])),
+        ("Avg tool calls", lambda s: _optional(s["avg_tool_calls"])),
+        ("Turn latency (s)", lambda s: _optional(s["avg_turn_latency_seconds"])),
+        ("First event (s)", lambda s: _optional(s["avg_time_to_first_event_seconds"])),
+        ("Stray processes", lambda s: str(s["stray_processes"])),
     ]
 
     for metric_name, fmt in metrics:
@@ -60,4 +75,28 @@ def format_report(scores: list[TaskScore]) -> str:
             row += f" {fmt(summary[agent]):<{col}}"
         lines.append(row)
 
+    # Fully passed tasks and median speed per task category and language
+    for field, title in (("category", "BY CATEGORY"), ("language", "BY LANGUAGE")):
+        values = sorted({value for agent in agents for value in summary[agent].get(f"by_{field}", {})})
+        if not values:
+            continue
+        lines.append("")
+        lines.append(title)
+        lines.append("-" * sep_width)
+        lines.append(f"{field.capitalize():<25}" + "".join(f" {a:<{col}}" for a in agents))
+        lines.append("-" * sep_width)
+        for value in values:
+            row = f"{value:<25}"
+            for agent in agents:
+                group = summary[agent].get(f"by_{field}", {}).get(value)
+                cell = "N/A" if group is None else (
+                    f"{group['tasks_fully_passed']}/{group['total_tasks']} p50 {group['speed_p50_seconds']:.0f}s"
+                )
+                row += f" {cell:<{col}}"
+            lines.append(row)
+
     return "\n".join(lines)
+
+
+def _optional(value) -> str:
+    return "N/A" if value is None else str(value)
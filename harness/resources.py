@@ -0,0 +1,196 @@
+import asyncio
+import os
+import resource
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple
+
+_PROC = Path("/proc")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+SAMPLE_INTERVAL = 0.25
+
+
+@dataclass
+class ResourceUsage:
+    user_cpu_seconds: float
+    system_cpu_seconds: float
+    peak_rss_mb: float
+    voluntary_context_switches: int
+    involuntary_context_switches: int
+    block_input_ops: int
+    block_output_ops: int
+    read_bytes: int = 0
+    write_bytes: int = 0
+    max_processes: int = 1
+
+    @property
+    def cpu_seconds(self) -> float:
+        return self.user_cpu_seconds + self.system_cpu_seconds
+
+
+def usage_from_dict(data: dict | None) -> ResourceUsage | None:
+    if not data:
+        return None
+    fields = ResourceUsage.__dataclass_fields__
+    return ResourceUsage(**{k: v for k, v in data.items() if k in fields})
+
+
+class ProcStat(NamedTuple):
+    state: str
+    ppid: int
+    pgid: int
+    sid: int
+    start_time: int
+    rss_pages: int
+
+
+def read_stat(pid: int) -> ProcStat | None:
+    # The command name may contain spaces and parentheses, so split after the last ")"
+    try:
+        raw = (_PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    fields = raw[raw.rfind(")") + 2:].split()
+    return ProcStat(
+        state=fields[0], ppid=int(fields[1]), pgid=int(fields[2]), sid=int(fields[3]),
+        start_time=int(fields[19]), rss_pages=int(fields[21]),
+    )
+
+
+def _read_io(pid: int) -> tuple[int, int]:
+    try:
+        lines = (_PROC / str(pid) / "io").read_text().splitlines()
+    except OSError:
+        return 0, 0
+    values = dict(line.split(": ", 1) for line in lines if ": " in line)
+    return int(values.get("read_bytes", 0)), int(values.get("write_bytes", 0))
+
+
+def has_procfs() -> bool:
+    return _PROC.is_dir()
+
+
+def _all_stats() -> dict[int, ProcStat]:
+    if not has_procfs():
+        # Without procfs, usage comes from rusage alone and teardown from signalling
+        # the tree's process group
+        return {}
+    stats = {}
+    for entry in _PROC.iterdir():
+        if entry.name.isdigit():
+            stat = read_stat(int(entry.name))
+            if stat is not None:
+                stats[int(entry.name)] = stat
+    return stats
+
+
+def pipe_holders(inodes: set[int]) -> dict[int, int]:
+    """Live processes (pid -> start time) other than this one with any of the given pipes open."""
+    targets = {f"pipe:[{inode}]" for inode in inodes}
+    holders = {}
+    for pid, stat in _all_stats().items():
+        if pid == os.getpid() or stat.state in ("Z", "X"):
+            continue
+        fd_dir = _PROC / str(pid) / "fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(fd_dir / fd) in targets:
+                    holders[pid] = stat.start_time
+                    break
+            except OSError:
+                continue
+    return holders
+
+
+def descendants(root: int, stats: dict[int, ProcStat] | None = None) -> list[int]:
+    children: dict[int, list[int]] = {}
+    for pid, stat in (stats if stats is not None else _all_stats()).items():
+        children.setdefault(stat.ppid, []).append(pid)
+    found, stack = [], [root]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def tree_members(root: int, known: dict[int, int] | None = None) -> dict[int, int]:
+    # Live processes (pid -> start time) that belong to a tree started in its
+    # own session: descendants of the root, anything still in its session or
+    # process group (orphans are reparented but keep both), and known pids that
+    # escaped with setsid() plus their descendants. Known pids only count while
+    # their start time matches, so a recycled pid is never mistaken for a member.
+    stats = _all_stats()
+    members = set(descendants(root, stats))
+    members.update(pid for pid, stat in stats.items() if stat.sid == root or stat.pgid == root)
+    for pid, start_time in (known or {}).items():
+        stat = stats.get(pid)
+        if pid != root and stat is not None and stat.start_time == start_time:
+            members.add(pid)
+            members.update(descendants(pid, stats))
+    members.discard(root)
+    return {
+        pid: stats[pid].start_time for pid in sorted(members)
+        if pid in stats and stats[pid].state not in ("Z", "X")
+    }
+
+
+# wait4() only reports the largest single process's RSS and no byte-level I/O,
+# so the memory and I/O of the whole tree are sampled from /proc while it runs.
+class ProcessTreeSampler:
+    def __init__(self, root_pid: int, interval: float = SAMPLE_INTERVAL):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak_rss_bytes = 0
+        self.max_processes = 0
+        # pid -> start time of every process observed in the tree
+        self.seen: dict[int, int] = {}
+        self.read_bytes = 0
+        self.write_bytes = 0
+
+    def sample(self) -> None:
+        pids = [self.root_pid, *descendants(self.root_pid)]
+        rss = 0
+        alive = 0
+        read_bytes = write_bytes = 0
+        for pid in pids:
+            stat = read_stat(pid)
+            if stat is None:
+                continue
+            alive += 1
+            rss += stat.rss_pages * _PAGE_SIZE
+            # A reaped child's I/O is added to its parent's counters, so only the
+            # processes in the tree right now are summed. The total can still drop
+            # when an orphan is reaped outside the tree, hence the running maximum.
+            pid_read, pid_write = _read_io(pid)
+            read_bytes += pid_read
+            write_bytes += pid_write
+            self.seen[pid] = stat.start_time
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        self.max_processes = max(self.max_processes, alive)
+        self.read_bytes = max(self.read_bytes, read_bytes)
+        self.write_bytes = max(self.write_bytes, write_bytes)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.to_thread(self.sample)
+            await asyncio.sleep(self.interval)
+
+    def usage(self, rusage: resource.struct_rusage) -> ResourceUsage:
+        return ResourceUsage(
+            user_cpu_seconds=round(rusage.ru_utime, 3),
+            system_cpu_seconds=round(rusage.ru_stime, 3),
+            # ru_maxrss is in KiB on Linux
+            peak_rss_mb=round(max(rusage.ru_maxrss * 1024, self.peak_rss_bytes) / (1024 * 1024), 1),
+            voluntary_context_switches=rusage.ru_nvcsw,
+            involuntary_context_switches=rusage.ru_nivcsw,
+            block_input_ops=rusage.ru_inblock,
+            block_output_ops=rusage.ru_oublock,
+            read_bytes=self.read_bytes,
+            write_bytes=self.write_bytes,
+            max_processes=max(self.max_processes, 1),
+        )
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+
+from harness.agent_events import metrics_from_dict
+from harness.config import AgentConfig, IsolationConfig, TestRunnerConfig
+from harness.hashing import hash_tree
+from harness.resources import usage_from_dict
+from harness.scoring import TaskScore
+from harness.task_loader import BenchmarkTask
+
+# Settings that change how a pair is scheduled but not what it produces
+_AGENT_SCHEDULING_FIELDS = ("max_concurrency",)
+
+
+def pair_fingerprint(
+    task: BenchmarkTask,
+    agent_config: AgentConfig,
+    test_runners: dict[str, TestRunnerConfig],
+    dry_run: bool = False,
+    isolation: IsolationConfig | None = None,
+) -> str:
+    h = hashlib.sha256()
+    h.update(task.prompt.encode())
+    metadata = task.task_dir / "metadata.json"
+    if metadata.exists():
+        h.update(metadata.read_bytes())
+    for label, tree in (("repo", task.repo_dir), ("tests", task.tests_dir)):
+        h.update(f"\0{label}\0".encode())
+        hash_tree(tree, h)
+
+    agent = {k: v for k, v in asdict(agent_config).items() if k not in _AGENT_SCHEDULING_FIELDS}
+    runners = {
+        lang: asdict(test_runners[lang])
+        for lang in task.test_languages or [task.language]
+        if lang in test_runners
+    }
+    settings = {"agent": agent, "test_runners": runners, "dry_run": dry_run}
+    if isolation is not None and isolation.enabled:
+        # Resource limits change timings, so isolated and unisolated results never mix
+        settings["isolation"] = asdict(isolation)
+    h.update(json.dumps(settings, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def result_path(results_base: Path, task_name: str, agent_name: str) -> Path:
+    return results_base / agent_name / f"{task_name}.json"
+
+
+def pair_log_dir(results_base: Path, task_name: str, agent_name: str) -> Path:
+    return results_base / agent_name / f"{task_name}.logs"
+
+
+def write_result(path: Path, data: dict) -> None:
+    # Write-then-rename so an interrupted run never leaves a truncated result behind
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def score_from_result(data: dict) -> TaskScore:
+    tests_total = data.get("tests_total", 0)
+    tests_passed = data.get("tests_passed", 0)
+    return TaskScore(
+        task=data["task"],
+        agent=data["agent"],
+        model=data.get("model"),
+        tests_passed=tests_passed,
+        tests_total=tests_total,
+        correctness=tests_passed / tests_total if tests_total else 0,
+        wall_clock_seconds=data.get("wall_clock_seconds", 0.0),
+        timed_out=data.get("timed_out", False),
+        error=data.get("error"),
+        resources=usage_from_dict(data.get("resources")),
+        metrics=metrics_from_dict(data.get("agent_metrics")),
+        stray_processes=sum((data.get("stray_processes") or {}).values()),
+        category=data.get("category"),
+        language=data.get("language"),
+    )
+
+
+def flatten_result(data: dict) -> dict:
+    """One flat row of scalar columns for a per-pair result document."""
+    resources = data.get("resources") or {}
+    metrics = data.get("agent_metrics") or {}
+    tests_total = data.get("tests_total", 0)
+    tests_passed = data.get("tests_passed", 0)
+    return {
+        "task": data["task"],
+        "agent": data["agent"],
+        "model": data.get("model"),
+        "category": data.get("category"),
+        "language": data.get("language"),
+        "dry_run": data.get("dry_run"),
+        "passed": data.get("passed"),
+        "tests_total": tests_total,
+        "tests_passed": tests_passed,
+        "correctness": tests_passed / tests_total if tests_total else 0,
+        "wall_clock_seconds": data.get("wall_clock_seconds"),
+        "timed_out": data.get("timed_out", False),
+        "error": data.get("error"),
+        "user_cpu_seconds": resources.get("user_cpu_seconds"),
+        "system_cpu_seconds": resources.get("system_cpu_seconds"),
+        "peak_rss_mb": resources.get("peak_rss_mb"),
+        "read_bytes": resources.get("read_bytes"),
+        "write_bytes": resources.get("write_bytes"),
+        "max_processes": resources.get("max_processes"),
+        "input_tokens": metrics.get("input_tokens"),
+        "output_tokens": metrics.get("output_tokens"),
+        "turns": metrics.get("turns"),
+        "tool_calls": sum(metrics["tool_calls"].values()) if metrics.get("tool_calls") is not None else None,
+        "stray_processes": sum((data.get("stray_processes") or {}).values()),
+        "test_cache": data.get("test_cache"),
+        "fingerprint": data.get("fingerprint"),
+    }
+
+
+def load_completed(path: Path, fingerprint: str) -> TaskScore | None:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if data.get("fingerprint") != fingerprint:
+        return None
+    return score_from_result(data)
+
+
+def iter_results(run_dir: Path):
+    for agent_dir in sorted(p for p in run_dir.iterdir() if p.is_dir()):
+        for path in sorted(agent_dir.glob("*.json")):
+            try:
+                data = json.loads(path.read_text())
+            except ValueError:
+                continue
+            if "task" in data and "agent" in data:
+                yield path, data
@@ -0,0 +1,238 @@
+"""SQLite store of per-pair results across runs.
+
+Every result the harness writes as JSON is also recorded here, one row per
+run/task/agent, with its resource and agent metrics as columns and its test
+cases and test timings in their own tables. The full result document is kept
+in `pair_results.data` for anything the columns do not cover.
+"""
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+from harness.config import load_config
+from harness.results import flatten_result, iter_results
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pair_results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    task TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    model TEXT,
+    category TEXT,
+    language TEXT,
+    dry_run INTEGER,
+    passed INTEGER,
+    tests_total INTEGER,
+    tests_passed INTEGER,
+    correctness REAL,
+    wall_clock_seconds REAL,
+    timed_out INTEGER,
+    error TEXT,
+    user_cpu_seconds REAL,
+    system_cpu_seconds REAL,
+    peak_rss_mb REAL,
+    read_bytes INTEGER,
+    write_bytes INTEGER,
+    max_processes INTEGER,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    turns INTEGER,
+    tool_calls INTEGER,
+    stray_processes INTEGER,
+    test_cache TEXT,
+    fingerprint TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (run_id, task, agent)
+);
+CREATE INDEX IF NOT EXISTS pair_results_task_agent ON pair_results (task, agent, run_id);
+CREATE INDEX IF NOT EXISTS pair_results_agent ON pair_results (agent, run_id);
+CREATE INDEX IF NOT EXISTS pair_results_model ON pair_results (model, run_id);
+CREATE TABLE IF NOT EXISTS test_cases (
+    result_id INTEGER NOT NULL REFERENCES pair_results (id) ON DELETE CASCADE,
+    language TEXT,
+    suite TEXT,
+    name TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration_seconds REAL
+);
+CREATE INDEX IF NOT EXISTS test_cases_result ON test_cases (result_id);
+CREATE INDEX IF NOT EXISTS test_cases_name ON test_cases (name);
+CREATE TABLE IF NOT EXISTS test_timings (
+    result_id INTEGER NOT NULL REFERENCES pair_results (id) ON DELETE CASCADE,
+    language TEXT NOT NULL,
+    seconds REAL,
+    timeout_seconds REAL,
+    timed_out INTEGER
+);
+CREATE INDEX IF NOT EXISTS test_timings_result ON test_timings (result_id);
+"""
+
+HISTORY_COLUMNS = (
+    "run_id, task, agent, model, tests_passed, tests_total, wall_clock_seconds,"
+    " user_cpu_seconds + system_cpu_seconds AS cpu_seconds, timed_out"
+)
+
+
+class ResultsDB:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # Readers (queries, other harness processes) never block the writer
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{path} has schema version {version}; this harness understands up to {SCHEMA_VERSION}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def record(self, run_id: str, data: dict) -> None:
+        """Insert or replace the result of one pair in one run."""
+        with self.conn:
+            self._record(run_id, data)
+
+    def import_run(self, run_dir: Path) -> int:
+        """Record every result in run_dir under its directory name; returns the number recorded."""
+        count = 0
+        with self.conn:
+            for _, data in iter_results(run_dir):
+                self._record(run_dir.name, data)
+                count += 1
+        return count
+
+    def _record(self, run_id: str, data: dict) -> None:
+        row = {"run_id": run_id, **flatten_result(data), "data": json.dumps(data)}
+        # Deleting first also drops the test rows of a result that is being replaced
+        self.conn.execute(
+            "DELETE FROM pair_results WHERE run_id = ? AND task = ? AND agent = ?",
+            (run_id, row["task"], row["agent"]),
+        )
+        cursor = self.conn.execute(
+            f"INSERT INTO pair_results ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+            tuple(row.values()),
+        )
+        result_id = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT INTO test_cases (result_id, language, suite, name, outcome, duration_seconds)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (result_id, case.get("language"), case.get("suite"), case["name"], case["outcome"],
+                 case.get("duration_seconds"))
+                for case in data.get("test_cases") or []
+            ],
+        )
+        self.conn.executemany(
+            "INSERT INTO test_timings (result_id, language, seconds, timeout_seconds, timed_out) VALUES (?, ?, ?, ?, ?)",
+            [
+                (result_id, language, timing.get("seconds"), timing.get("timeout_seconds"), timing.get("timed_out"))
+                for language, timing in (data.get("test_timings") or {}).items()
+            ],
+        )
+
+    def history(
+        self, task: str | None = None, agent: str | None = None, model: str | None = None, runs: int = 50,
+    ) -> list[sqlite3.Row]:
+        """Results of the newest `runs` runs matching the filters, oldest first."""
+        where, params = [], []
+        for column, value in (("task", task), ("agent", agent), ("model", model)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        filters = "".join(f" AND {condition}" for condition in where)
+        # Run ids start with the run's start time, so they sort chronologically
+        return self.conn.execute(
+            f"SELECT {HISTORY_COLUMNS} FROM pair_results WHERE run_id IN ("
+            f"SELECT DISTINCT run_id FROM pair_results WHERE 1 = 1{filters} ORDER BY run_id DESC LIMIT ?"
+            f"){filters} ORDER BY run_id, task, agent",
+            (*params, runs, *params),
+        ).fetchall()
+
+    def query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        return self.conn.execute(sql, params).fetchall()
+
+
+def default_path(config_path: Path | None = None) -> Path:
+    config = load_config(config_path)
+    root = Path(__file__).parent.parent
+    if config.results_db is not None:
+        return root / config.results_db.path
+    return root / config.results_dir / "results.db"
+
+
+def format_rows(headings: list[str], rows: list) -> str:
+    cells = [["" if v is None else str(v) for v in row] for row in rows]
+    widths = [max([len(h), *(len(row[i]) for row in cells)]) for i, h in enumerate(headings)]
+    lines = [" ".join(f"{h:<{w}}" for h, w in zip(headings, widths)), "-" * (sum(widths) + len(widths) - 1)]
+    for row in cells:
+        lines.append(" ".join(f"{v:<{w}}" for v, w in zip(row, widths)))
+    return "\n".join(lines)
+
+
+def format_history(rows: list[sqlite3.Row]) -> str:
+    return format_rows(
+        ["Run", "Task", "Agent", "Model", "Tests", "Wall (s)", "CPU (s)", "Timeout"],
+        [
+            (
+                r["run_id"], r["task"], r["agent"], r["model"], f"{r['tests_passed']}/{r['tests_total']}",
+                f"{r['wall_clock_seconds']:.1f}",
+                f"{r['cpu_seconds']:.1f}" if r["cpu_seconds"] is not None else "-",
+                "yes" if r["timed_out"] else "",
+            )
+            for r in rows
+        ],
+    )
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Import results into the results database and query it")
+    parser.add_argument("--config", type=Path, default=None)
+    parser.add_argument("--db", type=Path, help="Database file (default: results_db.path from the config)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_parser = sub.add_parser("import", help="Record the results of existing run directories")
+    import_parser.add_argument("run_dirs", nargs="+", type=Path)
+    history_parser = sub.add_parser("history", help="Results of recent runs, oldest first")
+    history_parser.add_argument("--task")
+    history_parser.add_argument("--agent")
+    history_parser.add_argument("--model")
+    history_parser.add_argument("--runs", type=int, default=50, help="Number of most recent runs (default: 50)")
+    sql_parser = sub.add_parser("sql", help="Run a read-only SQL query")
+    sql_parser.add_argument("query")
+    args = parser.parse_args(argv)
+
+    db = ResultsDB(args.db or default_path(args.config))
+    try:
+        if args.command == "import":
+            for run_dir in args.run_dirs:
+                if not run_dir.is_dir():
+                    print(f"ERROR: {run_dir} is not a directory")
+                    sys.exit(1)
+                print(f"  {run_dir.name}: {db.import_run(run_dir)} result(s)")
+        elif args.command == "history":
+            rows = db.history(args.task, args.agent, args.model, args.runs)
+            print(format_history(rows))
+        else:
+            db.conn.execute("PRAGMA query_only=ON")
+            try:
+                cursor = db.conn.execute(args.query)
+            except sqlite3.Error as e:
+                print(f"ERROR: {e}")
+                sys.exit(1)
+            rows = cursor.fetchall()
+            print(format_rows([d[0] for d in cursor.description or []], rows))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
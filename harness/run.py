@@ -1,36 +1,95 @@
 import argparse
+import asyncio
 import json
 import sys
+from dataclasses import asdict, replace
 from datetime import datetime
 from pathlib import Path
 
+from harness.compile_cache import CompileCache
 from harness.config import load_config
 from harness.task_loader import load_tasks
 from harness.runner import AgentRunner, AgentResult
-from harness.test_executor import TestExecutor, TestResult
-from harness.scoring import TaskScore, compute_summary
+from harness.test_executor import TestCase, TestExecutor, TestResult
+from harness.isolation import Isolation, Sandbox
+from harness.npm_cache import NpmCache
+from harness.pytest_server import PytestForkServer
+from harness.test_cache import TestResultCache
+from harness.test_timeouts import TestTimeouts
+from harness.reaper import WorkspaceReaper
+from harness.workspace import TmpfsTier, WorkspaceProvider, same_filesystem
+from harness.workspace_pool import WorkspacePool
+from harness.scoring import SummaryAggregator, TaskScore, compute_summary
 from harness.report import format_report
+from harness.results_db import ResultsDB
+from harness.results import load_completed, pair_fingerprint, pair_log_dir, result_path, write_result
+from harness.scheduler import build_schedule, parse_shard, run_schedule, shard_pairs
 
 
 def run_tests_for_task(task, workspace: Path, test_runners: dict) -> TestResult:
+    outcomes = []
+    for language in task.test_languages or [task.language]:
+        test_runner_config = test_runners.get(language)
+        result = TestExecutor(test_runner_config).run(workspace) if test_runner_config else None
+        outcomes.append((language, result))
+    return combine_test_results(outcomes)
+
+
+async def run_tests_for_task_async(
+    task, workspace: Path, test_runners: dict, log_dir: Path | None = None, sandbox: Sandbox | None = None,
+    npm_cache: NpmCache | None = None, compile_cache: CompileCache | None = None,
+    pytest_server: PytestForkServer | None = None, timeouts: TestTimeouts | None = None,
+) -> TestResult:
+    timeouts = timeouts or TestTimeouts()
+
+    async def run_language(language: str) -> tuple[str, TestResult | None]:
+        test_runner_config = test_runners.get(language)
+        if test_runner_config is None:
+            return language, None
+        executor = TestExecutor(
+            test_runner_config, npm_cache, compile_cache, pytest_server, timeouts.timeout(task, test_runner_config),
+        )
+        return language, await executor.run_async(workspace, log_dir, sandbox)
+
+    languages = task.test_languages or [task.language]
+    if task.parallel_tests:
+        outcomes = list(await asyncio.gather(*(run_language(language) for language in languages)))
+    else:
+        outcomes = [await run_language(language) for language in languages]
+    return combine_test_results(outcomes)
+
+
+def combine_test_results(outcomes: list[tuple[str, TestResult | None]]) -> TestResult:
     tests_total = 0
     tests_passed = 0
+    stray_processes = 0
+    cases: list[TestCase] | None = None
+    compile_cache: dict | None = None
+    timings: dict[str, dict] | None = None
     all_passed = True
     raw_outputs: list[str] = []
     errors: list[str] = []
 
-    languages = task.test_languages or [task.language]
-    for language in languages:
-        test_runner_config = test_runners.get(language)
-        if not test_runner_config:
+    for language, result in outcomes:
+        if result is None:
             all_passed = False
             errors.append(f"No test runner for {language}")
             continue
 
-        executor = TestExecutor(test_runner_config)
-        result = executor.run(workspace)
         tests_total += result.tests_total
         tests_passed += result.tests_passed
+        stray_processes += result.stray_processes
+        if result.compile_cache is not None:
+            compile_cache = {k: (compile_cache or {}).get(k, 0) + v for k, v in result.compile_cache.items()}
+        if result.duration_seconds is not None:
+            timings = timings or {}
+            timings[language] = {
+                "seconds": result.duration_seconds,
+                "timeout_seconds": result.timeout_seconds,
+                "timed_out": result.timed_out,
+            }
+        if result.cases is not None:
+            cases = (cases or []) + [replace(case, language=language) for case in result.cases]
         raw_outputs.append(f"[{language}]\n{result.raw_output}")
         if not result.passed:
             all_passed = False
@@ -43,10 +102,145 @@ def run_tests_for_task(task, workspace: Path, test_runners: dict) -> TestResult:
         passed=all_passed and not errors,
         raw_output="\n\n".join(raw_outputs),
         error="; ".join(errors) if errors else None,
+        stray_processes=stray_processes,
+        cases=cases,
+        compile_cache=compile_cache,
+        timings=timings,
+    )
+
+
+async def run_pair(
+    task, agent_config, config, results_base: Path, dry_run: bool = False, fingerprint: str | None = None,
+    provider: WorkspaceProvider | None = None, pool: WorkspacePool | None = None,
+    isolation: Isolation | None = None, npm_cache: NpmCache | None = None,
+    compile_cache: CompileCache | None = None, pytest_server: PytestForkServer | None = None,
+    timeouts: TestTimeouts | None = None, test_cache: TestResultCache | None = None,
+    results_db: ResultsDB | None = None,
+) -> TaskScore:
+    label = f"{agent_config.name} (dry-run)" if dry_run else agent_config.name
+    print(f"\n[{task.name}] Running {label}...")
+
+    runner = AgentRunner(agent_config, provider)
+    if pool is not None:
+        runner.adopt_workspace(await pool.acquire(task.name, agent_config.name))
+    else:
+        await runner.prepare_workspace_async(task.repo_dir, task.test_languages)
+    workspace = runner.workspace.path
+    log_dir = pair_log_dir(results_base, task.name, agent_config.name)
+
+    # The agent and its tests run in separate sandboxes on the same CPU set
+    cpus = isolation.acquire_cpus() if isolation is not None else None
+    sandboxes: dict[str, Sandbox] = {}
+    try:
+        if dry_run:
+            # Skip agent invocation; test the repo as-is
+            agent_result = AgentResult(
+                agent=agent_config.name,
+                model=agent_config.model,
+                wall_clock_seconds=0.0,
+                timed_out=False,
+                error=None,
+                raw_output="(dry run)",
+            )
+        else:
+            if isolation is not None:
+                sandboxes["agent"] = isolation.sandbox(f"{task.name}.{agent_config.name}.agent", cpus)
+            agent_result = await runner.run_async(task.prompt, workspace, log_dir, sandboxes.get("agent"))
+
+        # Copy tests and run them, unless this exact workspace was tested before
+        await runner.copy_tests_async(task.tests_dir, workspace)
+        test_result = None
+        if test_cache is not None:
+            cache_key = await asyncio.to_thread(test_cache.key, task, workspace, config.test_runners, config.isolation)
+            test_result = test_cache.get(cache_key)
+            cache_outcome = "hit" if test_result is not None else "miss"
+        if test_result is None:
+            if isolation is not None:
+                sandboxes["tests"] = isolation.sandbox(f"{task.name}.{agent_config.name}.tests", cpus)
+            test_result = await run_tests_for_task_async(
+                task, workspace, config.test_runners, log_dir, sandboxes.get("tests"), npm_cache, compile_cache,
+                pytest_server, timeouts,
+            )
+            if test_cache is not None:
+                await asyncio.to_thread(test_cache.put, cache_key, test_result)
+    finally:
+        isolation_report = {kind: await asyncio.to_thread(s.close) for kind, s in sandboxes.items()}
+        if isolation is not None:
+            isolation.release_cpus(cpus)
+    if test_result.error:
+        for err in test_result.error.split("; "):
+            if err.startswith("No test runner for "):
+                missing_lang = err.replace("No test runner for ", "")
+                print(f"  WARNING: No test runner for language '{missing_lang}'")
+
+    # Build score
+    score = TaskScore(
+        task=task.name,
+        agent=agent_config.name,
+        model=agent_config.model,
+        tests_passed=test_result.tests_passed,
+        tests_total=test_result.tests_total,
+        correctness=test_result.tests_passed / test_result.tests_total if test_result.tests_total else 0,
+        wall_clock_seconds=agent_result.wall_clock_seconds,
+        timed_out=agent_result.timed_out,
+        error=agent_result.error or test_result.error,
+        resources=agent_result.resources,
+        metrics=agent_result.metrics,
+        stray_processes=agent_result.stray_processes + test_result.stray_processes,
+        category=task.category,
+        language=task.language,
     )
 
+    icon = "PASS" if test_result.passed else "FAIL"
+    cached = " (cached test result)" if test_cache is not None and cache_outcome == "hit" else ""
+    print(f"  [{task.name}] {label}: {icon} {test_result.tests_passed}/{test_result.tests_total} tests, "
+          f"{agent_result.wall_clock_seconds:.1f}s{cached}")
+    if score.stray_processes:
+        print(f"  [{task.name}] {label}: killed {score.stray_processes} stray process(es) "
+              f"(agent {agent_result.stray_processes}, tests {test_result.stray_processes})")
+    for kind, report in isolation_report.items():
+        if report.get("oom_kills"):
+            print(f"  [{task.name}] {label}: {kind} OOM-killed at the {report['memory_mb']} MB limit")
+
+    # Save per-task result
+    result = {
+        "task": task.name,
+        "category": task.category,
+        "language": task.language,
+        "test_languages": task.test_languages,
+        "agent": agent_config.name,
+        "model": agent_config.model,
+        "dry_run": dry_run,
+        "passed": test_result.passed,
+        "tests_total": test_result.tests_total,
+        "tests_passed": test_result.tests_passed,
+        "wall_clock_seconds": agent_result.wall_clock_seconds,
+        "timed_out": agent_result.timed_out,
+        "error": agent_result.error or test_result.error,
+        "resources": asdict(agent_result.resources) if agent_result.resources else None,
+        "agent_metrics": asdict(agent_result.metrics) if agent_result.metrics else None,
+        "stray_processes": {"agent": agent_result.stray_processes, "tests": test_result.stray_processes},
+        "test_cases": [asdict(case) for case in test_result.cases] if test_result.cases is not None else None,
+        "compile_cache": test_result.compile_cache,
+        "test_timings": test_result.timings,
+        "test_cache": cache_outcome if test_cache is not None else None,
+        "isolation": isolation_report if isolation is not None else None,
+        "workspace_strategy": runner.workspace.strategy,
+        "workspace_tier": runner.workspace.tier,
+        "fingerprint": fingerprint,
+    }
+    write_result(result_path(results_base, task.name, agent_config.name), result)
+    if results_db is not None:
+        results_db.record(results_base.name, result)
 
-def run_benchmark(tasks_dir: Path = None, config_path: Path = None, dry_run: bool = False):
+    await asyncio.to_thread(runner.cleanup)
+    return score
+
+
+def run_benchmark(
+    tasks_dir: Path = None, config_path: Path = None, dry_run: bool = False, jobs: int = 1,
+    resume: str | None = None, shard: tuple[int, int] | None = None, refresh_test_cache: bool = False,
+):
     root = Path(__file__).parent.parent
     if tasks_dir is None:
         tasks_dir = root / "tasks"
@@ -59,92 +253,170 @@ def run_benchmark(tasks_dir: Path = None, config_path: Path = None, dry_run: boo
 
     if dry_run:
         print(f"DRY RUN: Loaded {len(tasks)} tasks (skipping agent invocation)")
-        agents_to_run = [config.agents[0]] if config.agents else []
+        agents = [config.agents[0]] if config.agents else []
     else:
         print(f"Loaded {len(tasks)} tasks, {len(config.agents)} agents")
-        agents_to_run = None  # use all agents per task
+        agents = config.agents
+
+    if resume:
+        run_id = resume
+        results_base = root / config.results_dir / run_id
+        if not results_base.is_dir():
+            print(f"Cannot resume: {results_base} does not exist.")
+            sys.exit(1)
+    else:
+        run_id = datetime.now().strftime("%Y-%m-%d-%H%M%S")
+        results_base = root / config.results_dir / run_id
 
-    run_id = datetime.now().strftime("%Y-%m-%d-%H%M%S")
-    results_base = root / config.results_dir / run_id
-    all_scores: list[TaskScore] = []
+    pairs = build_schedule(tasks, agents)
+    if shard:
+        pairs = shard_pairs(pairs, *shard)
+        print(f"Shard {shard[0]}/{shard[1]}: {len(pairs)} pairs")
+    fingerprints = {
+        (task.name, agent_config.name): pair_fingerprint(
+            task, agent_config, config.test_runners, dry_run, config.isolation,
+        )
+        for task, agent_config in pairs
+    }
 
-    for task_idx, task in enumerate(tasks):
-        if agents_to_run is not None:
-            agents = agents_to_run
-        else:
-            # Rotate which agent goes first for fairness
-            agents = list(config.agents)
-            rot = task_idx % len(agents)
-            agents = agents[rot:] + agents[:rot]
-
-        for agent_config in agents:
-            label = f"{agent_config.name} (dry-run)" if dry_run else agent_config.name
-            print(f"\n[{task.name}] Running {label}...")
-
-            runner = AgentRunner(agent_config)
-            workspace = runner.prepare_workspace(task.repo_dir)
-
-            if dry_run:
-                # Skip agent invocation; test the repo as-is
-                agent_result = AgentResult(
-                    agent=agent_config.name,
-                    model=agent_config.model,
-                    wall_clock_seconds=0.0,
-                    timed_out=False,
-                    error=None,
-                    raw_output="(dry run)",
-                )
-            else:
-                agent_result = runner.run(task.prompt, workspace)
-
-            # Copy tests and run them
-            runner.copy_tests(task.tests_dir, workspace)
-            test_result = run_tests_for_task(task, workspace, config.test_runners)
-            if test_result.error:
-                for err in test_result.error.split("; "):
-                    if err.startswith("No test runner for "):
-                        missing_lang = err.replace("No test runner for ", "")
-                        print(f"  WARNING: No test runner for language '{missing_lang}'")
-
-            # Build score
-            score = TaskScore(
-                task=task.name,
-                agent=agent_config.name,
-                model=agent_config.model,
-                tests_passed=test_result.tests_passed,
-                tests_total=test_result.tests_total,
-                correctness=test_result.tests_passed / test_result.tests_total if test_result.tests_total else 0,
-                wall_clock_seconds=agent_result.wall_clock_seconds,
-                timed_out=agent_result.timed_out,
-                error=agent_result.error or test_result.error,
-            )
-            all_scores.append(score)
-
-            icon = "PASS" if test_result.passed else "FAIL"
-            print(f"  {icon} {test_result.tests_passed}/{test_result.tests_total} tests, {agent_result.wall_clock_seconds:.1f}s")
-
-            # Save per-task result
-            agent_dir = results_base / agent_config.name
-            agent_dir.mkdir(parents=True, exist_ok=True)
-            result_file = agent_dir / f"{task.name}.json"
-            result_file.write_text(json.dumps({
-                "task": task.name,
-                "test_languages": task.test_languages,
-                "agent": agent_config.name,
-                "model": agent_config.model,
-                "passed": test_result.passed,
-                "tests_total": test_result.tests_total,
-                "tests_passed": test_result.tests_passed,
-                "wall_clock_seconds": agent_result.wall_clock_seconds,
-                "timed_out": agent_result.timed_out,
-                "error": agent_result.error or test_result.error,
-            }, indent=2))
-
-            runner.cleanup()
+    completed: dict[tuple[str, str], TaskScore] = {}
+    if resume:
+        for task, agent_config in pairs:
+            key = (task.name, agent_config.name)
+            score = load_completed(result_path(results_base, *key), fingerprints[key])
+            if score is not None:
+                completed[key] = score
+        print(f"Resuming {run_id}: {len(completed)} of {len(pairs)} pairs already complete")
+
+    if shard:
+        results_base.mkdir(parents=True, exist_ok=True)
+        (results_base / "shard.json").write_text(json.dumps({
+            "shard": list(shard),
+            "pairs": [[task.name, agent_config.name] for task, agent_config in pairs],
+        }, indent=2))
 
+    todo = [(task, agent_config) for task, agent_config in pairs if (task.name, agent_config.name) not in completed]
+    aggregator = SummaryAggregator()
+    for score in completed.values():
+        aggregator.add(score)
+    new_scores = asyncio.run(run_pairs(
+        todo, config, results_base, dry_run, jobs, fingerprints, refresh_test_cache, aggregator,
+    ))
+    for (task, agent_config), score in zip(todo, new_scores):
+        completed[(task.name, agent_config.name)] = score
+    all_scores: list[TaskScore] = [completed[(task.name, agent_config.name)] for task, agent_config in pairs]
+
+    summary = compute_summary(all_scores, aggregator)
+    print_results(all_scores, summary)
+    strays = sum(s.stray_processes for s in new_scores)
+    if strays:
+        print(f"\nKilled {strays} stray process(es) left behind by agents and test runners")
+    save_summary(results_base, all_scores, summary)
+    print(f"\nResults saved to {results_base}")
+
+
+async def run_pairs(
+    pairs, config, results_base: Path, dry_run: bool, jobs: int, fingerprints: dict,
+    refresh_test_cache: bool = False, aggregator: SummaryAggregator | None = None,
+) -> list[TaskScore]:
+    tmpfs = None
+    if config.workspace_tmpfs:
+        disk_languages = set()
+        npm_store = Path(__file__).parent.parent / config.npm_cache.path if config.npm_cache else None
+        if npm_store is not None and not same_filesystem(Path(config.workspace_tmpfs.path), npm_store):
+            # node_modules can only be linked from the store within its filesystem;
+            # copying it into RAM for every workspace costs more than tmpfs saves
+            disk_languages = {lang for lang, runner in config.test_runners.items() if runner.dependencies == "npm"}
+            if disk_languages:
+                print(f"Tmpfs: {', '.join(sorted(disk_languages))} workspaces stay on disk with the npm cache")
+        tmpfs = TmpfsTier(
+            Path(config.workspace_tmpfs.path),
+            config.workspace_tmpfs.budget_mb * 1024 * 1024,
+            {lang: mb * 1024 * 1024 for lang, mb in config.workspace_tmpfs.build_estimate_mb.items()},
+            disk_languages,
+        )
+    reaper = WorkspaceReaper(config.workspace_cleanup_queue) if config.workspace_cleanup_queue else None
+    provider = WorkspaceProvider(config.workspace_strategy, tmpfs, reaper)
+    pool = WorkspacePool(pairs, provider, config.workspace_prewarm) if config.workspace_prewarm else None
+    isolation = None
+    if config.isolation is not None and config.isolation.enabled:
+        isolation = Isolation(config.isolation, jobs)
+        print(f"Isolation: {isolation.describe()}")
+    compile_cache = None
+    if config.compile_cache is not None and config.compile_cache.enabled:
+        compile_cache = CompileCache(
+            Path(__file__).parent.parent / config.compile_cache.path, config.compile_cache.cc, config.compile_cache.cxx,
+        )
+    npm_cache = None
+    if config.npm_cache is not None:
+        npm_cache = NpmCache(Path(__file__).parent.parent / config.npm_cache.path, config.npm_cache.offline)
+    timeouts = await asyncio.to_thread(TestTimeouts.from_results, config.test_timeouts, results_base.parent)
+    if timeouts.config.adaptive:
+        print(f"Test timeouts: {timeouts.describe()}")
+    results_db = None
+    if config.results_db is not None:
+        results_db = ResultsDB(Path(__file__).parent.parent / config.results_db.path)
+    test_cache = None
+    if config.test_cache is not None:
+        test_cache = TestResultCache(Path(__file__).parent.parent / config.test_cache.path, refresh_test_cache)
+    pytest_server = None
+    if config.pytest_server is not None and config.pytest_server.enabled:
+        pytest_server = PytestForkServer(config.pytest_server.python)
+        if not await asyncio.to_thread(pytest_server.start):
+            print("WARNING: pytest forkserver did not start; running pytest directly")
+            pytest_server = None
+    aggregator = aggregator if aggregator is not None else SummaryAggregator()
+
+    async def run_and_aggregate(task, agent_config) -> TaskScore:
+        score = await run_pair(
+            task, agent_config, config, results_base, dry_run,
+            fingerprint=fingerprints[(task.name, agent_config.name)], provider=provider, pool=pool,
+            isolation=isolation, npm_cache=npm_cache, compile_cache=compile_cache,
+            pytest_server=pytest_server, timeouts=timeouts, test_cache=test_cache,
+            results_db=results_db,
+        )
+        # The running summary, percentiles included, can be read while the run goes on
+        aggregator.add(score)
+        write_result(results_base / "aggregate.json", {
+            "summary": aggregator.summary(), "aggregate": aggregator.to_dict(),
+        })
+        return score
+
+    if pool is not None:
+        pool.start()
+    try:
+        return await run_schedule(pairs, run_and_aggregate, jobs=jobs)
+    finally:
+        if pytest_server is not None:
+            pytest_server.stop()
+        if results_db is not None:
+            results_db.close()
+        if test_cache is not None and test_cache.hits + test_cache.misses:
+            refreshed = " (lookups bypassed, results refreshed)" if test_cache.refresh else ""
+            print(f"\nTest result cache: {test_cache.describe()}{refreshed}")
+        if npm_cache is not None and npm_cache.hits + npm_cache.installs:
+            print(f"\nnpm cache: {npm_cache.installs} dependency set(s) installed, "
+                  f"{npm_cache.hits} workspace(s) served from {npm_cache.store}")
+        if compile_cache is not None and sum(compile_cache.stats.values()):
+            stats = compile_cache.stats
+            print(f"\nCompile cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['uncacheable']} uncacheable compiles")
+        if pool is not None:
+            await pool.close()
+            if pool.hits + pool.misses:
+                print(f"\nWorkspace pool: {pool.describe()}")
+        if reaper is not None:
+            await asyncio.to_thread(reaper.drain)
+            stats = reaper.stats()
+            print(f"\nWorkspace cleanup: {stats['workspaces']} workspaces deleted in the background "
+                  f"({stats['delete_seconds']}s of rmtree), scheduler blocked {stats['blocked_seconds']}s")
+        await asyncio.to_thread(provider.close)
+
+
+def print_results(all_scores: list[TaskScore], summary: dict | None = None) -> None:
     # Generate and print report (need at least 2 agents for comparison)
     if len(set(s.agent for s in all_scores)) >= 2:
-        report = format_report(all_scores)
+        report = format_report(all_scores, summary)
         print("\n" + report)
     else:
         # Single-agent summary (dry-run mode)
@@ -155,22 +427,39 @@ def run_benchmark(tasks_dir: Path = None, config_path: Path = None, dry_run: boo
             icon = "PASS" if s.tests_passed == s.tests_total and s.tests_total > 0 else "FAIL"
             print(f"  {icon} {s.task}: {s.tests_passed}/{s.tests_total} tests")
 
-    # Save summary
-    summary = compute_summary(all_scores)
+
+def save_summary(results_base: Path, all_scores: list[TaskScore], summary: dict | None = None) -> None:
+    if summary is None:
+        summary = compute_summary(all_scores)
     results_base.mkdir(parents=True, exist_ok=True)
     summary_file = results_base / "summary.json"
     summary_file.write_text(json.dumps(summary, indent=2))
-    print(f"\nResults saved to {results_base}")
 
 
-def main():
+def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser(description="Run coding agent benchmark")
     parser.add_argument("--tasks-dir", type=Path, help="Path to tasks directory")
     parser.add_argument("--config", type=Path, help="Path to config.yaml")
     parser.add_argument("--dry-run", action="store_true",
                         help="Skip agent invocation, test repos as-is")
-    args = parser.parse_args()
-    run_benchmark(tasks_dir=args.tasks_dir, config_path=args.config, dry_run=args.dry_run)
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Number of task/agent pairs to run concurrently")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="Continue an interrupted run, skipping pairs with up-to-date results")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Run only the I-th of N deterministic slices of the task/agent matrix")
+    parser.add_argument("--no-test-cache", action="store_true",
+                        help="Run every test suite even if the test result cache has its workspace; "
+                             "fresh results still replace the cached ones")
+    args = parser.parse_args(argv)
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        parser.error(str(e))
+    run_benchmark(
+        tasks_dir=args.tasks_dir, config_path=args.config, dry_run=args.dry_run, jobs=args.jobs,
+        resume=args.resume, shard=shard, refresh_test_cache=args.no_test_cache,
+    )
 
 
 if __name__ == "__main__":
@@ -1,11 +1,14 @@
-import shutil
-import subprocess
-import tempfile
+import asyncio
 import time
 from dataclasses import dataclass
 from pathlib import Path
 
+from harness.agent_events import AgentMetrics, parser_for
 from harness.config import AgentConfig
+from harness.isolation import Sandbox
+from harness.process import run_process
+from harness.resources import ResourceUsage
+from harness.workspace import Workspace, WorkspaceProvider
 
 
 @dataclass
@@ -16,24 +19,42 @@ class AgentResult:
     timed_out: bool
     error: str | None
     raw_output: str
+    resources: ResourceUsage | None = None
+    metrics: AgentMetrics | None = None
+    stray_processes: int = 0
 
 
 class AgentRunner:
-    def __init__(self, config: AgentConfig):
+    def __init__(self, config: AgentConfig, provider: WorkspaceProvider | None = None):
         self.config = config
+        self.provider = provider or WorkspaceProvider()
+        self.workspace: Workspace | None = None
         self._temp_dirs: list[Path] = []
 
-    def prepare_workspace(self, repo_dir: Path) -> Path:
-        temp_dir = Path(tempfile.mkdtemp(prefix=f"bench-{self.config.name}-"))
-        shutil.copytree(repo_dir, temp_dir, dirs_exist_ok=True)
-        self._temp_dirs.append(temp_dir)
-        return temp_dir
+    def prepare_workspace(self, repo_dir: Path, languages: list[str] | None = None) -> Path:
+        workspace = self.provider.create(repo_dir, self.config.name, languages)
+        self.adopt_workspace(workspace)
+        return workspace.path
+
+    def adopt_workspace(self, workspace: Workspace) -> None:
+        self._temp_dirs.append(workspace.path)
+        self.workspace = workspace
+
+    async def prepare_workspace_async(self, repo_dir: Path, languages: list[str] | None = None) -> Path:
+        return await asyncio.to_thread(self.prepare_workspace, repo_dir, languages)
 
     def copy_tests(self, tests_dir: Path, workspace: Path) -> None:
-        dest = workspace / "tests"
-        shutil.copytree(tests_dir, dest, dirs_exist_ok=True)
+        self.provider.materialize(tests_dir, workspace / "tests")
+
+    async def copy_tests_async(self, tests_dir: Path, workspace: Path) -> None:
+        await asyncio.to_thread(self.copy_tests, tests_dir, workspace)
 
     def run(self, prompt: str, workspace: Path) -> AgentResult:
+        return asyncio.run(self.run_async(prompt, workspace))
+
+    async def run_async(
+        self, prompt: str, workspace: Path, log_dir: Path | None = None, sandbox: Sandbox | None = None,
+    ) -> AgentResult:
         args = [self.config.command]
         for arg in self.config.args:
             rendered = arg.replace("{prompt}", prompt)
@@ -45,37 +66,39 @@ class AgentRunner:
             args.extend(["-C", str(workspace)])
 
         start = time.monotonic()
-        timed_out = False
         error = None
-        raw_output = ""
-
-        try:
-            result = subprocess.run(
-                args,
-                capture_output=True,
-                text=True,
-                timeout=self.config.timeout_seconds,
-                cwd=str(workspace) if self.config.name != "codex" else None,
-            )
-            raw_output = result.stdout
-            if result.returncode != 0:
-                error = result.stderr or f"Exit code {result.returncode}"
-        except subprocess.TimeoutExpired:
-            timed_out = True
+        parser = parser_for(self.config, start)
+
+        result = await run_process(
+            args,
+            timeout=self.config.timeout_seconds,
+            cwd=workspace if self.config.name != "codex" else None,
+            stdout_log=log_dir / "agent.stdout.log" if log_dir else None,
+            stderr_log=log_dir / "agent.stderr.log" if log_dir else None,
+            on_stdout_line=parser.feed if parser else None,
+            sandbox=sandbox,
+        )
+        if result.timed_out:
             error = f"Timed out after {self.config.timeout_seconds}s"
+        elif result.returncode != 0:
+            error = result.stderr or f"Exit code {result.returncode}"
 
-        elapsed = time.monotonic() - start
+        # Measured to the agent's exit, so tearing down its leftovers is not billed to it
+        elapsed = result.wall_clock_seconds
 
         return AgentResult(
             agent=self.config.name,
             model=self.config.model,
             wall_clock_seconds=round(elapsed, 2),
-            timed_out=timed_out,
+            timed_out=result.timed_out,
             error=error,
-            raw_output=raw_output,
+            raw_output=result.stdout,
+            resources=result.resources,
+            metrics=parser.finish(elapsed) if parser else None,
+            stray_processes=result.stray_processes,
         )
 
     def cleanup(self):
         for d in self._temp_dirs:
-            shutil.rmtree(d, ignore_errors=True)
+            self.provider.discard(d)
         self._temp_dirs.clear()
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+from harness.config import AgentConfig
+from harness.task_loader import BenchmarkTask
+
+Pair = tuple[BenchmarkTask, AgentConfig]
+R = TypeVar("R")
+
+
+def build_schedule(tasks: list[BenchmarkTask], agents: list[AgentConfig]) -> list[Pair]:
+    pairs: list[Pair] = []
+    for task_idx, task in enumerate(tasks):
+        # Rotate which agent goes first for fairness
+        rot = task_idx % len(agents) if agents else 0
+        for agent_config in agents[rot:] + agents[:rot]:
+            pairs.append((task, agent_config))
+    return pairs
+
+
+async def run_schedule(
+    pairs: list[Pair],
+    worker: Callable[[BenchmarkTask, AgentConfig], Awaitable[R]],
+    jobs: int = 1,
+) -> list[R]:
+    jobs = max(1, jobs)
+    results: list[R | None] = [None] * len(pairs)
+    pending = list(range(len(pairs)))
+    active: dict[str, int] = {}
+    running: dict[asyncio.Task, int] = {}
+
+    def next_ready() -> int | None:
+        # Dispatch in schedule order, skipping pairs whose agent is at its cap
+        for pos, idx in enumerate(pending):
+            agent_config = pairs[idx][1]
+            limit = agent_config.max_concurrency
+            if limit is None or active.get(agent_config.name, 0) < limit:
+                return pending.pop(pos)
+        return None
+
+    try:
+        while pending or running:
+            while len(running) < jobs:
+                idx = next_ready()
+                if idx is None:
+                    break
+                task, agent_config = pairs[idx]
+                active[agent_config.name] = active.get(agent_config.name, 0) + 1
+                running[asyncio.ensure_future(worker(task, agent_config))] = idx
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                idx = running.pop(future)
+                active[pairs[idx][1].name] -= 1
+                results[idx] = future.result()
+    finally:
+        # A failing pair or Ctrl-C must not leave agents running in the background
+        for future in running:
+            future.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    return results
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/n (e.g. 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}', index must be between 1 and {max(count, 1)}")
+    return index, count
+
+
+def shard_pairs(pairs: list[Pair], index: int, count: int) -> list[Pair]:
+    # Round-robin over the full schedule so every shard gets a mix of tasks and agents
+    return [pair for pos, pair in enumerate(pairs) if pos % count == index - 1]
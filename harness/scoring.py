@@ -1,4 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+
+from harness.agent_events import AgentMetrics
+from harness.resources import ResourceUsage
+from harness.sketch import QuantileSketch
 
 
 @dataclass
@@ -12,35 +16,210 @@ class TaskScore:
     wall_clock_seconds: float
     timed_out: bool
     error: str | None
+    resources: ResourceUsage | None = None
+    metrics: AgentMetrics | None = None
+    stray_processes: int = 0
+    # From the task's metadata, for the per-category and per-language breakdowns
+    category: str | None = None
+    language: str | None = None
 
 
-def compute_summary(scores: list[TaskScore]) -> dict:
-    by_agent: dict[str, list[TaskScore]] = {}
-    for s in scores:
-        by_agent.setdefault(s.agent, []).append(s)
-
-    summary = {}
-    for agent, agent_scores in by_agent.items():
-        total_tasks = len(agent_scores)
-        fully_passed = sum(1 for s in agent_scores if s.tests_passed == s.tests_total and s.tests_total > 0)
-        avg_correctness = sum(s.correctness for s in agent_scores) / total_tasks if total_tasks else 0
-
-        non_timed_out = [s for s in agent_scores if not s.timed_out]
-        avg_speed = (
-            sum(s.wall_clock_seconds for s in non_timed_out) / len(non_timed_out)
-            if non_timed_out else 0
-        )
-        summary[agent] = {
-            "total_tasks": total_tasks,
-            "tasks_fully_passed": fully_passed,
-            "avg_correctness": round(avg_correctness, 2),
-            "avg_speed_seconds": round(avg_speed, 2),
-            "scores": [_score_to_dict(s) for s in agent_scores],
+SPEED_QUANTILES = (0.5, 0.9, 0.99)
+# TaskScore fields the summary is also broken down by
+BREAKDOWNS = ("category", "language")
+
+
+class AgentAggregate:
+    """Running totals behind one agent's summary.
+
+    Memory does not grow with the number of scores: means are kept as sums and
+    counts, and wall-clock percentiles come from a quantile sketch. Aggregates
+    of the same agent from different shards or runs can be merged.
+    """
+
+    _TOTALS = (
+        "total_tasks", "fully_passed", "correctness_sum", "timed_out", "wall_seconds", "speed_sum", "speed_count",
+        "cpu_seconds", "measured_wall_seconds", "measured", "max_peak_rss_mb", "stray_processes",
+        "metrics", "input_tokens", "output_tokens", "tokens_per_second_sum", "tokens_per_second_count",
+        "turns", "tool_calls", "tool_call_count", "turn_latency_sum", "turn_latency_count",
+        "first_event_sum", "first_event_count",
+    )
+
+    def __init__(self):
+        for name in self._TOTALS:
+            setattr(self, name, 0)
+        self.max_peak_rss_mb = None
+        self.wall_clock = QuantileSketch()
+
+    def add(self, s: TaskScore) -> None:
+        self.total_tasks += 1
+        self.fully_passed += s.tests_passed == s.tests_total and s.tests_total > 0
+        self.correctness_sum += s.correctness
+        self.timed_out += s.timed_out
+        self.wall_seconds += s.wall_clock_seconds
+        if not s.timed_out:
+            self.speed_sum += s.wall_clock_seconds
+            self.speed_count += 1
+        # Timed-out runs stay in the percentiles: they are the tail
+        self.wall_clock.add(s.wall_clock_seconds)
+        if s.resources is not None:
+            self.cpu_seconds += s.resources.cpu_seconds
+            self.measured_wall_seconds += s.wall_clock_seconds
+            self.measured += 1
+            self.max_peak_rss_mb = _max(self.max_peak_rss_mb, s.resources.peak_rss_mb)
+        self.stray_processes += s.stray_processes
+        m = s.metrics
+        if m is not None:
+            self.metrics += 1
+            self.input_tokens += m.input_tokens
+            self.output_tokens += m.output_tokens
+            self.turns += m.turns
+            if m.total_tool_calls is not None:
+                self.tool_calls += m.total_tool_calls
+                self.tool_call_count += 1
+            if m.tokens_per_second is not None:
+                self.tokens_per_second_sum += m.tokens_per_second
+                self.tokens_per_second_count += 1
+            if m.avg_turn_latency_seconds is not None:
+                self.turn_latency_sum += m.avg_turn_latency_seconds
+                self.turn_latency_count += 1
+            if m.time_to_first_event_seconds is not None:
+                self.first_event_sum += m.time_to_first_event_seconds
+                self.first_event_count += 1
+
+    def merge(self, other: "AgentAggregate") -> None:
+        for name in self._TOTALS:
+            if name != "max_peak_rss_mb":
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.max_peak_rss_mb = _max(self.max_peak_rss_mb, other.max_peak_rss_mb)
+        self.wall_clock.merge(other.wall_clock)
+
+    def outcome_summary(self) -> dict:
+        """Pass counts, latency percentiles, timeout rate, throughput and efficiency."""
+        hours = self.wall_seconds / 3600
+        return {
+            "total_tasks": self.total_tasks,
+            "tasks_fully_passed": self.fully_passed,
+            "avg_correctness": round(self.correctness_sum / self.total_tasks, 2) if self.total_tasks else 0,
+            "avg_speed_seconds": round(self.speed_sum / self.speed_count, 2) if self.speed_count else 0,
+            **{f"speed_p{q * 100:g}_seconds": _round(self.wall_clock.quantile(q)) for q in SPEED_QUANTILES},
+            "timeout_rate": round(self.timed_out / self.total_tasks, 2) if self.total_tasks else 0,
+            # Per hour of agent wall-clock time, timed-out runs included
+            "tasks_solved_per_hour": round(self.fully_passed / hours, 2) if hours else None,
+            "correctness_per_second": round(self.correctness_sum / self.wall_seconds, 4) if self.wall_seconds else None,
+        }
+
+    def summary(self) -> dict:
+        def avg(total: float, count: int) -> float | None:
+            return round(total / count, 2) if count else None
+
+        return {
+            **self.outcome_summary(),
+            "avg_cpu_seconds": avg(self.cpu_seconds, self.measured),
+            # CPU time per wall-clock second: ~0 for an agent waiting on the network
+            "cpu_utilization": avg(self.cpu_seconds, self.measured_wall_seconds),
+            "max_peak_rss_mb": self.max_peak_rss_mb,
+            "stray_processes": self.stray_processes,
+            "total_input_tokens": self.input_tokens if self.metrics else None,
+            "total_output_tokens": self.output_tokens if self.metrics else None,
+            "avg_tokens_per_second": avg(self.tokens_per_second_sum, self.tokens_per_second_count),
+            "avg_turns": avg(self.turns, self.metrics),
+            "avg_tool_calls": avg(self.tool_calls, self.tool_call_count),
+            "avg_turn_latency_seconds": avg(self.turn_latency_sum, self.turn_latency_count),
+            "avg_time_to_first_event_seconds": avg(self.first_event_sum, self.first_event_count),
+        }
+
+    def to_dict(self) -> dict:
+        return {**{name: getattr(self, name) for name in self._TOTALS}, "wall_clock": self.wall_clock.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AgentAggregate":
+        aggregate = cls()
+        for name in cls._TOTALS:
+            setattr(aggregate, name, data.get(name, getattr(aggregate, name)))
+        aggregate.wall_clock = QuantileSketch.from_dict(data["wall_clock"])
+        return aggregate
+
+
+class SummaryAggregator:
+    """Per-agent summary that is updated as each score arrives.
+
+    Each agent's scores are also aggregated per value of every BREAKDOWNS field.
+    """
+
+    def __init__(self):
+        self.agents: dict[str, AgentAggregate] = {}
+        self.breakdowns: dict[str, dict[str, dict[str, AgentAggregate]]] = {field: {} for field in BREAKDOWNS}
+
+    def add(self, score: TaskScore) -> None:
+        self.agents.setdefault(score.agent, AgentAggregate()).add(score)
+        for field, groups in self.breakdowns.items():
+            value = getattr(score, field) or "unknown"
+            groups.setdefault(score.agent, {}).setdefault(value, AgentAggregate()).add(score)
+
+    def merge(self, other: "SummaryAggregator") -> None:
+        for agent, aggregate in other.agents.items():
+            self.agents.setdefault(agent, AgentAggregate()).merge(aggregate)
+        for field, groups in other.breakdowns.items():
+            for agent, values in groups.items():
+                for value, aggregate in values.items():
+                    mine = self.breakdowns[field].setdefault(agent, {})
+                    mine.setdefault(value, AgentAggregate()).merge(aggregate)
+
+    def summary(self) -> dict:
+        summary = {}
+        for agent, aggregate in self.agents.items():
+            summary[agent] = aggregate.summary()
+            for field, groups in self.breakdowns.items():
+                summary[agent][f"by_{field}"] = {
+                    value: groups[agent][value].outcome_summary() for value in sorted(groups.get(agent, {}))
+                }
+        return summary
+
+    def to_dict(self) -> dict:
+        return {
+            "agents": {agent: aggregate.to_dict() for agent, aggregate in self.agents.items()},
+            **{
+                field: {agent: {v: a.to_dict() for v, a in values.items()} for agent, values in groups.items()}
+                for field, groups in self.breakdowns.items()
+            },
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "SummaryAggregator":
+        aggregator = cls()
+        aggregator.agents = {agent: AgentAggregate.from_dict(d) for agent, d in data["agents"].items()}
+        for field in BREAKDOWNS:
+            aggregator.breakdowns[field] = {
+                agent: {v: AgentAggregate.from_dict(d) for v, d in values.items()}
+                for agent, values in data.get(field, {}).items()
+            }
+        return aggregator
+
+
+def compute_summary(scores: list[TaskScore], aggregator: SummaryAggregator | None = None) -> dict:
+    """The per-agent summary of scores, with the scores themselves.
+
+    An aggregator that has already seen exactly these scores saves a pass over them.
+    """
+    if aggregator is None:
+        aggregator = SummaryAggregator()
+        for s in scores:
+            aggregator.add(s)
+    summary = aggregator.summary()
+    for s in scores:
+        summary[s.agent].setdefault("scores", []).append(_score_to_dict(s))
     return summary
 
 
+def _max(a: float | None, b: float | None) -> float | None:
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 2)
+
+
 def _score_to_dict(s: TaskScore) -> dict:
     return {
         "task": s.task,
@@ -52,4 +231,9 @@ def _score_to_dict(s: TaskScore) -> dict:
         "wall_clock_seconds": s.wall_clock_seconds,
         "timed_out": s.timed_out,
         "error": s.error,
+        "resources": asdict(s.resources) if s.resources else None,
+        "agent_metrics": asdict(s.metrics) if s.metrics else None,
+        "stray_processes": s.stray_processes,
+        "category": s.category,
+        "language": s.language,
     }
@@ -14,6 +14,10 @@ class BenchmarkTask:
     repo_dir: Path
     tests_dir: Path
     task_dir: Path
+    # The suites of test_languages do not interfere and may run concurrently
+    parallel_tests: bool = False
+    # Overrides the test runner's timeout for every suite of this task
+    test_timeout_seconds: int | None = None
 
 
 def load_tasks(tasks_dir: Path) -> list[BenchmarkTask]:
@@ -45,5 +49,7 @@ def load_tasks(tasks_dir: Path) -> list[BenchmarkTask]:
             repo_dir=child / "repo",
             tests_dir=child / "tests",
             task_dir=child,
+            parallel_tests=meta.get("parallel_tests", False),
+            test_timeout_seconds=meta.get("test_timeout_seconds"),
         ))
     return tasks
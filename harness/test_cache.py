@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import subprocess
+from dataclasses import asdict, replace
+from pathlib import Path
+
+from harness.config import IsolationConfig, TestRunnerConfig
+from harness.hashing import hash_tree
+from harness.task_loader import BenchmarkTask
+from harness.test_executor import TestCase, TestResult
+
+# Bump when a change to the test executor would parse the same run differently
+CACHE_VERSION = 1
+# Left out of the workspace hash and never walked: node_modules is only
+# fingerprinted, and the rest are caches the test run writes
+EXCLUDE = frozenset({"node_modules", "__pycache__", ".pytest_cache"})
+# Commands whose output identifies the toolchain a language's tests run with
+TOOLCHAINS = {
+    "python": (("python3", "--version"), ("python3", "-m", "pytest", "--version")),
+    "typescript": (("node", "--version"),),
+    "angular": (("node", "--version"),),
+    "c": (("cc", "--version"), ("make", "--version")),
+    "cpp": (("c++", "--version"), ("make", "--version")),
+}
+NODE = ("node", "--version")
+# Identify what is installed in a node_modules tree
+NODE_MODULES_MANIFESTS = ("package.json", ".package-lock.json")
+# Runner settings that can only change a result by making it time out, and
+# timed-out results are never stored
+_UNHASHED_RUNNER_FIELDS = ("timeout_seconds",)
+
+
+def _tool_version(command: tuple[str, ...]) -> str:
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return "none"
+    lines = (proc.stdout or proc.stderr).strip().splitlines()
+    return lines[0] if lines and proc.returncode == 0 else "none"
+
+
+def _hash_node_modules(workspace: Path, h) -> None:
+    # Any node_modules present before the tests run was installed by the agent
+    # (the npm cache links its own in later). Hashing every file would take
+    # longer than most test runs, so each file's path and size plus the
+    # contents of the package manifests stand in for it.
+    for dirpath, dirnames, filenames in os.walk(workspace):
+        dirnames.sort()
+        rel = Path(dirpath).relative_to(workspace)
+        if "node_modules" not in rel.parts:
+            dirnames[:] = [d for d in dirnames if d == "node_modules" or d not in EXCLUDE]
+            continue
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                continue
+            h.update(f"{(rel / name).as_posix()}\0{size}\0".encode())
+            if name in NODE_MODULES_MANIFESTS:
+                h.update(Path(path).read_bytes())
+
+
+class TestResultCache:
+    """Test results keyed by a hash of the workspace (agent changes and copied
+    tests included), the toolchain versions, the test runner configs and the
+    isolation limits.
+
+    With refresh=True lookups always miss, but fresh results are still stored.
+    """
+
+    __test__ = False
+
+    def __init__(self, store: Path, refresh: bool = False):
+        self.store = store
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        # Toolchains do not change during a run, so each is asked once
+        self._versions: dict[tuple[str, ...], str] = {}
+
+    def toolchain(self, languages: list[str], test_runners: dict[str, TestRunnerConfig]) -> dict[str, str]:
+        commands = []
+        for lang in languages:
+            commands.extend(TOOLCHAINS.get(lang, ()))
+            runner = test_runners.get(lang)
+            if runner is not None and runner.dependencies == "npm":
+                commands.append(NODE)
+        versions = {}
+        for command in commands:
+            if command not in self._versions:
+                self._versions[command] = _tool_version(command)
+            versions[" ".join(command)] = self._versions[command]
+        return versions
+
+    def key(
+        self, task: BenchmarkTask, workspace: Path, test_runners: dict[str, TestRunnerConfig],
+        isolation: IsolationConfig | None = None,
+    ) -> str:
+        h = hashlib.sha256(f"v{CACHE_VERSION}\0".encode())
+        hash_tree(workspace, h, EXCLUDE)
+        _hash_node_modules(workspace, h)
+        languages = task.test_languages or [task.language]
+        runners = {
+            lang: {k: v for k, v in asdict(test_runners[lang]).items() if k not in _UNHASHED_RUNNER_FIELDS}
+            if lang in test_runners else None
+            for lang in languages
+        }
+        settings = {
+            "languages": languages, "test_runners": runners, "toolchain": self.toolchain(languages, test_runners),
+        }
+        if isolation is not None and isolation.enabled:
+            # A memory ceiling can turn a pass into an OOM kill
+            settings["isolation"] = asdict(isolation)
+        h.update(json.dumps(settings, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.store / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> TestResult | None:
+        result = None
+        if not self.refresh:
+            try:
+                result = result_from_dict(json.loads(self._path(key).read_text()))
+            except (OSError, ValueError, KeyError, TypeError):
+                result = None
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: TestResult) -> None:
+        # Errors (timeouts, failed installs, missing runners) may not recur
+        if result.error is not None:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        tmp.write_text(json.dumps(asdict(result)))
+        os.replace(tmp, path)
+
+    def describe(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f" ({self.hits / lookups:.0%} hit rate)" if lookups else ""
+        return f"{self.hits} hits, {self.misses} misses{rate}"
+
+
+def result_from_dict(data: dict) -> TestResult:
+    result = TestResult(**data)
+    if result.cases is not None:
+        result.cases = [TestCase(**case) for case in result.cases]
+    # Nothing ran: no processes were left behind, nothing was compiled, and
+    # the original durations must not count twice in the timeout history
+    return replace(result, stray_processes=0, compile_cache=None, timings=None)
@@ -1,52 +1,273 @@
+import asyncio
+import json
+import os
 import re
-import subprocess
+import tempfile
+import time
+import xml.etree.ElementTree as ET
 from dataclasses import dataclass
 from pathlib import Path
 
+from harness.compile_cache import CompileCache
 from harness.config import TestRunnerConfig
+from harness.isolation import Sandbox
+from harness.npm_cache import INSTALL_TIMEOUT, NPM_FLAGS, NpmCache, NpmCacheError
+from harness.process import ProcessResult, run_process
+from harness.pytest_server import PytestForkServer
+
+
+# Machine-readable report formats a test runner can be configured to produce.
+# junit and jest-json are written to the file substituted for {report} in the
+# command; test-lines is read from the "Running <test>... [PASS]" lines that the
+# C/C++ task harnesses print, timed as they stream in.
+REPORT_SUFFIXES = {"junit": ".xml", "jest-json": ".json"}
+DEFAULT_PYTEST = "python3 -m pytest"
+_TEST_LINE = re.compile(r"Running (\w+)\.\.\.\s*(\[PASS\]|\[FAIL\])?")
+
+
+@dataclass
+class TestCase:
+    __test__ = False
+
+    name: str
+    outcome: str  # passed, failed, error or skipped
+    duration_seconds: float | None = None
+    suite: str | None = None
+    language: str | None = None
 
 
 @dataclass
 class TestResult:
+    __test__ = False
+
     tests_total: int
     tests_passed: int
     passed: bool
     raw_output: str
     error: str | None = None
+    stray_processes: int = 0
+    # Per-test outcomes when the runner produced a structured report
+    cases: list[TestCase] | None = None
+    # Compile cache hits, misses and uncacheable compiles of the test build
+    compile_cache: dict | None = None
+    # How long the test command ran and how long it was allowed to run
+    duration_seconds: float | None = None
+    timeout_seconds: float | None = None
+    timed_out: bool = False
+    # Per-language duration, timeout and timed_out of a combined result
+    timings: dict[str, dict] | None = None
+
+
+class TestLineParser:
+    """Test cases from "Running <test>... [PASS]" lines, built as the lines stream in.
+
+    Each test's line completes when the test does, so a test's duration is
+    the time since the previous line. A test that crashed leaves its line
+    unterminated; that line only arrives after exit and gets no duration.
+    """
+
+    __test__ = False
+
+    def __init__(self, start: float):
+        self.previous = start
+        self.cases: list[TestCase] = []
+
+    def feed(self, raw: bytes, now: float) -> None:
+        match = _TEST_LINE.search(raw.decode(errors="replace"))
+        if match:
+            status = match.group(2)
+            self.cases.append(TestCase(
+                name=match.group(1),
+                outcome="passed" if status == "[PASS]" else "failed",
+                duration_seconds=round(now - self.previous, 4) if status else None,
+            ))
+        self.previous = now
 
 
 class TestExecutor:
-    def __init__(self, config: TestRunnerConfig):
+    __test__ = False
+
+    def __init__(
+        self, config: TestRunnerConfig, npm_cache: NpmCache | None = None, compile_cache: CompileCache | None = None,
+        pytest_server: PytestForkServer | None = None, timeout: float | None = None,
+    ):
         self.config = config
+        self.timeout = timeout if timeout is not None else config.timeout_seconds
+        self.npm_cache = npm_cache
+        self.compile_cache = compile_cache
+        self.pytest_server = pytest_server
 
     def run(self, workspace: Path) -> TestResult:
+        return asyncio.run(self.run_async(workspace))
+
+    async def run_async(
+        self, workspace: Path, log_dir: Path | None = None, sandbox: Sandbox | None = None,
+    ) -> TestResult:
         test_dir = workspace / self.config.pattern.rstrip("/")
         cmd = self.config.command.replace("{test_dir}", str(test_dir)).replace("{workspace}", str(workspace))
 
+        if self.config.dependencies == "npm":
+            error = await self.install_npm_dependencies(workspace, log_dir)
+            if error:
+                return TestResult(tests_total=0, tests_passed=0, passed=False, raw_output="", error=error)
+
+        report = self.report_path(log_dir)
+        if report is not None:
+            cmd = cmd.replace("{report}", str(report))
+        compile_stats = None
+        if self.compile_cache is not None and "{compile_cache}" in cmd:
+            compile_stats = self.scratch_path(log_dir, "compile-cache")
+            cmd = cmd.replace("{compile_cache}", self.compile_cache.make_vars(compile_stats))
+        cmd = cmd.replace("{compile_cache}", "")
+        cmd = cmd.replace("{pytest}", self.pytest_server.command() if self.pytest_server else DEFAULT_PYTEST)
+        start = time.monotonic()
+        # Only the matching lines are kept, so memory stays bounded by the number of tests
+        test_lines = TestLineParser(start) if self.config.report == "test-lines" else None
         try:
-            result = subprocess.run(
-                cmd, shell=True, capture_output=True, text=True,
-                timeout=120, cwd=str(workspace),
+            result = await run_process(
+                cmd, shell=True, timeout=self.timeout, cwd=workspace,
+                stdout_log=log_dir / f"tests-{self.config.language}.stdout.log" if log_dir else None,
+                stderr_log=log_dir / f"tests-{self.config.language}.stderr.log" if log_dir else None,
+                on_stdout_line=test_lines.feed if test_lines else None,
+                sandbox=sandbox,
             )
-            output = result.stdout + "\n" + result.stderr
+            test_result = self.parse_result(result)
+            test_result.duration_seconds = round(result.wall_clock_seconds, 3)
+            test_result.timeout_seconds = self.timeout
+            if result.timed_out:
+                test_result.timed_out = True
+                test_result.error = f"Test execution timed out after {self.timeout:g}s"
+            else:
+                cases = self.read_report(report, test_lines, workspace)
+                if cases is not None:
+                    test_result = self.apply_cases(test_result, cases)
+            if compile_stats is not None:
+                test_result.compile_cache = self.compile_cache.collect(compile_stats)
+        finally:
+            if log_dir is None:
+                for path in (report, compile_stats):
+                    if path is not None:
+                        path.unlink(missing_ok=True)
+        test_result.stray_processes = result.stray_processes
+        return test_result
 
-            if self.config.language == "python":
-                return self.parse_pytest_output(output, result.returncode)
-            elif self.config.language in ("typescript", "angular"):
-                return self.parse_jest_output(output, result.returncode)
-            elif self.config.language in ("c", "cpp"):
-                return self.parse_make_test_output(output, result.returncode)
+    def report_path(self, log_dir: Path | None) -> Path | None:
+        suffix = REPORT_SUFFIXES.get(self.config.report)
+        return self.scratch_path(log_dir, f"report{suffix}") if suffix else None
 
-            return TestResult(
-                tests_total=0, tests_passed=0, passed=result.returncode == 0,
-                raw_output=output,
-            )
-        except subprocess.TimeoutExpired:
+    def scratch_path(self, log_dir: Path | None, kind: str) -> Path:
+        """A not-yet-existing file the test command writes to: kept with the logs, else a temp file."""
+        if log_dir is not None:
+            log_dir.mkdir(parents=True, exist_ok=True)
+            path = log_dir / f"tests-{self.config.language}.{kind}"
+            # Output left over from an earlier attempt must never be read back
+            path.unlink(missing_ok=True)
+            return path
+        fd, name = tempfile.mkstemp(prefix="bench-", suffix=f".{kind}")
+        os.close(fd)
+        os.unlink(name)
+        return Path(name)
+
+    def read_report(
+        self, report: Path | None, test_lines: TestLineParser | None, workspace: Path,
+    ) -> list[TestCase] | None:
+        # None means no usable report, leaving the console-output parsers in charge
+        try:
+            if self.config.report == "junit" and report is not None:
+                return self.parse_junit_report(report.read_text())
+            if self.config.report == "jest-json" and report is not None:
+                return self.parse_jest_report(report.read_text(), workspace)
+        except (OSError, ValueError, ET.ParseError):
+            return None
+        if self.config.report == "test-lines" and test_lines is not None:
+            return test_lines.cases or None
+        return None
+
+    @staticmethod
+    def apply_cases(result: TestResult, cases: list[TestCase]) -> TestResult:
+        counted = [c for c in cases if c.outcome != "skipped"]
+        result.tests_total = len(counted)
+        result.tests_passed = sum(c.outcome == "passed" for c in counted)
+        result.passed = result.passed and result.tests_passed == result.tests_total
+        result.cases = cases
+        return result
+
+    @staticmethod
+    def parse_junit_report(text: str) -> list[TestCase]:
+        cases = []
+        for case in ET.fromstring(text).iter("testcase"):
+            outcome = "passed"
+            for child in case:
+                if child.tag in ("failure", "error", "skipped"):
+                    outcome = "failed" if child.tag == "failure" else child.tag
+                    break
+            cases.append(TestCase(
+                name=case.get("name", ""),
+                outcome=outcome,
+                duration_seconds=round(float(case.get("time", 0)), 4),
+                suite=case.get("classname"),
+            ))
+        return cases
+
+    @staticmethod
+    def parse_jest_report(text: str, workspace: Path | None = None) -> list[TestCase]:
+        outcomes = {"passed": "passed", "failed": "failed", "pending": "skipped", "todo": "skipped", "skipped": "skipped"}
+        cases = []
+        for suite in json.loads(text).get("testResults", []):
+            suite_name = suite.get("name") or suite.get("testFilePath")
+            if suite_name and workspace is not None and suite_name.startswith(f"{workspace}/"):
+                suite_name = suite_name[len(str(workspace)) + 1:]
+            for assertion in suite.get("assertionResults", []):
+                duration = assertion.get("duration")
+                cases.append(TestCase(
+                    name=assertion.get("fullName") or assertion.get("title", ""),
+                    outcome=outcomes.get(assertion.get("status"), "failed"),
+                    duration_seconds=round(duration / 1000, 4) if duration is not None else None,
+                    suite=suite_name,
+                ))
+        return cases
+
+    async def install_npm_dependencies(self, workspace: Path, log_dir: Path | None = None) -> str | None:
+        # A node_modules the agent installed itself is kept and topped up by npm
+        if self.npm_cache is not None and not (workspace / "node_modules").exists():
+            try:
+                await self.npm_cache.materialize(workspace, log_dir)
+            except NpmCacheError as e:
+                return str(e)
+            return None
+
+        result = await run_process(
+            ["npm", "install", *NPM_FLAGS], cwd=workspace, timeout=INSTALL_TIMEOUT,
+            stdout_log=log_dir / "npm-install.stdout.log" if log_dir else None,
+            stderr_log=log_dir / "npm-install.stderr.log" if log_dir else None,
+        )
+        if result.timed_out:
+            return "npm install timed out"
+        if result.returncode != 0:
+            return f"npm install failed with exit code {result.returncode}"
+        return None
+
+    def parse_result(self, result: ProcessResult) -> TestResult:
+        output = result.stdout + "\n" + result.stderr
+        if result.timed_out:
+            # What ran before the timeout shows which test hung
             return TestResult(
                 tests_total=0, tests_passed=0, passed=False,
-                raw_output="", error="Test execution timed out",
+                raw_output=output, error="Test execution timed out",
             )
 
+        if self.config.language == "python":
+            return self.parse_pytest_output(output, result.returncode)
+        elif self.config.language in ("typescript", "angular"):
+            return self.parse_jest_output(output, result.returncode)
+        elif self.config.language in ("c", "cpp"):
+            return self.parse_make_test_output(output, result.returncode)
+
+        return TestResult(
+            tests_total=0, tests_passed=0, passed=result.returncode == 0,
+            raw_output=output,
+        )
+
     @staticmethod
     def parse_pytest_output(output: str, returncode: int) -> TestResult:
         passed_match = re.search(r"(\d+) passed", output)
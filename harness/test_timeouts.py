@@ -0,0 +1,81 @@
+import json
+import math
+from pathlib import Path
+
+from harness.config import TestRunnerConfig, TestTimeoutConfig
+from harness.task_loader import BenchmarkTask
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered) - 1e-9))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def load_test_durations(results_dir: Path, runs: int) -> dict[tuple[str, str], list[float]]:
+    """Test suite durations per (task, language) from the newest `runs` run directories.
+
+    Suites that timed out are left out: their duration only says how long
+    they were allowed to run.
+    """
+    durations: dict[tuple[str, str], list[float]] = {}
+    if not results_dir.is_dir():
+        return durations
+    # Run directories are named by their start time, so names sort chronologically
+    run_dirs = sorted((p for p in results_dir.iterdir() if p.is_dir()), reverse=True)[:runs]
+    for run_dir in run_dirs:
+        for path in run_dir.glob("*/*.json"):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if not isinstance(data, dict) or "task" not in data:
+                continue
+            for language, timing in (data.get("test_timings") or {}).items():
+                if not timing.get("timed_out") and timing.get("seconds") is not None:
+                    durations.setdefault((data["task"], language), []).append(timing["seconds"])
+    return durations
+
+
+class TestTimeouts:
+    """Picks the timeout of each test suite.
+
+    A task's `test_timeout_seconds` wins, then (in adaptive mode, with enough
+    history) a percentile of the suite's past durations times a safety factor,
+    then the runner's `timeout_seconds`.
+    """
+
+    __test__ = False
+
+    def __init__(
+        self, config: TestTimeoutConfig | None = None, durations: dict[tuple[str, str], list[float]] | None = None,
+    ):
+        self.config = config or TestTimeoutConfig()
+        self.durations = durations or {}
+
+    @classmethod
+    def from_results(cls, config: TestTimeoutConfig | None, results_dir: Path) -> "TestTimeouts":
+        if config is None or not config.adaptive:
+            return cls(config)
+        return cls(config, load_test_durations(results_dir, config.history_runs))
+
+    def timeout(self, task: BenchmarkTask, runner: TestRunnerConfig) -> float:
+        if task.test_timeout_seconds is not None:
+            return task.test_timeout_seconds
+        adaptive = self.adaptive_timeout(task.name, runner.language)
+        return adaptive if adaptive is not None else runner.timeout_seconds
+
+    def adaptive_timeout(self, task_name: str, language: str) -> float | None:
+        samples = self.durations.get((task_name, language), [])
+        if not self.config.adaptive or len(samples) < self.config.min_samples:
+            return None
+        seconds = percentile(samples, self.config.percentile) * self.config.factor
+        return round(min(max(seconds, self.config.min_seconds), self.config.max_seconds), 1)
+
+    def describe(self) -> str:
+        if not self.config.adaptive:
+            return "fixed"
+        suites = sum(1 for samples in self.durations.values() if len(samples) >= self.config.min_samples)
+        return (f"adaptive (p{self.config.percentile:g} x {self.config.factor:g}) for {suites} suite(s) "
+                f"with at least {self.config.min_samples} past durations")
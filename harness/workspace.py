@@ -0,0 +1,334 @@
+import errno
+import fcntl
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from harness.reaper import WorkspaceReaper
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS, errno.EPERM}
+_WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+_store_lock = threading.Lock()
+
+
+class UnsupportedStrategy(Exception):
+    pass
+
+
+def _reflink_file(src: str, dst: str) -> None:
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as e:
+            if e.errno in _UNSUPPORTED_ERRNOS:
+                raise UnsupportedStrategy(f"reflink not supported: {e.strerror}") from e
+            raise
+    shutil.copystat(src, dst)
+
+
+def _hardlink_file(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED_ERRNOS:
+            raise UnsupportedStrategy(f"hardlink not supported: {e.strerror}") from e
+        raise
+
+
+def _readonly_copy(src: str, dst: str) -> None:
+    shutil.copy2(src, dst)
+    os.chmod(dst, stat.S_IMODE(os.stat(dst).st_mode) & ~_WRITE_BITS)
+
+
+def _entries(root: Path) -> set[str]:
+    found = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        found.update(os.path.normpath(os.path.join(rel, name)) for name in dirnames + filenames)
+    return found
+
+
+def _store_is_fresh(src: Path, store: Path) -> bool:
+    """True if store holds exactly the files of src, as read-only, unmodified copies."""
+    if not store.is_dir():
+        return False
+    names = _entries(src)
+    # Files deleted from or added to the source since the copy was made
+    if names != _entries(store):
+        return False
+    for name in names:
+        try:
+            source = os.lstat(src / name)
+            copy = os.lstat(store / name)
+        except OSError:
+            return False
+        if not stat.S_ISREG(source.st_mode):
+            continue
+        # copy2 keeps the mtime, so any write since then (to the source or
+        # through a workspace link to the copy) shows up as a mismatch
+        if (copy.st_size, copy.st_mtime_ns) != (source.st_size, source.st_mtime_ns) or copy.st_mode & _WRITE_BITS:
+            return False
+    return True
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def hardlink_store_root(base: Path) -> Path:
+    """This process's directory of hardlink stores under base.
+
+    Stores left under base by processes that are gone are removed here, so
+    a crashed run's copies do not pile up.
+    """
+    for path in base.glob(f"{HARDLINK_STORE}-*"):
+        pid = path.name.rsplit("-", 1)[1]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            shutil.rmtree(path, ignore_errors=True)
+    return base / f"{HARDLINK_STORE}-{os.getpid()}"
+
+
+def hardlink_store(src: Path, root: Path) -> Path:
+    """Read-only copy of src under root that workspaces can hard-link to.
+
+    Workspaces never share inodes with the task repo itself. The copy is
+    rebuilt when the repo changes or a file in it was written.
+    """
+    store = root / hashlib.sha256(str(src.resolve()).encode()).hexdigest()[:16]
+    with _store_lock:
+        if _store_is_fresh(src, store):
+            return store
+        root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=store.name + ".", dir=root))
+        shutil.copytree(src, staging, symlinks=True, copy_function=_readonly_copy, dirs_exist_ok=True)
+        # Workspaces linked to the old copy keep their inodes
+        if store.exists():
+            stale = Path(tempfile.mkdtemp(prefix=store.name + ".stale.", dir=root))
+            store.rename(stale / "store")
+            shutil.rmtree(stale, ignore_errors=True)
+        staging.rename(store)
+        return store
+
+
+# Symlinks are recreated rather than followed: node_modules/.bin entries only
+# work as links, since node resolves modules relative to the real file.
+def reflink_tree(src: Path, dest: Path) -> None:
+    shutil.copytree(src, dest, symlinks=True, copy_function=_reflink_file, dirs_exist_ok=True)
+
+
+def hardlink_tree(src: Path, dest: Path, store_root: Path | None = None) -> None:
+    if os.geteuid() == 0:
+        # Permission bits do not stop root from writing to the shared inodes
+        raise UnsupportedStrategy("hardlink farms are unsafe when running as root")
+    # Links only work within one filesystem, so the provider passes a store
+    # root next to its workspaces
+    store = hardlink_store(src, store_root or hardlink_store_root(Path(tempfile.gettempdir())))
+    shutil.copytree(store, dest, symlinks=True, copy_function=_hardlink_file, dirs_exist_ok=True)
+
+
+def copy_tree(src: Path, dest: Path) -> None:
+    shutil.copytree(src, dest, symlinks=True, dirs_exist_ok=True)
+
+
+def link_tree(src: Path, dest: Path) -> str:
+    """Copy a tree that is never modified, such as a cache entry, as cheaply as possible.
+
+    Unlike a task repo, nothing in a workspace is expected to write to such a
+    tree, so its files are hard-linked when they cannot be reflinked, even as
+    root. Returns how the tree was copied: reflink, hardlink or copy.
+    """
+    dest.mkdir(parents=True, exist_ok=True)
+    for name, link_file in (("reflink", _reflink_file), ("hardlink", _hardlink_file)):
+        try:
+            shutil.copytree(src, dest, symlinks=True, copy_function=link_file, dirs_exist_ok=True)
+            return name
+        except UnsupportedStrategy:
+            _clear_dir(dest)
+    copy_tree(src, dest)
+    return "copy"
+
+
+STRATEGIES: dict[str, Callable[[Path, Path], None]] = {
+    "reflink": reflink_tree,
+    "hardlink": hardlink_tree,
+    "copy": copy_tree,
+}
+# Hardlink farms share inodes between concurrent workspaces of a task, so an
+# agent that makes a file writable and edits it in place is seen by the others.
+# They are only used when configured explicitly.
+AUTO_ORDER = ("reflink", "copy")
+HARDLINK_STORE = "bench-hardlink-store"
+
+
+@dataclass
+class Workspace:
+    path: Path
+    strategy: str
+    tier: str = "disk"
+
+
+def tree_size(root: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def same_filesystem(a: Path, b: Path) -> bool:
+    """Whether a and b (or their nearest existing ancestors) are on one filesystem."""
+    def device(path: Path) -> int:
+        path = path.absolute()
+        while not path.exists():
+            path = path.parent
+        return os.stat(path).st_dev
+
+    return device(a) == device(b)
+
+
+class TmpfsTier:
+    def __init__(
+        self, root: Path, budget_bytes: int, build_estimates: dict[str, int] | None = None,
+        disk_languages: set[str] | None = None,
+    ):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.build_estimates = build_estimates or {}
+        # Workspaces of these languages are never placed on the tier
+        self.disk_languages = disk_languages or set()
+        self._reservations: dict[Path, int] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, repo_dir: Path, languages: list[str]) -> int:
+        return tree_size(repo_dir) + sum(self.build_estimates.get(lang, 0) for lang in languages)
+
+    def allocate(self, prefix: str, repo_dir: Path, languages: list[str]) -> Path | None:
+        if not self.root.is_dir() or self.disk_languages.intersection(languages):
+            return None
+        needed = self.estimate(repo_dir, languages)
+        with self._lock:
+            if sum(self._reservations.values()) + needed > self.budget_bytes:
+                return None
+            st = os.statvfs(self.root)
+            if st.f_bavail * st.f_frsize < needed:
+                return None
+            path = Path(tempfile.mkdtemp(prefix=prefix, dir=self.root))
+            self._reservations[path] = needed
+            return path
+
+    def release(self, path: Path) -> None:
+        with self._lock:
+            self._reservations.pop(path, None)
+
+    @property
+    def reserved_bytes(self) -> int:
+        with self._lock:
+            return sum(self._reservations.values())
+
+
+class WorkspaceProvider:
+    def __init__(
+        self, strategy: str = "auto", tmpfs: TmpfsTier | None = None, reaper: WorkspaceReaper | None = None,
+        base_dir: Path | None = None,
+    ):
+        if strategy != "auto" and strategy not in STRATEGIES:
+            raise ValueError(f"Unknown workspace strategy '{strategy}'")
+        self.strategy = strategy
+        self.tmpfs = tmpfs
+        self.reaper = reaper
+        # Where disk workspaces are created (default: system temp dir)
+        self.base_dir = base_dir
+        # Strategies that failed for a (source device, destination device) pair
+        self._unsupported: set[tuple[str, int, int]] = set()
+        self._store_roots: set[Path] = set()
+
+    def create(self, repo_dir: Path, agent_name: str, languages: list[str] | None = None) -> Workspace:
+        prefix = f"bench-{agent_name}-"
+        path = self.tmpfs.allocate(prefix, repo_dir, languages or []) if self.tmpfs else None
+        tier = "tmpfs" if path is not None else "disk"
+        if path is None:
+            path = Path(tempfile.mkdtemp(prefix=prefix, dir=self.base_dir))
+        try:
+            strategy = self.materialize(repo_dir, path)
+        except BaseException:
+            self.discard(path)
+            raise
+        return Workspace(path=path, strategy=strategy, tier=tier)
+
+    def discard(self, path: Path) -> None:
+        release = (lambda: self.tmpfs.release(path)) if self.tmpfs else None
+        if self.reaper is not None:
+            # The tmpfs reservation is only returned once the space is actually freed
+            self.reaper.submit(path, on_done=release)
+            return
+        shutil.rmtree(path, ignore_errors=True)
+        if release:
+            release()
+
+    def close(self) -> None:
+        """Remove the hardlink stores; workspaces linked to them keep their inodes."""
+        for root in self._store_roots:
+            shutil.rmtree(root, ignore_errors=True)
+        self._store_roots.clear()
+
+    def _hardlink_store_root(self, dest: Path) -> Path:
+        # One store directory per workspace filesystem, outside every workspace
+        bases = [self.tmpfs.root] if self.tmpfs else []
+        bases.append(self.base_dir or Path(tempfile.gettempdir()))
+        for base in bases:
+            if same_filesystem(base, dest):
+                root = hardlink_store_root(base)
+                self._store_roots.add(root)
+                return root
+        raise UnsupportedStrategy(f"hardlink: no workspace directory shares a filesystem with {dest}")
+
+    def _apply(self, name: str, src: Path, dest: Path) -> None:
+        if name == "hardlink":
+            STRATEGIES[name](src, dest, self._hardlink_store_root(dest))
+        else:
+            STRATEGIES[name](src, dest)
+
+    def materialize(self, src: Path, dest: Path) -> str:
+        dest.mkdir(parents=True, exist_ok=True)
+        if self.strategy != "auto":
+            self._apply(self.strategy, src, dest)
+            return self.strategy
+
+        devices = (os.stat(src).st_dev, os.stat(dest).st_dev)
+        for name in AUTO_ORDER:
+            if (name, *devices) in self._unsupported:
+                continue
+            try:
+                self._apply(name, src, dest)
+                return name
+            except UnsupportedStrategy:
+                self._unsupported.add((name, *devices))
+                _clear_dir(dest)
+        raise UnsupportedStrategy(f"No workspace strategy could copy {src}")
+
+
+def _clear_dir(path: Path) -> None:
+    for child in path.iterdir():
+        if child.is_dir() and not child.is_symlink():
+            shutil.rmtree(child)
+        else:
+            child.unlink()
+
@@ -0,0 +1,85 @@
+import asyncio
+
+from harness.scheduler import Pair
+from harness.task_loader import BenchmarkTask
+from harness.workspace import Workspace, WorkspaceProvider
+
+Key = tuple[str, str]
+
+
+class WorkspacePool:
+    def __init__(self, pairs: list[Pair], provider: WorkspaceProvider, size: int):
+        self.provider = provider
+        self.size = max(0, size)
+        self.hits = 0
+        self.misses = 0
+        self._tasks: dict[Key, BenchmarkTask] = {}
+        self._upcoming: list[Key] = []
+        for task, agent_config in pairs:
+            key = (task.name, agent_config.name)
+            self._tasks[key] = task
+            self._upcoming.append(key)
+        self._provisioning: dict[Key, asyncio.Task] = {}
+        self._evicting: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._refill()
+
+    async def acquire(self, task_name: str, agent_name: str) -> Workspace:
+        key = (task_name, agent_name)
+        if key in self._upcoming:
+            self._upcoming.remove(key)
+        pending = self._provisioning.pop(key, None)
+        self._refill()
+        if pending is None:
+            pending = self._provision(key)
+        self.hits += pending.done()
+        self.misses += not pending.done()
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            self._evict(pending)
+            raise
+
+    async def close(self) -> None:
+        self._upcoming.clear()
+        self._refill()
+        if self._evicting:
+            await asyncio.gather(*self._evicting, return_exceptions=True)
+
+    def describe(self) -> str:
+        # A miss is a claim that had to wait for its workspace to be created
+        claims = self.hits + self.misses
+        rate = f" ({self.hits / claims:.0%} ready on claim)" if claims else ""
+        return f"{self.hits} hits, {self.misses} misses{rate}"
+
+    def _refill(self) -> None:
+        # The pool only ever holds workspaces for the next `size` pairs in schedule
+        # order; anything else (skipped, reordered by agent caps) is evicted.
+        wanted = self._upcoming[:self.size]
+        for key in list(self._provisioning):
+            if key not in wanted:
+                self._evict(self._provisioning.pop(key))
+        for key in wanted:
+            if key not in self._provisioning:
+                self._provisioning[key] = self._provision(key)
+
+    def _provision(self, key: Key) -> asyncio.Task:
+        task = self._tasks[key]
+        return asyncio.ensure_future(asyncio.to_thread(
+            self.provider.create, task.repo_dir, key[1], task.test_languages,
+        ))
+
+    def _evict(self, pending: asyncio.Task) -> None:
+        # Provisioning runs in a worker thread that cannot be interrupted, so let it
+        # finish and delete the workspace once it exists. Deleting can block (a
+        # synchronous rmtree, or waiting for room in the reaper's queue), so it
+        # runs off the event loop as well.
+        async def discard() -> None:
+            await asyncio.wait([pending])
+            if not pending.cancelled() and pending.exception() is None:
+                await asyncio.to_thread(self.provider.discard, pending.result().path)
+
+        evicting = asyncio.ensure_future(discard())
+        self._evicting.add(evicting)
+        evicting.add_done_callback(self._evicting.discard)
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from harness.agent_events import ClaudeEventParser, CodexEventParser, EventParser, parser_for
+from harness.config import AgentConfig
+
+
+def _feed(parser, events, times):
+    for event, now in zip(events, times):
+        parser.feed(json.dumps(event).encode(), now)
+
+
+def test_claude_json_result():
+    parser = ClaudeEventParser(start=100.0)
+    _feed(parser, [{
+        "type": "result", "subtype": "success", "num_turns": 4, "duration_ms": 20000,
+        "usage": {
+            "input_tokens": 100, "cache_creation_input_tokens": 50,
+            "cache_read_input_tokens": 850, "output_tokens": 400,
+        },
+    }], [120.0])
+    metrics = parser.finish(wall_clock_seconds=20.0)
+    assert metrics.input_tokens == 1000
+    assert metrics.cached_input_tokens == 850
+    assert metrics.output_tokens == 400
+    assert metrics.turns == 4
+    assert metrics.avg_turn_latency_seconds == 5.0
+    assert metrics.tokens_per_second == 20.0
+    # Not carried by the single result object
+    assert metrics.tool_calls is None
+    assert metrics.time_to_first_event_seconds is None
+
+
+def test_claude_stream_json_counts_tools_and_turns():
+    parser = ClaudeEventParser(start=0.0)
+    tool_use = {"type": "tool_use", "name": "Bash", "input": {}}
+    _feed(parser, [
+        {"type": "system", "subtype": "init"},
+        {"type": "assistant", "message": {"content": [tool_use], "usage": {"output_tokens": 10}}},
+        {"type": "user", "message": {"content": []}},
+        {"type": "assistant", "message": {"content": [{**tool_use, "name": "Edit"}], "usage": {"output_tokens": 5}}},
+        {"type": "user", "message": {"content": []}},
+        {"type": "assistant", "message": {"content": [{"type": "text", "text": "done"}]}},
+    ], [0.5, 2.0, 3.0, 5.0, 6.0, 9.0])
+    metrics = parser.finish(wall_clock_seconds=10.0)
+    assert metrics.turns == 3
+    assert metrics.tool_calls == {"Bash": 1, "Edit": 1}
+    assert metrics.output_tokens == 15
+    assert metrics.max_turn_latency_seconds == 3.0
+    assert metrics.time_to_first_event_seconds == 0.5
+
+
+def test_claude_stream_json_merges_events_of_one_message():
+    parser = ClaudeEventParser(start=0.0)
+    usage = {"input_tokens": 100, "cache_read_input_tokens": 400, "output_tokens": 30}
+
+    def part(block, message_id="msg_1"):
+        return {"type": "assistant", "message": {"id": message_id, "content": [block], "usage": usage}}
+
+    _feed(parser, [
+        {"type": "system", "subtype": "init"},
+        part({"type": "thinking", "thinking": "..."}),
+        part({"type": "text", "text": "Running the tests"}),
+        part({"type": "tool_use", "name": "Bash", "input": {}}),
+        {"type": "user", "message": {"content": []}},
+        part({"type": "text", "text": "done"}, "msg_2"),
+    ], [0.5, 2.0, 2.1, 2.2, 4.0, 7.0])
+    metrics = parser.finish(wall_clock_seconds=8.0)
+    assert metrics.turns == 2
+    assert metrics.tool_calls == {"Bash": 1}
+    assert (metrics.input_tokens, metrics.cached_input_tokens, metrics.output_tokens) == (1000, 800, 60)
+    assert parser.turn_latencies == [2.0, 3.0]
+
+
+def test_codex_events_and_bad_lines():
+    parser = CodexEventParser(start=0.0)
+    _feed(parser, [
+        {"type": "thread.started", "thread_id": "t"},
+        {"type": "turn.started"},
+        {"type": "item.completed", "item": {"type": "command_execution", "command": "ls"}},
+        {"type": "item.completed", "item": {"type": "file_change"}},
+        {"type": "item.completed", "item": {"type": "agent_message", "text": "ok"}},
+        {"type": "turn.completed", "usage": {"input_tokens": 900, "cached_input_tokens": 600, "output_tokens": 300}},
+    ], [1.0, 1.0, 4.0, 6.0, 8.0, 11.0])
+    parser.feed(b"not json", 12.0)
+    metrics = parser.finish(wall_clock_seconds=12.0)
+    assert metrics.turns == 1
+    assert metrics.avg_turn_latency_seconds == 10.0
+    assert metrics.tool_calls == {"command_execution": 1, "file_change": 1}
+    assert metrics.input_tokens == 900
+    assert metrics.tokens_per_second == 25.0
+    assert metrics.parse_errors == 1
+
+
+def test_parser_for_infers_format_from_command():
+    def agent(command, event_format=None):
+        return AgentConfig(name="x", command=command, args=[], model=None, timeout_seconds=1,
+                           event_format=event_format)
+
+    assert isinstance(parser_for(agent("/usr/local/bin/claude"), 0.0), ClaudeEventParser)
+    assert isinstance(parser_for(agent("my-wrapper", event_format="codex"), 0.0), CodexEventParser)
+    assert parser_for(agent("echo"), 0.0) is None
+
+
+def test_event_parser_requires_handle():
+    with pytest.raises(TypeError):
+        EventParser(start=0.0)
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from harness.compare import compare_runs, main, mann_whitney_p
+from harness.config import CompareConfig
+
+
+def _values(wall, passed=None):
+    passed = passed if passed is not None else [1.0] * len(wall)
+    return {"wall_clock_seconds": wall, "cpu_seconds": [], "peak_rss_mb": [], "pass_rate": passed}
+
+
+def test_mann_whitney_exact_and_approximate():
+    assert mann_whitney_p([1, 2, 3, 4], [5, 6, 7, 8]) == pytest.approx(2 / 70)
+    assert mann_whitney_p([1, 2], [3, 4]) == pytest.approx(1 / 3)
+    assert mann_whitney_p([3, 3, 3], [3, 3, 3]) == 1.0
+    assert mann_whitney_p(list(range(20)), list(range(100, 120))) < 1e-6
+
+
+def test_pair_regression_needs_significance_and_threshold():
+    baseline = {("t", "a"): _values([10, 11, 10, 12, 11]), ("u", "a"): _values([10, 11, 10, 12, 11])}
+    candidate = {("t", "a"): _values([15, 16, 15, 17, 16]), ("u", "a"): _values([10.5, 11.5, 10.5, 12.5, 11.5])}
+
+    changes = {(c.task, c.metric): c for c in compare_runs(baseline, candidate, CompareConfig(min_tasks=2))}
+
+    slower = changes["t", "wall_clock_seconds"]
+    assert slower.regression and slower.p_value < 0.05 and slower.change == pytest.approx(16 / 11 - 1)
+    # 5% slower is within the 10% threshold, and not significant anyway
+    assert not changes["u", "wall_clock_seconds"].regression
+    assert not changes["t", "pass_rate"].regression and changes["t", "pass_rate"].p_value == 1.0
+    agent = changes[None, "wall_clock_seconds"]
+    assert agent.samples == (2, 2) and agent.change > 0.1
+
+
+def test_agent_change_is_bootstrapped_over_single_runs():
+    tasks = [f"t{i}" for i in range(8)]
+    baseline = {(t, "a"): _values([10.0 + i], [1.0]) for i, t in enumerate(tasks)}
+    candidate = {(t, "a"): _values([13.0 + i], [0.0 if i < 4 else 1.0]) for i, t in enumerate(tasks)}
+
+    changes = {(c.task, c.metric): c for c in compare_runs(baseline, candidate)}
+
+    # One repeat per side: no pair can be significant, but the agent-wide shift is
+    assert not any(c.regression for c in changes.values() if c.task is not None)
+    assert changes[None, "wall_clock_seconds"].regression
+    assert changes[None, "pass_rate"].regression and changes[None, "pass_rate"].change == -0.5
+    # Too few tasks for a per-agent change
+    assert not any(c.task is None for c in compare_runs(baseline, candidate, CompareConfig(min_tasks=9)))
+
+
+def _write_run(run_dir, seconds: dict[str, float]):
+    (run_dir / "a").mkdir(parents=True)
+    for task, wall in seconds.items():
+        (run_dir / "a" / f"{task}.json").write_text(json.dumps({
+            "task": task, "agent": "a", "passed": True, "tests_total": 1, "tests_passed": 1,
+            "wall_clock_seconds": wall, "timed_out": False, "error": None,
+        }))
+
+
+def test_cli_exits_non_zero_on_regressions(tmp_path, capsys):
+    tasks = [f"t{i}" for i in range(6)]
+    for day in range(1, 5):
+        _write_run(tmp_path / f"base-{day}", {t: 10.0 + day for t in tasks})
+        _write_run(tmp_path / f"same-{day}", {t: 10.0 + day for t in tasks})
+        _write_run(tmp_path / f"slow-{day}", {t: 20.0 + day for t in tasks})
+    base = [str(tmp_path / f"base-{day}") for day in range(1, 5)]
+    same = [str(tmp_path / f"same-{day}") for day in range(1, 5)]
+    slow = [str(tmp_path / f"slow-{day}") for day in range(1, 5)]
+
+    with pytest.raises(SystemExit) as exc:
+        main(["--baseline", *base, "--candidate", *same])
+    assert exc.value.code == 0
+    assert "0 regression(s)" in capsys.readouterr().out
+
+    report = tmp_path / "compare.json"
+    with pytest.raises(SystemExit) as exc:
+        main(["--baseline", *base, "--candidate", *same, "--candidate", *slow, "--json", str(report)])
+    assert exc.value.code == 1
+    out = capsys.readouterr().out
+    assert "REGRESSION" in out and "7 regression(s)" in out
+    assert [c["regressions"] for c in json.loads(report.read_text())["candidates"]] == [0, 7]
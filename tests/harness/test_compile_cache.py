@@ -0,0 +1,50 @@
+import shutil
+import subprocess
+
+import pytest
+
+from harness.compile_cache import CompileCache, split_args
+
+
+def test_split_args_separates_compile_and_link():
+    sources, flags, link, output, compile_only = split_args(
+        ["-Wall", "-g", "-I", "inc", "-I.", "-o", "test_runner", "tests/t.c", "list.c", "libx.a", "-lm"],
+    )
+    assert sources == ["tests/t.c", "list.c"]
+    assert flags == ["-Wall", "-g", "-I", "inc", "-I."]
+    assert link == ["libx.a", "-lm"]
+    assert (output, compile_only) == ("test_runner", False)
+
+
+def test_split_args_rejects_uncacheable_invocations():
+    assert split_args(["-E", "list.c"]) is None
+    assert split_args(["-c", "-o", "out.o", "a.c", "b.c"]) is None
+    assert split_args(["@args.rsp"]) is None
+
+
+@pytest.mark.skipif(shutil.which("gcc") is None, reason="needs gcc")
+def test_make_builds_share_objects_across_workspaces(tmp_path):
+    cache = CompileCache(tmp_path / "store")
+    makefile = "test:\n\t$(CC) -g -Wall -I. -o runner main.c util.c\n\t./runner\n"
+
+    def build(name: str, util_value: int) -> tuple[str, dict]:
+        workspace = tmp_path / name
+        workspace.mkdir()
+        (workspace / "Makefile").write_text(makefile)
+        (workspace / "util.h").write_text("int util(void);\n")
+        (workspace / "util.c").write_text(f'#include "util.h"\nint util(void) {{ return {util_value}; }}\n')
+        (workspace / "main.c").write_text(
+            '#include <stdio.h>\n#include "util.h"\nint main(void) { printf("%d\\n", util()); return 0; }\n'
+        )
+        stats_file = tmp_path / f"{name}.stats"
+        result = subprocess.run(
+            f"make -s test {cache.make_vars(stats_file)}", shell=True, cwd=workspace,
+            capture_output=True, text=True, check=True,
+        )
+        return result.stdout.strip(), cache.collect(stats_file)
+
+    assert build("first", 1) == ("1", {"hits": 0, "misses": 2, "uncacheable": 0})
+    assert build("second", 1) == ("1", {"hits": 2, "misses": 0, "uncacheable": 0})
+    # Only the changed source is compiled again
+    assert build("third", 2) == ("2", {"hits": 1, "misses": 1, "uncacheable": 0})
+    assert cache.stats == {"hits": 3, "misses": 3, "uncacheable": 0}
@@ -0,0 +1,59 @@
+import csv
+import json
+
+from harness.export import export, main
+
+
+def _result(task: str, agent: str, seconds: float, passed: bool = True, error: str | None = None) -> dict:
+    return {
+        "task": task, "agent": agent, "model": f"{agent}-model", "category": "bugfix", "language": "python",
+        "passed": passed, "tests_total": 2, "tests_passed": 2 if passed else 1,
+        "wall_clock_seconds": seconds, "timed_out": False, "error": error,
+        "resources": {
+            "user_cpu_seconds": 1.0, "system_cpu_seconds": 0.5, "peak_rss_mb": 64.0, "voluntary_context_switches": 0,
+            "involuntary_context_switches": 0, "block_input_ops": 0, "block_output_ops": 0,
+        },
+        "agent_metrics": {"input_tokens": 10, "output_tokens": 5, "turns": 2, "tool_calls": {"Bash": 2}},
+    }
+
+
+def _write_run(run_dir, results):
+    for data in results:
+        (run_dir / data["agent"]).mkdir(parents=True, exist_ok=True)
+        (run_dir / data["agent"] / f"{data['task']}.json").write_text(json.dumps(data))
+    (run_dir / "summary.json").write_text("{}")
+
+
+def test_export_writes_flat_rows_in_every_format(tmp_path):
+    run_a = tmp_path / "2026-01-01-000000"
+    run_b = tmp_path / "2026-01-02-000000"
+    _write_run(run_a, [_result("t1", "a", 10.0), _result("t2", "a", 20.0, passed=False)])
+    _write_run(run_b, [_result("t1", "a", 8.0, error="boom </script><script>alert(1)")])
+
+    paths = export([run_a, run_b], tmp_path / "out")
+
+    with open(paths["csv"], newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["run_id"], r["task"], r["wall_clock_seconds"]) for r in rows] == [
+        ("2026-01-01-000000", "t1", "10.0"), ("2026-01-01-000000", "t2", "20.0"), ("2026-01-02-000000", "t1", "8.0"),
+    ]
+    lines = [json.loads(line) for line in paths["jsonl"].read_text().splitlines()]
+    assert lines[1]["correctness"] == 0.5 and lines[1]["tool_calls"] == 2
+
+    page = paths["html"].read_text()
+    assert "</script><script>alert" not in page
+    assert page.count("</script>") == 1
+    # Summary rows: one per run and agent
+    assert '["2026-01-01-000000", "a", 2, 1,' in page
+    assert '["2026-01-02-000000", "a", 1, 1,' in page
+
+
+def test_cli_defaults_to_the_run_directory(tmp_path, capsys):
+    run_dir = tmp_path / "2026-01-01-000000"
+    _write_run(run_dir, [_result("t1", "a", 10.0)])
+
+    main([str(run_dir), "--format", "csv"])
+
+    assert (run_dir / "results.csv").exists()
+    assert not (run_dir / "report.html").exists()
+    assert "csv:" in capsys.readouterr().out
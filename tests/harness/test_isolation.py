@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from harness import isolation as isolation_module
+from harness.config import IsolationConfig
+from harness.isolation import Isolation, IsolationUnavailable, Sandbox, prepare_cgroup_root
+from harness.process import run_process
+
+
+@pytest.fixture
+def no_cgroup_v2(tmp_path, monkeypatch):
+    monkeypatch.setattr(isolation_module, "CGROUP_FS", tmp_path / "cgroup")
+
+
+def test_prepare_cgroup_root_requires_cgroup_v2(no_cgroup_v2):
+    with pytest.raises(IsolationUnavailable):
+        prepare_cgroup_root()
+
+
+def test_cpu_slots_are_shared_least_used_first(no_cgroup_v2, monkeypatch):
+    monkeypatch.setattr(isolation_module.os, "sched_getaffinity", lambda pid: {0, 1, 2, 3, 4})
+    isolation = Isolation(IsolationConfig(enabled=True, cpus=2, pin_cpus=True))
+    assert isolation.cpu_slots == [[0, 1], [2, 3]]
+
+    first, second, third = isolation.acquire_cpus(), isolation.acquire_cpus(), isolation.acquire_cpus()
+    assert (first, second, third) == ([0, 1], [2, 3], [0, 1])
+    isolation.release_cpus(second)
+    assert isolation.acquire_cpus() == [2, 3]
+
+
+def test_fallback_sandbox_pins_cpus_and_limits_data_segment(no_cgroup_v2):
+    isolation = Isolation(IsolationConfig(enabled=True, memory_mb=512, pin_cpus=True))
+    assert isolation.mode == "rlimit"
+    sandbox = isolation.sandbox("pair", [0])
+
+    result = asyncio.run(run_process(
+        "ulimit -d; grep Cpus_allowed_list /proc/self/status", shell=True, sandbox=sandbox,
+    ))
+    assert result.returncode == 0
+    limit, allowed = result.stdout.splitlines()
+    assert limit == str(512 * 1024)
+    assert allowed.split()[-1] == "0"
+
+    report = sandbox.close()
+    assert report["mode"] == "rlimit"
+    assert report["memory_mb"] == 512
+    assert report["cpu_quota"] is None
+
+
+def test_cgroup_sandbox_writes_limits_and_reports_events(no_cgroup_v2, tmp_path, monkeypatch):
+    isolation = Isolation(IsolationConfig(enabled=True, cpus=1.5, memory_mb=256))
+    isolation.cgroup_root = tmp_path
+    sandbox = isolation.sandbox("pair", [2, 3])
+    group = sandbox.group
+    assert group.parent == tmp_path
+    assert (group / "cpu.max").read_text() == "150000 100000"
+    assert (group / "memory.max").read_text() == str(256 * 1024 * 1024)
+    assert (group / "cpuset.cpus").read_text() == "2,3"
+    assert sandbox.wrap(["make", "test"])[-2:] == ["make", "test"]
+    assert str(group / "cgroup.procs") in sandbox.wrap("make test", shell=True)
+
+    (group / "cpu.stat").write_text("usage_usec 2500000\nnr_throttled 7\nthrottled_usec 1200000\n")
+    (group / "memory.events").write_text("low 0\nhigh 0\nmax 3\noom 1\noom_kill 1\n")
+    (group / "memory.peak").write_text(str(200 * 1024 * 1024))
+    monkeypatch.setattr(Sandbox, "_remove", lambda self: None)
+    report = sandbox.close()
+    assert report["mode"] == "cgroup"
+    assert report["throttled_periods"] == 7
+    assert report["throttled_seconds"] == 1.2
+    assert report["memory_peak_mb"] == 200.0
+    assert report["oom_kills"] == 1
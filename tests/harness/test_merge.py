@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from harness.merge import merge_runs
+from harness.results import result_path, write_result
+
+
+def _write_shard(run_dir: Path, index: int, count: int, pairs: list[tuple[str, str, int]]):
+    run_dir.mkdir(parents=True)
+    (run_dir / "shard.json").write_text(json.dumps({
+        "shard": [index, count],
+        "pairs": [[task, agent] for task, agent, _ in pairs],
+    }))
+    for task, agent, passed in pairs:
+        write_result(result_path(run_dir, task, agent), {
+            "task": task, "agent": agent, "model": "m",
+            "tests_total": 2, "tests_passed": passed, "wall_clock_seconds": 10.0,
+            "timed_out": False, "error": None,
+        })
+
+
+def test_merge_combines_shards_and_recomputes_summary(tmp_path):
+    _write_shard(tmp_path / "s1", 1, 2, [("t1", "claude", 2), ("t2", "codex", 1)])
+    _write_shard(tmp_path / "s2", 2, 2, [("t1", "codex", 2), ("t2", "claude", 2)])
+
+    scores = merge_runs([tmp_path / "s1", tmp_path / "s2"], tmp_path / "merged")
+
+    assert [(s.task, s.agent) for s in scores] == [
+        ("t1", "claude"), ("t1", "codex"), ("t2", "claude"), ("t2", "codex"),
+    ]
+    assert (tmp_path / "merged" / "codex" / "t2.json").exists()
+    summary = json.loads((tmp_path / "merged" / "summary.json").read_text())
+    assert summary["claude"]["tasks_fully_passed"] == 2
+    assert summary["codex"]["tasks_fully_passed"] == 1
+
+
+def test_merge_rejects_duplicate_pairs(tmp_path):
+    _write_shard(tmp_path / "s1", 1, 2, [("t1", "claude", 2)])
+    _write_shard(tmp_path / "s2", 2, 2, [("t1", "claude", 1)])
+    with pytest.raises(ValueError, match="t1/claude"):
+        merge_runs([tmp_path / "s1", tmp_path / "s2"], tmp_path / "merged")
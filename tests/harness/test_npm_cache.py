@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+import pytest
+
+from harness.npm_cache import NpmCache, NpmCacheError
+
+FAKE_NPM = """#!/bin/sh
+echo "$@" >> "$NPM_CALLS"
+mkdir -p node_modules/jest/bin node_modules/.bin
+echo "module.exports = 1" > node_modules/jest/bin/jest.js
+ln -s ../jest/bin/jest.js node_modules/.bin/jest
+"""
+
+
+@pytest.fixture
+def fake_npm(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    npm = bin_dir / "npm"
+    npm.write_text(FAKE_NPM)
+    npm.chmod(0o755)
+    calls = tmp_path / "npm-calls"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("NPM_CALLS", str(calls))
+    return calls
+
+
+def _project(path, manifest='{"devDependencies": {"jest": "^29.0.0"}}'):
+    path.mkdir(parents=True)
+    (path / "package.json").write_text(manifest)
+    return path
+
+
+def test_installs_each_dependency_set_once(tmp_path, fake_npm):
+    cache = NpmCache(tmp_path / "store")
+    first = _project(tmp_path / "a")
+    second = _project(tmp_path / "b")
+
+    async def main():
+        return await asyncio.gather(cache.materialize(first), cache.materialize(second))
+
+    strategies = asyncio.run(main())
+    assert fake_npm.read_text().splitlines() == ["install --no-audit --no-fund --quiet"]
+    assert (cache.installs, cache.hits) == (1, 1)
+    for project in (first, second):
+        link = project / "node_modules" / ".bin" / "jest"
+        assert link.is_symlink()
+        assert link.read_text() == "module.exports = 1\n"
+    assert not list((tmp_path / "store").glob(".tmp-*"))
+    # The store and the workspaces share a filesystem, so nothing is copied
+    assert strategies[0] == strategies[1] != "copy"
+    if strategies[0] == "hardlink":
+        assert (first / "node_modules" / "jest" / "bin" / "jest.js").stat().st_nlink == 3
+
+
+def test_key_follows_manifests(tmp_path):
+    cache = NpmCache(tmp_path / "store")
+    project = _project(tmp_path / "a")
+    key = cache.key(project)
+    assert cache.key(_project(tmp_path / "b")) == key
+    (project / "package-lock.json").write_text("{}")
+    assert cache.key(project) != key
+    assert cache.key(tmp_path) is None
+
+
+def test_offline_miss_raises_without_running_npm(tmp_path, fake_npm):
+    cache = NpmCache(tmp_path / "store", offline=True)
+    with pytest.raises(NpmCacheError, match="offline store"):
+        asyncio.run(cache.materialize(_project(tmp_path / "a")))
+    assert not fake_npm.exists()
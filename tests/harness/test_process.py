@@ -0,0 +1,119 @@
+import asyncio
+import signal
+import subprocess
+import sys
+import time
+
+from harness import process
+from harness.process import LineSplitter, OutputCapture, run_process, terminate_tree
+from harness.resources import read_stat
+
+
+def test_output_capture_keeps_head_and_tail(tmp_path):
+    log = tmp_path / "out.log"
+    capture = OutputCapture(log, head_bytes=4, tail_bytes=6)
+    for chunk in (b"abcdef", b"ghij", b"klmnop", b"qrst"):
+        capture.write(chunk)
+    capture.close()
+
+    assert capture.total_bytes == 20
+    assert capture.truncated
+    text = capture.text()
+    assert text.startswith("abcd")
+    assert text.endswith("opqrst")
+    assert "[10 bytes truncated]" in text
+    assert log.read_bytes() == b"abcdefghijklmnopqrst"
+
+
+def test_output_capture_small_output_is_verbatim():
+    capture = OutputCapture(head_bytes=4, tail_bytes=16)
+    capture.write(b"hello ")
+    capture.write(b"world")
+    assert not capture.truncated
+    assert capture.text() == "hello world"
+
+
+def test_run_process_streams_large_output_to_log(tmp_path):
+    script = "import sys; sys.stdout.write('x' * 3_000_000 + 'END')"
+    result = asyncio.run(run_process(
+        [sys.executable, "-c", script], stdout_log=tmp_path / "stdout.log",
+    ))
+    assert result.returncode == 0
+    assert result.stdout_bytes == 3_000_003
+    assert len(result.stdout) < 2_000_000
+    assert result.stdout.endswith("END")
+    assert (tmp_path / "stdout.log").stat().st_size == 3_000_003
+
+
+def test_line_splitter_handles_split_and_oversized_lines():
+    lines = []
+    splitter = LineSplitter(lambda line, now: lines.append(line), max_line_bytes=8)
+    for chunk in (b'{"a"', b': 1}\n{"b": 2}\n', b"x" * 20, b"yy\nlast"):
+        splitter.write(chunk)
+    splitter.close()
+    assert lines == [b'{"a": 1}', b'{"b": 2}', b"last"]
+    assert splitter.dropped_lines == 1
+
+
+def test_run_process_kills_processes_left_behind():
+    start = time.monotonic()
+    result = asyncio.run(run_process("sleep 30 & echo done", shell=True, timeout=10))
+    assert result.returncode == 0
+    assert result.stdout.strip() == "done"
+    assert result.stray_processes == 1
+    assert time.monotonic() - start < 5
+
+
+def test_run_process_kills_escaped_pipe_holder(tmp_path):
+    # Escapes its session before the sampler ever sees it, but keeps stdout open
+    marker = tmp_path / "pid"
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        return await run_process(f"setsid sh -c 'echo $$ > {marker}; exec sleep 30' & echo hi", shell=True)
+
+    result = asyncio.run(main())
+    assert result.stdout.strip() == "hi"
+    assert result.stray_processes >= 1
+    assert result.wall_clock_seconds < 1
+    stat = read_stat(int(marker.read_text()))
+    assert stat is None or stat.state == "Z"
+    assert errors == []
+
+
+def test_run_process_timeout_tears_down_whole_tree(tmp_path):
+    marker = tmp_path / "pid"
+    result = asyncio.run(run_process(f"sleep 30 & echo $! > {marker}; wait", shell=True, timeout=0.5))
+    assert result.timed_out
+    pid = int(marker.read_text())
+    stat = read_stat(pid)
+    assert stat is None or stat.state == "Z"
+
+
+def test_terminate_tree_signals_the_process_group(tmp_path, monkeypatch):
+    # A child /proc never showed us is still reached through the tree's process group
+    monkeypatch.setattr(process, "tree_members", lambda root, known=None: {})
+    marker = tmp_path / "pid"
+    result = asyncio.run(run_process(f"sleep 30 & echo $! > {marker}; wait", shell=True, timeout=0.5))
+    assert result.timed_out
+    stat = read_stat(int(marker.read_text()))
+    assert stat is None or stat.state == "Z"
+
+
+def test_terminate_tree_escalates_to_sigkill():
+    script = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print('ready', flush=True); time.sleep(30)"
+
+    async def main():
+        proc = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, start_new_session=True)
+        proc.stdout.readline()
+        start = time.monotonic()
+        # A pending exit future means the root has not been reaped and may be signalled
+        pending = asyncio.get_running_loop().create_future()
+        await terminate_tree(proc.pid, {}, pending, grace=0.2)
+        elapsed = time.monotonic() - start
+        return proc.wait(timeout=5), elapsed
+
+    returncode, elapsed = asyncio.run(main())
+    assert returncode == -signal.SIGKILL
+    assert elapsed < 3
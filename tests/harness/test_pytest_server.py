@@ -0,0 +1,76 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from harness.config import TestRunnerConfig
+from harness.process import run_process
+from harness.pytest_server import PytestForkServer
+from harness.test_executor import TestExecutor
+
+
+@pytest.fixture
+def server():
+    server = PytestForkServer(sys.executable)
+    assert server.start()
+    yield server
+    server.stop()
+
+
+def make_workspace(path, value):
+    (path / "tests").mkdir(parents=True)
+    (path / "calc.py").write_text(f"VALUE = {value}\n")
+    (path / "tests" / "test_calc.py").write_text(
+        "import calc\n"
+        f"def test_value(): assert calc.VALUE == {value}\n"
+        "def test_bad(): assert False\n"
+    )
+    return path
+
+
+def test_runs_workspace_tests_through_the_server(tmp_path, server):
+    config = TestRunnerConfig(
+        language="python",
+        command="{pytest} {test_dir} -q -p no:cacheprovider --junitxml={report}",
+        pattern="tests/",
+        report="junit",
+    )
+    # Both workspaces import their own calc module, which must not leak across runs
+    for value in (1, 2):
+        workspace = make_workspace(tmp_path / f"ws{value}", value)
+        result = asyncio.run(TestExecutor(config, pytest_server=server).run_async(workspace, workspace / "logs"))
+        assert (result.tests_total, result.tests_passed, result.passed) == (2, 1, False)
+        assert {c.name: c.outcome for c in result.cases} == {"test_value": "passed", "test_bad": "failed"}
+
+
+def test_killing_the_client_kills_the_run(tmp_path, server):
+    marker = tmp_path / "pid"
+    (tmp_path / "test_slow.py").write_text(
+        "import os, subprocess, time\n"
+        "def test_slow():\n"
+        f"    open({str(marker)!r}, 'w').write(str(subprocess.Popen(['sleep', '60']).pid))\n"
+        "    time.sleep(60)\n"
+    )
+    result = asyncio.run(run_process(f"{server.command()} -q -p no:cacheprovider", shell=True, cwd=tmp_path, timeout=3))
+    assert result.timed_out
+    pid = int(marker.read_text())
+    for _ in range(50):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if f.read().rsplit(")", 1)[1].split()[0] == "Z":
+                    break
+        except FileNotFoundError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail("the test's child process outlived the client")
+
+
+def test_client_falls_back_to_plain_pytest(tmp_path, server):
+    workspace = make_workspace(tmp_path, 3)
+    command = server.command()
+    server.stop()
+    result = asyncio.run(run_process(f"{command} tests -q -p no:cacheprovider", shell=True, cwd=workspace, timeout=60))
+    assert result.returncode == 1
+    assert "1 failed, 1 passed" in result.stdout
@@ -0,0 +1,48 @@
+from harness.reaper import WorkspaceReaper
+from harness.workspace import TmpfsTier, WorkspaceProvider
+
+
+def test_reaper_renames_then_deletes_in_background(tmp_path):
+    workspace = tmp_path / "bench-a-123"
+    (workspace / "node_modules" / "pkg").mkdir(parents=True)
+    (workspace / "node_modules" / "pkg" / "index.js").write_text("x")
+    done = []
+
+    reaper = WorkspaceReaper(max_pending=2)
+    reaper.submit(workspace, on_done=lambda: done.append(True))
+    # The original name is free as soon as submit returns
+    assert not workspace.exists()
+    workspace.mkdir()
+    reaper.drain()
+
+    assert workspace.exists()
+    assert done == [True]
+    assert list(tmp_path.iterdir()) == [workspace]
+    stats = reaper.stats()
+    assert stats["workspaces"] == 1
+    assert stats["delete_seconds"] >= 0
+
+
+def test_provider_releases_tmpfs_after_background_delete(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "main.py").write_text("x" * 100)
+    ram = tmp_path / "shm"
+    ram.mkdir()
+    tier = TmpfsTier(ram, budget_bytes=10_000)
+    reaper = WorkspaceReaper()
+    provider = WorkspaceProvider("copy", tier, reaper)
+
+    ws = provider.create(repo, "agent")
+    provider.discard(ws.path)
+    reaper.drain()
+
+    assert tier.reserved_bytes == 0
+    assert list(ram.iterdir()) == []
+
+
+def test_drain_without_submissions_is_a_no_op():
+    reaper = WorkspaceReaper()
+    reaper.drain()
+    reaper.drain()
+    assert reaper.stats()["workspaces"] == 0
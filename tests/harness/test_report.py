@@ -30,3 +30,30 @@ def test_format_report_contains_summary():
     ]
     report = format_report(scores)
     assert "SUMMARY" in report or "Summary" in report
+
+
+def test_format_report_shows_resource_rows_without_data():
+    scores = [
+        _make_score("claude-code", "task1", 5, 5, 30),
+        _make_score("codex", "task1", 5, 5, 45),
+    ]
+    report = format_report(scores)
+    assert "Avg CPU (s)" in report
+    assert "Peak RSS (MB)" in report
+    assert "N/A" in report
+
+
+def test_format_report_breaks_down_by_category_and_language():
+    scores = [
+        _make_score("claude-code", "task1", 5, 5, 30),
+        _make_score("codex", "task1", 3, 5, 45),
+    ]
+    for s in scores:
+        s.category, s.language = "bugfix", "python"
+    report = format_report(scores)
+    assert "Timeout rate" in report
+    assert "Speed p50/p90 (s)" in report
+    lines = report.splitlines()
+    bugfix = lines[lines.index("BY CATEGORY") + 4]
+    assert bugfix.split() == ["bugfix", "1/1", "p50", "30s", "0/1", "p50", "45s"]
+    assert "BY LANGUAGE" in report
@@ -0,0 +1,74 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from harness import resources
+from harness.process import run_process
+from harness.resources import ProcessTreeSampler, ResourceUsage, descendants, usage_from_dict
+
+
+def test_sampler_sees_grandchildren():
+    proc = subprocess.Popen(["sh", "-c", "sleep 2 & sleep 2 & wait"])
+    try:
+        time.sleep(0.3)
+        assert len(descendants(proc.pid)) >= 2
+        sampler = ProcessTreeSampler(proc.pid)
+        sampler.sample()
+        assert sampler.max_processes >= 3
+        assert sampler.peak_rss_bytes > 0
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def test_run_process_reports_cpu_of_descendants():
+    script = "import subprocess, sys; subprocess.run([sys.executable, '-c', 'sum(range(3 * 10**7))'])"
+    result = asyncio.run(run_process([sys.executable, "-c", script]))
+    usage = result.resources
+    assert usage is not None
+    # The busy loop runs in a grandchild that the child waits for
+    assert usage.user_cpu_seconds > 0.2
+    assert usage.peak_rss_mb > 0
+
+
+def test_usage_from_dict_ignores_unknown_keys():
+    usage = usage_from_dict({
+        "user_cpu_seconds": 1.5, "system_cpu_seconds": 0.5, "peak_rss_mb": 10.0,
+        "voluntary_context_switches": 3, "involuntary_context_switches": 4,
+        "block_input_ops": 0, "block_output_ops": 8, "future_field": 1,
+    })
+    assert isinstance(usage, ResourceUsage)
+    assert usage.cpu_seconds == 2.0
+    assert usage_from_dict(None) is None
+
+
+def test_run_process_without_procfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources, "_PROC", tmp_path / "missing")
+    result = asyncio.run(run_process([sys.executable, "-c", "print('hi')"]))
+    assert result.returncode == 0
+    assert result.stdout.strip() == "hi"
+    assert result.resources is not None and result.resources.user_cpu_seconds >= 0
+
+
+def test_reaped_child_io_is_counted_once(tmp_path):
+    # sh reaps dd, whose writes then show up in sh's own counters
+    script = f"dd if=/dev/zero of={tmp_path / 'out'} bs=1M count=20 conv=fsync 2>/dev/null; sleep 0.6"
+    result = asyncio.run(run_process(script, shell=True))
+    if result.resources.write_bytes == 0:
+        pytest.skip("no block I/O accounting for this filesystem")
+    assert 20 * 2**20 <= result.resources.write_bytes < 30 * 2**20
+
+
+def test_timeout_without_procfs_kills_the_tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(resources, "_PROC", tmp_path / "missing")
+    marker = tmp_path / "pids"
+    script = f"sleep 30 & echo $! >> {marker}; sleep 30 & echo $! >> {marker}; wait"
+    result = asyncio.run(run_process(script, shell=True, timeout=0.5))
+    assert result.timed_out
+    monkeypatch.undo()
+    for pid in marker.read_text().split():
+        stat = resources.read_stat(int(pid))
+        assert stat is None or stat.state == "Z"
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from harness.config import AgentConfig, TestRunnerConfig
+from harness.results import load_completed, pair_fingerprint, result_path, write_result
+from harness.task_loader import load_tasks
+
+RUNNERS = {"python": TestRunnerConfig(language="python", command="pytest", pattern="tests/")}
+
+
+def _agent(**overrides) -> AgentConfig:
+    fields = dict(name="claude", command="claude", args=["{prompt}"], model="m", timeout_seconds=60)
+    fields.update(overrides)
+    return AgentConfig(**fields)
+
+
+def _make_task(base: Path):
+    task_dir = base / "01-task"
+    (task_dir / "repo").mkdir(parents=True)
+    (task_dir / "tests").mkdir()
+    (task_dir / "prompt.md").write_text("Fix it")
+    (task_dir / "metadata.json").write_text(json.dumps({"language": "python", "category": "bugfix"}))
+    (task_dir / "repo" / "main.py").write_text("x = 1")
+    (task_dir / "tests" / "test_main.py").write_text("def test(): pass")
+    return task_dir
+
+
+def test_fingerprint_changes_with_task_contents(tmp_path):
+    task_dir = _make_task(tmp_path)
+    before = pair_fingerprint(load_tasks(tmp_path)[0], _agent(), RUNNERS)
+    (task_dir / "repo" / "main.py").write_text("x = 2")
+    after = pair_fingerprint(load_tasks(tmp_path)[0], _agent(), RUNNERS)
+    assert before != after
+
+
+def test_fingerprint_tracks_agent_config_but_not_concurrency(tmp_path):
+    _make_task(tmp_path)
+    task = load_tasks(tmp_path)[0]
+    base = pair_fingerprint(task, _agent(), RUNNERS)
+    assert pair_fingerprint(task, _agent(max_concurrency=3), RUNNERS) == base
+    assert pair_fingerprint(task, _agent(model="other"), RUNNERS) != base
+    assert pair_fingerprint(task, _agent(), RUNNERS, dry_run=True) != base
+
+
+def test_load_completed_rejects_stale_or_corrupt_results(tmp_path):
+    path = result_path(tmp_path, "01-task", "claude")
+    write_result(path, {
+        "task": "01-task", "agent": "claude", "model": "m",
+        "tests_total": 4, "tests_passed": 3, "wall_clock_seconds": 12.5,
+        "timed_out": False, "error": None, "fingerprint": "abc",
+    })
+    score = load_completed(path, "abc")
+    assert score is not None
+    assert score.correctness == 0.75
+    assert score.wall_clock_seconds == 12.5
+    assert load_completed(path, "def") is None
+
+    path.write_text("{truncated")
+    assert load_completed(path, "abc") is None
+    assert load_completed(tmp_path / "missing.json", "abc") is None
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from harness.results_db import ResultsDB, main
+
+
+def _result(task: str, agent: str, seconds: float, passed: int = 2, cases: bool = True) -> dict:
+    return {
+        "task": task, "agent": agent, "model": f"{agent}-model", "category": "bugfix", "language": "python",
+        "dry_run": False, "passed": passed == 2, "tests_total": 2, "tests_passed": passed,
+        "wall_clock_seconds": seconds, "timed_out": False, "error": None,
+        "resources": {"user_cpu_seconds": 1.5, "system_cpu_seconds": 0.5, "peak_rss_mb": 100.0},
+        "agent_metrics": {"input_tokens": 10, "output_tokens": 5, "turns": 2, "tool_calls": {"Bash": 2, "Edit": 1}},
+        "stray_processes": {"agent": 1, "tests": 0},
+        "test_cases": [
+            {"name": "test_a", "outcome": "passed", "duration_seconds": 0.1, "suite": None, "language": "python"},
+            {"name": "test_b", "outcome": "passed" if passed == 2 else "failed"},
+        ] if cases else None,
+        "test_timings": {"python": {"seconds": 0.4, "timeout_seconds": 120, "timed_out": False}},
+    }
+
+
+def test_record_replaces_a_pair_and_its_test_rows(tmp_path):
+    db = ResultsDB(tmp_path / "results.db")
+    db.record("2026-01-01-000000", _result("t", "a", 10.0, passed=1))
+    db.record("2026-01-01-000000", _result("t", "a", 12.0))
+
+    rows = db.query("SELECT * FROM pair_results")
+    assert len(rows) == 1
+    row = rows[0]
+    assert (row["wall_clock_seconds"], row["correctness"], row["tool_calls"], row["stray_processes"]) == (12.0, 1, 3, 1)
+    assert json.loads(row["data"])["model"] == "a-model"
+    outcomes = db.query("SELECT name, outcome FROM test_cases WHERE result_id = ? ORDER BY name", (row["id"],))
+    assert [tuple(r) for r in outcomes] == [("test_a", "passed"), ("test_b", "passed")]
+    assert db.query("SELECT count(*) FROM test_timings")[0][0] == 1
+    assert db.query("PRAGMA journal_mode")[0][0] == "wal"
+
+
+def test_history_filters_and_keeps_the_newest_runs(tmp_path):
+    db = ResultsDB(tmp_path / "results.db")
+    for day in range(1, 6):
+        run_id = f"2026-01-0{day}-000000"
+        db.record(run_id, _result("t", "a", float(day)))
+        db.record(run_id, _result("t", "b", 100.0 + day))
+    db.record("2026-01-06-000000", _result("other", "b", 1.0))
+
+    rows = db.history(task="t", agent="a", runs=3)
+    assert [(r["run_id"], r["wall_clock_seconds"]) for r in rows] == [
+        ("2026-01-03-000000", 3.0), ("2026-01-04-000000", 4.0), ("2026-01-05-000000", 5.0),
+    ]
+    assert len(db.history(task="t", runs=2)) == 4
+
+
+def test_import_and_query_cli(tmp_path, capsys):
+    run_dir = tmp_path / "results" / "2026-01-01-000000"
+    for agent in ("a", "b"):
+        (run_dir / agent).mkdir(parents=True)
+        (run_dir / agent / "t.json").write_text(json.dumps(_result("t", agent, 5.0, cases=False)))
+    (run_dir / "summary.json").write_text("{}")
+    db_path = tmp_path / "results.db"
+
+    main(["--db", str(db_path), "import", str(run_dir)])
+    assert "2026-01-01-000000: 2 result(s)" in capsys.readouterr().out
+
+    main(["--db", str(db_path), "sql", "SELECT agent, wall_clock_seconds FROM pair_results ORDER BY agent"])
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].split() == ["agent", "wall_clock_seconds"]
+    assert [line.split() for line in out[2:]] == [["a", "5.0"], ["b", "5.0"]]
+
+    with pytest.raises(SystemExit):
+        main(["--db", str(db_path), "sql", "DELETE FROM pair_results"])
+    assert ResultsDB(db_path).query("SELECT count(*) FROM pair_results")[0][0] == 2
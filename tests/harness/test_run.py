@@ -1,9 +1,10 @@
+import asyncio
 from pathlib import Path
 from unittest.mock import patch
 
 from harness import config as harness_config
 from harness import test_executor as harness_test_executor
-from harness.run import run_tests_for_task
+from harness.run import run_tests_for_task, run_tests_for_task_async
 from harness.task_loader import BenchmarkTask
 
 
@@ -56,3 +57,29 @@ def test_run_tests_for_task_reports_missing_runner():
     assert result.tests_passed == 1
     assert result.passed is False
     assert result.error == "No test runner for rust"
+
+
+def test_run_tests_for_task_async_runs_independent_suites_concurrently():
+    task = _task_with_test_languages(["python", "typescript"])
+    task.parallel_tests = True
+    runners = {
+        "python": harness_config.TestRunnerConfig(language="python", command="pytest", pattern="tests/"),
+        "typescript": harness_config.TestRunnerConfig(language="typescript", command="jest", pattern="tests/"),
+    }
+    running = []
+
+    async def fake_run_async(self, workspace, log_dir=None, sandbox=None):
+        running.append(self.config.language)
+        await asyncio.sleep(0.05)
+        # Both suites have started before either finishes
+        assert len(running) == 2
+        total = 2 if self.config.language == "python" else 3
+        return harness_test_executor.TestResult(
+            tests_total=total, tests_passed=total, passed=True, raw_output=self.config.language,
+        )
+
+    with patch("harness.run.TestExecutor.run_async", fake_run_async):
+        result = asyncio.run(run_tests_for_task_async(task, Path("/tmp/workspace"), runners))
+
+    assert (result.tests_total, result.tests_passed, result.passed) == (5, 5, True)
+    assert result.raw_output.index("[python]") < result.raw_output.index("[typescript]")
@@ -1,3 +1,4 @@
+import asyncio
 import tempfile
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -35,3 +36,23 @@ def test_copy_tests_into_workspace(tmp_path):
     ))
     runner.copy_tests(tests_dir, workspace)
     assert (workspace / "tests" / "test_main.py").exists()
+
+
+def test_run_async_captures_output(tmp_path):
+    runner = AgentRunner(AgentConfig(
+        name="test", command="echo", args=["{prompt}"], model=None, timeout_seconds=60
+    ))
+    result = asyncio.run(runner.run_async("hello", tmp_path))
+    assert result.raw_output.strip() == "hello"
+    assert result.timed_out is False
+    assert result.error is None
+
+
+def test_run_async_times_out(tmp_path):
+    runner = AgentRunner(AgentConfig(
+        name="test", command="sleep", args=["{prompt}"], model=None, timeout_seconds=1
+    ))
+    result = asyncio.run(runner.run_async("30", tmp_path))
+    assert result.timed_out is True
+    assert result.error == "Timed out after 1s"
+    assert result.wall_clock_seconds < 10
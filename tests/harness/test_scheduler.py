@@ -0,0 +1,104 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from harness.config import AgentConfig
+from harness.scheduler import build_schedule, parse_shard, run_schedule, shard_pairs
+from harness.task_loader import BenchmarkTask
+
+
+def _task(name: str) -> BenchmarkTask:
+    return BenchmarkTask(
+        name=name, prompt="p", language="python", test_languages=["python"],
+        category="bugfix", timeout_seconds=60,
+        repo_dir=Path("/tmp/repo"), tests_dir=Path("/tmp/tests"), task_dir=Path("/tmp/task"),
+    )
+
+
+def _agent(name: str, max_concurrency=None) -> AgentConfig:
+    return AgentConfig(
+        name=name, command="echo", args=[], model=None, timeout_seconds=60,
+        max_concurrency=max_concurrency,
+    )
+
+
+def test_build_schedule_rotates_agents_per_task():
+    tasks = [_task("t0"), _task("t1"), _task("t2")]
+    agents = [_agent("a"), _agent("b")]
+    order = [(t.name, a.name) for t, a in build_schedule(tasks, agents)]
+    assert order == [
+        ("t0", "a"), ("t0", "b"),
+        ("t1", "b"), ("t1", "a"),
+        ("t2", "a"), ("t2", "b"),
+    ]
+
+
+def test_run_schedule_preserves_schedule_order():
+    pairs = build_schedule([_task("t0"), _task("t1")], [_agent("a"), _agent("b")])
+
+    async def worker(task, agent_config):
+        # Finish later pairs first to make sure results are not in completion order
+        await asyncio.sleep(0.01 if task.name == "t0" else 0)
+        return f"{task.name}/{agent_config.name}"
+
+    results = asyncio.run(run_schedule(pairs, worker, jobs=4))
+    assert results == [f"{t.name}/{a.name}" for t, a in pairs]
+
+
+def test_run_schedule_respects_jobs_and_agent_caps():
+    pairs = build_schedule(
+        [_task(f"t{i}") for i in range(6)],
+        [_agent("a", max_concurrency=1), _agent("b")],
+    )
+    active = {"total": 0, "a": 0}
+    peak = {"total": 0, "a": 0}
+
+    async def worker(task, agent_config):
+        active["total"] += 1
+        active["a"] += agent_config.name == "a"
+        peak["total"] = max(peak["total"], active["total"])
+        peak["a"] = max(peak["a"], active["a"])
+        await asyncio.sleep(0.01)
+        active["total"] -= 1
+        active["a"] -= agent_config.name == "a"
+        return task.name
+
+    results = asyncio.run(run_schedule(pairs, worker, jobs=3))
+    assert len(results) == 12
+    assert peak["total"] <= 3
+    assert peak["a"] == 1
+
+
+def test_run_schedule_cancels_running_pairs_on_failure():
+    pairs = build_schedule([_task("t0"), _task("t1")], [_agent("a")])
+    cancelled = []
+
+    async def worker(task, agent_config):
+        if task.name == "t0":
+            raise RuntimeError("boom")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(task.name)
+            raise
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_schedule(pairs, worker, jobs=2))
+    assert cancelled == ["t1"]
+
+
+def test_shards_partition_the_schedule():
+    pairs = build_schedule([_task(f"t{i}") for i in range(5)], [_agent("a"), _agent("b")])
+    shards = [shard_pairs(pairs, i, 3) for i in range(1, 4)]
+    keys = [(t.name, a.name) for shard in shards for t, a in shard]
+    assert sorted(keys) == sorted((t.name, a.name) for t, a in pairs)
+    assert len(keys) == len(set(keys))
+    assert shard_pairs(pairs, 2, 3) == shards[1]
+
+
+def test_parse_shard_validates_spec():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ("0/4", "5/4", "1", "a/b", "1/0"):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
@@ -1,4 +1,12 @@
-from harness.scoring import TaskScore, compute_summary
+import json
+import math
+
+import pytest
+
+from harness.agent_events import AgentMetrics
+from harness.resources import ResourceUsage
+from harness.scoring import SummaryAggregator, TaskScore, compute_summary
+from harness.sketch import QuantileSketch
 
 
 def _make_score(agent, task, tests_passed, tests_total, seconds, timed_out=False):
@@ -39,3 +47,90 @@ def test_summary_excludes_timed_out_from_speed():
     ]
     summary = compute_summary(scores)
     assert summary["claude"]["avg_speed_seconds"] == 30.0
+
+
+def test_summary_reports_cpu_and_memory():
+    usage = ResourceUsage(
+        user_cpu_seconds=4.0, system_cpu_seconds=1.0, peak_rss_mb=250.0,
+        voluntary_context_switches=10, involuntary_context_switches=2,
+        block_input_ops=0, block_output_ops=0,
+    )
+    measured = _make_score("claude", "task1", 4, 4, 50)
+    measured.resources = usage
+    summary = compute_summary([measured, _make_score("codex", "task1", 4, 4, 30)])
+    assert summary["claude"]["avg_cpu_seconds"] == 5.0
+    assert summary["claude"]["cpu_utilization"] == 0.1
+    assert summary["claude"]["max_peak_rss_mb"] == 250.0
+    assert summary["codex"]["avg_cpu_seconds"] is None
+
+
+def test_summary_leaves_out_unreported_tool_calls():
+    json_mode = _make_score("claude", "task1", 4, 4, 50)
+    json_mode.metrics = AgentMetrics(output_tokens=10, turns=3, tool_calls=None)
+    streamed = _make_score("claude", "task2", 4, 4, 50)
+    streamed.metrics = AgentMetrics(output_tokens=10, turns=3, tool_calls={"Bash": 4})
+    summary = compute_summary([json_mode, streamed, _make_score("codex", "task1", 4, 4, 30)])
+    assert summary["claude"]["avg_tool_calls"] == 4.0
+    assert summary["claude"]["avg_turns"] == 3.0
+
+    json_mode.agent = "codex"
+    assert compute_summary([json_mode])["codex"]["avg_tool_calls"] is None
+
+
+def test_quantile_sketch_is_accurate_and_mergeable():
+    values = [0.05 * 1.37 ** (i % 40) for i in range(2000)]
+    left, right, both = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, v in enumerate(values):
+        (left if i % 2 else right).add(v)
+        both.add(v)
+    left.merge(right)
+    ordered = sorted(values)
+    for q in (0.0, 0.5, 0.9, 0.99, 1.0):
+        exact = ordered[max(1, math.ceil(q * len(ordered) - 1e-9)) - 1]
+        assert abs(left.quantile(q) - exact) <= 0.01 * exact
+        assert left.quantile(q) == both.quantile(q)
+    assert len(both.buckets) <= 40
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(both.to_dict())))
+    assert restored.quantile(0.9) == both.quantile(0.9)
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_aggregator_merges_shards_and_keeps_timeouts_in_percentiles():
+    scores = [_make_score("claude", f"task{i}", 4, 4, 10 + i) for i in range(9)]
+    scores.append(_make_score("claude", "task9", 0, 4, 300, timed_out=True))
+    shards = [SummaryAggregator(), SummaryAggregator()]
+    for i, s in enumerate(scores):
+        shards[i % 2].add(s)
+    merged = SummaryAggregator.from_dict(json.loads(json.dumps(shards[0].to_dict())))
+    merged.merge(shards[1])
+
+    summary = merged.summary()["claude"]
+    expected = compute_summary(scores)["claude"]
+    assert summary == {k: v for k, v in expected.items() if k != "scores"}
+    assert summary["avg_speed_seconds"] == 14.0
+    assert summary["speed_p50_seconds"] == pytest.approx(14, rel=0.01)
+    assert summary["speed_p99_seconds"] == pytest.approx(300, rel=0.01)
+
+
+def test_summary_reports_timeouts_throughput_and_breakdowns():
+    scores = [
+        _make_score("claude", "py1", 4, 4, 600),
+        _make_score("claude", "py2", 2, 4, 1200),
+        _make_score("claude", "c1", 4, 4, 1200),
+        _make_score("claude", "c2", 0, 4, 600, timed_out=True),
+    ]
+    for s, (category, language) in zip(scores, [
+        ("bugfix", "python"), ("feature", "python"), ("bugfix", "c"), ("bugfix", "c"),
+    ]):
+        s.category, s.language = category, language
+
+    summary = compute_summary(scores)["claude"]
+    assert summary["timeout_rate"] == 0.25
+    # 2 tasks fully passed in one hour of agent time
+    assert summary["tasks_solved_per_hour"] == 2.0
+    assert summary["correctness_per_second"] == round(2.5 / 3600, 4)
+    assert summary["by_category"]["bugfix"]["tasks_fully_passed"] == 2
+    assert summary["by_category"]["bugfix"]["timeout_rate"] == 0.33
+    assert summary["by_category"]["feature"]["total_tasks"] == 1
+    assert summary["by_language"]["c"]["speed_p90_seconds"] == pytest.approx(1200, rel=0.01)
+    assert summary["by_language"]["python"]["avg_correctness"] == 0.75
@@ -0,0 +1,99 @@
+from dataclasses import replace
+from pathlib import Path
+
+from harness.config import TestRunnerConfig
+from harness.task_loader import BenchmarkTask
+from harness import test_cache
+from harness.test_cache import TestResultCache
+from harness.test_executor import TestCase, TestResult
+
+RUNNERS = {"python": TestRunnerConfig(language="python", command="pytest {test_dir}", pattern="tests/")}
+
+
+def _task() -> BenchmarkTask:
+    return BenchmarkTask(
+        name="sample-task",
+        prompt="Fix the bug",
+        language="python",
+        test_languages=["python"],
+        category="bugfix",
+        timeout_seconds=120,
+        repo_dir=Path("/tmp/repo"),
+        tests_dir=Path("/tmp/tests"),
+        task_dir=Path("/tmp/task"),
+    )
+
+
+def _workspace(path: Path, source: str = "x = 1\n") -> Path:
+    (path / "tests").mkdir(parents=True)
+    (path / "mod.py").write_text(source)
+    (path / "tests" / "test_mod.py").write_text("def test_x(): pass\n")
+    return path
+
+
+def test_key_depends_on_content_and_runner_settings(tmp_path):
+    cache = TestResultCache(tmp_path / "store")
+    a = _workspace(tmp_path / "a")
+    b = _workspace(tmp_path / "b")
+    key = cache.key(_task(), a, RUNNERS)
+
+    # Same content in another directory, plus files the key ignores
+    (b / "__pycache__").mkdir()
+    (b / "__pycache__" / "mod.pyc").write_bytes(b"\0")
+    assert cache.key(_task(), b, RUNNERS) == key
+    slower = {"python": replace(RUNNERS["python"], timeout_seconds=600)}
+    assert cache.key(_task(), a, slower) == key
+
+    (b / "mod.py").write_text("x = 2\n")
+    assert cache.key(_task(), b, RUNNERS) != key
+    other = {"python": replace(RUNNERS["python"], command="pytest -x {test_dir}")}
+    assert cache.key(_task(), a, other) != key
+
+
+def test_key_covers_toolchain_and_installed_node_modules(tmp_path, monkeypatch):
+    versions = {("python3", "--version"): "Python 3.11.7"}
+    monkeypatch.setattr(test_cache, "_tool_version", lambda command: versions.get(command, "none"))
+    a = _workspace(tmp_path / "a")
+    key = TestResultCache(tmp_path / "store").key(_task(), a, RUNNERS)
+
+    versions[("python3", "--version")] = "Python 3.12.1"
+    assert TestResultCache(tmp_path / "store").key(_task(), a, RUNNERS) != key
+    versions[("python3", "--version")] = "Python 3.11.7"
+    cache = TestResultCache(tmp_path / "store")
+    assert cache.key(_task(), a, RUNNERS) == key
+
+    (a / "node_modules" / "dep").mkdir(parents=True)
+    (a / "node_modules" / "dep" / "package.json").write_text('{"version": "1.0.0"}')
+    with_dep = cache.key(_task(), a, RUNNERS)
+    assert with_dep != key
+    (a / "node_modules" / "dep" / "package.json").write_text('{"version": "2.0.0"}')
+    assert cache.key(_task(), a, RUNNERS) not in (key, with_dep)
+
+
+def test_round_trip_and_statistics(tmp_path):
+    cache = TestResultCache(tmp_path / "store")
+    result = TestResult(
+        tests_total=2, tests_passed=1, passed=False, raw_output="1 failed, 1 passed", stray_processes=1,
+        cases=[TestCase("test_a", "passed", 0.1), TestCase("test_b", "failed", 0.2)],
+        timings={"python": {"seconds": 1.0, "timeout_seconds": 120, "timed_out": False}},
+    )
+    assert cache.get("k" * 64) is None
+    cache.put("k" * 64, result)
+
+    cached = cache.get("k" * 64)
+    assert (cached.tests_total, cached.tests_passed, cached.passed) == (2, 1, False)
+    assert cached.cases == result.cases
+    assert (cached.stray_processes, cached.timings) == (0, None)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.describe() == "1 hits, 1 misses (50% hit rate)"
+
+    refreshing = TestResultCache(tmp_path / "store", refresh=True)
+    assert refreshing.get("k" * 64) is None
+
+
+def test_results_with_errors_are_not_stored(tmp_path):
+    cache = TestResultCache(tmp_path / "store")
+    cache.put("e" * 64, TestResult(
+        tests_total=0, tests_passed=0, passed=False, raw_output="", error="Test execution timed out after 120s",
+    ))
+    assert cache.get("e" * 64) is None
@@ -1,8 +1,12 @@
+import asyncio
+import json
 import subprocess
+import sys
 from unittest.mock import patch
 from pathlib import Path
 
-from harness.test_executor import TestExecutor, TestResult
+from harness.config import TestRunnerConfig
+from harness.test_executor import TestExecutor, TestLineParser, TestResult
 
 
 def test_parse_pytest_output_all_pass():
@@ -64,3 +68,101 @@ Results: 2/3 passed
     assert result.tests_total == 3
     assert result.tests_passed == 2
     assert result.passed is False
+
+
+def test_parse_junit_report():
+    report = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="4">
+<testcase classname="tests.test_main" name="test_one" time="0.012" />
+<testcase classname="tests.test_main" name="test_two" time="1.5"><failure message="assert 1 == 2" /></testcase>
+<testcase classname="tests.test_main" name="test_three" time="0.001"><skipped message="later" /></testcase>
+<testcase classname="tests.test_main" name="test_four" time="0"><error message="fixture" /></testcase>
+</testsuite></testsuites>"""
+    cases = TestExecutor.parse_junit_report(report)
+    assert [(c.name, c.outcome) for c in cases] == [
+        ("test_one", "passed"), ("test_two", "failed"), ("test_three", "skipped"), ("test_four", "error"),
+    ]
+    assert cases[1].duration_seconds == 1.5
+    assert cases[0].suite == "tests.test_main"
+
+    result = TestExecutor.apply_cases(TestResult(9, 9, True, ""), cases)
+    assert (result.tests_total, result.tests_passed, result.passed) == (3, 1, False)
+
+
+def test_parse_jest_report():
+    report = {
+        "numTotalTests": 3,
+        "testResults": [{
+            "name": "/ws/tests/table.test.js",
+            "assertionResults": [
+                {"fullName": "filter keeps matches", "status": "passed", "duration": 12},
+                {"fullName": "filter sorts", "status": "failed", "duration": 250},
+                {"fullName": "filter pages", "status": "pending", "duration": None},
+            ],
+        }],
+    }
+    cases = TestExecutor.parse_jest_report(json.dumps(report), Path("/ws"))
+    assert [(c.name, c.outcome, c.duration_seconds) for c in cases] == [
+        ("filter keeps matches", "passed", 0.012),
+        ("filter sorts", "failed", 0.25),
+        ("filter pages", "skipped", None),
+    ]
+    assert cases[0].suite == "tests/table.test.js"
+
+
+def test_test_line_parser_times_tests_and_catches_crash():
+    parser = TestLineParser(start=9.0)
+    for raw, now in [
+        (b"Running linked list tests...", 10.0),
+        (b"  Running test_insert... [PASS]", 10.5),
+        (b"  Running test_find... [PASS]", 12.0),
+        (b"  Running test_remove... ", 13.0),
+    ]:
+        parser.feed(raw, now)
+    assert [(c.name, c.outcome, c.duration_seconds) for c in parser.cases] == [
+        ("test_insert", "passed", 0.5),
+        ("test_find", "passed", 1.5),
+        ("test_remove", "failed", None),
+    ]
+
+
+def test_test_line_parser_keeps_only_test_lines():
+    parser = TestLineParser(start=0.0)
+    for i in range(1000):
+        parser.feed(b"noise " * 100, i / 1000)
+    parser.feed(b"Running test_a... [FAIL]", 2.0)
+    assert [(c.name, c.outcome, c.duration_seconds) for c in parser.cases] == [("test_a", "failed", 1.001)]
+    assert vars(parser).keys() == {"previous", "cases"}
+
+
+def test_run_async_reads_junit_report(tmp_path):
+    config = TestRunnerConfig(
+        language="python",
+        command=f"{sys.executable} -m pytest {{test_dir}} -q -p no:cacheprovider --junitxml={{report}}",
+        pattern="tests/",
+        report="junit",
+    )
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_sample.py").write_text(
+        "import pytest\n"
+        "def test_ok(): pass\n"
+        "def test_bad(): assert False\n"
+        "@pytest.mark.skip\n"
+        "def test_skipped(): pass\n"
+    )
+    result = asyncio.run(TestExecutor(config).run_async(tmp_path, tmp_path / "logs"))
+    assert (result.tests_total, result.tests_passed, result.passed) == (2, 1, False)
+    assert {c.name: c.outcome for c in result.cases} == {
+        "test_ok": "passed", "test_bad": "failed", "test_skipped": "skipped",
+    }
+    assert (tmp_path / "logs" / "tests-python.report.xml").exists()
+
+
+def test_run_async_enforces_timeout(tmp_path):
+    config = TestRunnerConfig(language="python", command="echo test_hangs; sleep 30", pattern="tests/")
+    result = asyncio.run(TestExecutor(config, timeout=0.5).run_async(tmp_path))
+    assert result.timed_out
+    assert "test_hangs" in result.raw_output
+    assert result.error == "Test execution timed out after 0.5s"
+    assert result.timeout_seconds == 0.5
+    assert result.duration_seconds < 10
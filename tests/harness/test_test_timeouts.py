@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+from harness.config import TestRunnerConfig, TestTimeoutConfig
+from harness.task_loader import BenchmarkTask
+from harness.test_timeouts import TestTimeouts, load_test_durations, percentile
+
+
+def _task(name: str = "sample-task", test_timeout_seconds: int | None = None) -> BenchmarkTask:
+    return BenchmarkTask(
+        name=name,
+        prompt="Fix the bug",
+        language="python",
+        test_languages=["python"],
+        category="bugfix",
+        timeout_seconds=120,
+        repo_dir=Path("/tmp/repo"),
+        tests_dir=Path("/tmp/tests"),
+        task_dir=Path("/tmp/task"),
+        test_timeout_seconds=test_timeout_seconds,
+    )
+
+
+def _write_result(results_dir: Path, run_id: str, task: str, seconds: float, timed_out: bool = False) -> None:
+    path = results_dir / run_id / "agent" / f"{task}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "task": task, "agent": "agent",
+        "test_timings": {"python": {"seconds": seconds, "timeout_seconds": 120, "timed_out": timed_out}},
+    }))
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 21)]
+    assert percentile(values, 95) == 19.0
+    assert percentile(values, 100) == 20.0
+    assert percentile([4.0], 50) == 4.0
+
+
+def test_load_test_durations_reads_recent_runs_and_skips_timeouts(tmp_path):
+    _write_result(tmp_path, "2026-01-01-000000", "t", 50.0)
+    _write_result(tmp_path, "2026-01-02-000000", "t", 2.0)
+    _write_result(tmp_path, "2026-01-03-000000", "t", 120.0, timed_out=True)
+    _write_result(tmp_path, "2026-01-04-000000", "t", 3.0)
+    (tmp_path / "2026-01-04-000000" / "summary.json").write_text("{}")
+
+    assert load_test_durations(tmp_path, runs=3) == {("t", "python"): [3.0, 2.0]}
+    assert sorted(load_test_durations(tmp_path, runs=10)[("t", "python")]) == [2.0, 3.0, 50.0]
+    assert load_test_durations(tmp_path / "missing", runs=3) == {}
+
+
+def test_timeout_precedence():
+    runner = TestRunnerConfig(language="python", command="pytest", pattern="tests/", timeout_seconds=120)
+    config = TestTimeoutConfig(adaptive=True, percentile=90, factor=3.0, min_seconds=10, min_samples=3)
+    timeouts = TestTimeouts(config, {
+        ("fast", "python"): [1.0, 1.5, 2.0],
+        ("slow", "python"): [40.0, 50.0, 60.0],
+        ("new", "python"): [1.0],
+    })
+
+    assert timeouts.timeout(_task("fast"), runner) == 10
+    assert timeouts.timeout(_task("slow"), runner) == 180.0
+    # Too little history to go by
+    assert timeouts.timeout(_task("new"), runner) == 120
+    assert timeouts.timeout(_task("fast", test_timeout_seconds=30), runner) == 30
+    assert TestTimeouts().timeout(_task("slow"), runner) == 120
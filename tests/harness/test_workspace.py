@@ -0,0 +1,144 @@
+import os
+import stat
+
+import pytest
+
+from harness import workspace
+from harness.workspace import TmpfsTier, UnsupportedStrategy, WorkspaceProvider, same_filesystem, tree_size
+
+
+def _make_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "pkg").mkdir(parents=True)
+    (repo / "main.py").write_text("original")
+    (repo / "pkg" / "util.py").write_text("util")
+    return repo
+
+
+def test_copy_strategy_copies_tree(tmp_path):
+    repo = _make_repo(tmp_path)
+    dest = tmp_path / "ws"
+    assert WorkspaceProvider("copy").materialize(repo, dest) == "copy"
+    assert (dest / "pkg" / "util.py").read_text() == "util"
+
+
+def test_auto_falls_back_and_remembers_unsupported_strategies(tmp_path, monkeypatch):
+    calls = []
+
+    def unsupported(src, dest):
+        calls.append(src)
+        (dest / "partial").write_text("")
+        raise UnsupportedStrategy("nope")
+
+    monkeypatch.setitem(workspace.STRATEGIES, "reflink", unsupported)
+    repo = _make_repo(tmp_path)
+    provider = WorkspaceProvider()
+
+    assert provider.materialize(repo, tmp_path / "ws1") == "copy"
+    assert not (tmp_path / "ws1" / "partial").exists()
+    assert provider.materialize(repo, tmp_path / "ws2") == "copy"
+    assert len(calls) == 1
+
+
+def test_hardlink_farm_never_touches_source_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace.os, "geteuid", lambda: 1000)
+    repo = _make_repo(tmp_path)
+    source_mode = os.stat(repo / "main.py").st_mode
+    provider = WorkspaceProvider("hardlink", base_dir=tmp_path)
+    dest = tmp_path / "ws"
+    provider.materialize(repo, dest)
+
+    linked = dest / "main.py"
+    assert os.stat(linked).st_ino != os.stat(repo / "main.py").st_ino
+    assert not os.stat(linked).st_mode & stat.S_IWUSR
+    assert os.stat(repo / "main.py").st_mode == source_mode
+
+    # An agent that makes its file writable and edits it in place only
+    # changes the shared store copy, which the next workspace replaces
+    os.chmod(linked, source_mode)
+    with open(linked, "w") as f:
+        f.write("agent edit")
+    assert (repo / "main.py").read_text() == "original"
+    assert os.stat(repo / "main.py").st_mode == source_mode
+
+    provider.materialize(repo, tmp_path / "ws2")
+    assert (tmp_path / "ws2" / "main.py").read_text() == "original"
+    assert (tmp_path / "ws2" / "pkg" / "util.py").stat().st_nlink == 2
+
+
+def test_hardlink_store_lives_outside_workspaces_and_follows_deletions(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace.os, "geteuid", lambda: 1000)
+    repo = _make_repo(tmp_path)
+    provider = WorkspaceProvider("hardlink", base_dir=tmp_path)
+    ws = tmp_path / "ws"
+    provider.materialize(repo, ws)
+    provider.materialize(repo, ws / "tests")
+
+    stores = list(tmp_path.glob(f"{workspace.HARDLINK_STORE}-*"))
+    assert [s.name for s in stores] == [f"{workspace.HARDLINK_STORE}-{os.getpid()}"]
+    assert not list(ws.rglob(f"{workspace.HARDLINK_STORE}*"))
+
+    (repo / "pkg" / "util.py").unlink()
+    provider.materialize(repo, tmp_path / "ws2")
+    assert not (tmp_path / "ws2" / "pkg" / "util.py").exists()
+
+    provider.close()
+    assert not stores[0].exists()
+    assert (tmp_path / "ws2" / "main.py").read_text() == "original"
+
+
+def test_hardlink_stores_of_dead_processes_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace, "_pid_alive", lambda pid: pid == 1)
+    (tmp_path / f"{workspace.HARDLINK_STORE}-1" / "abc").mkdir(parents=True)
+    (tmp_path / f"{workspace.HARDLINK_STORE}-999999" / "abc").mkdir(parents=True)
+    root = workspace.hardlink_store_root(tmp_path)
+    assert root == tmp_path / f"{workspace.HARDLINK_STORE}-{os.getpid()}"
+    assert (tmp_path / f"{workspace.HARDLINK_STORE}-1").exists()
+    assert not (tmp_path / f"{workspace.HARDLINK_STORE}-999999").exists()
+
+
+def test_hardlink_refused_for_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(workspace.os, "geteuid", lambda: 0)
+    with pytest.raises(UnsupportedStrategy):
+        WorkspaceProvider("hardlink").materialize(_make_repo(tmp_path), tmp_path / "ws")
+
+
+def test_tmpfs_tier_used_within_budget_and_released(tmp_path):
+    repo = _make_repo(tmp_path)
+    ram = tmp_path / "shm"
+    ram.mkdir()
+    tier = TmpfsTier(ram, budget_bytes=1000, build_estimates={"python": 100})
+    provider = WorkspaceProvider("copy", tier)
+
+    ws = provider.create(repo, "agent", ["python"])
+    assert ws.tier == "tmpfs"
+    assert ws.path.parent == ram
+    assert tier.reserved_bytes == tree_size(repo) + 100
+
+    provider.discard(ws.path)
+    assert not ws.path.exists()
+    assert tier.reserved_bytes == 0
+
+
+def test_tmpfs_tier_spills_to_disk_when_over_budget(tmp_path):
+    repo = _make_repo(tmp_path)
+    ram = tmp_path / "shm"
+    ram.mkdir()
+    provider = WorkspaceProvider("copy", TmpfsTier(ram, budget_bytes=1000, build_estimates={"typescript": 5000}))
+
+    ws = provider.create(repo, "agent", ["typescript"])
+    assert ws.tier == "disk"
+    assert ws.path.parent != ram
+    provider.discard(ws.path)
+
+
+def test_tmpfs_tier_keeps_disk_languages_on_disk(tmp_path):
+    repo = _make_repo(tmp_path)
+    ram = tmp_path / "shm"
+    ram.mkdir()
+    provider = WorkspaceProvider("copy", TmpfsTier(ram, budget_bytes=10**9, disk_languages={"typescript"}))
+
+    ws = provider.create(repo, "agent", ["python", "typescript"])
+    assert ws.tier == "disk"
+    provider.discard(ws.path)
+    assert same_filesystem(tmp_path / "missing" / "dir", ram)
@@ -0,0 +1,87 @@
+import asyncio
+import shutil
+from pathlib import Path
+
+from harness.config import AgentConfig
+from harness.scheduler import build_schedule
+from harness.task_loader import BenchmarkTask
+from harness.workspace import WorkspaceProvider
+from harness.workspace_pool import WorkspacePool
+
+
+def _pairs(tmp_path: Path, count: int):
+    tasks = []
+    for i in range(count):
+        repo = tmp_path / f"t{i}" / "repo"
+        repo.mkdir(parents=True)
+        (repo / "main.py").write_text(f"task {i}")
+        tasks.append(BenchmarkTask(
+            name=f"t{i}", prompt="p", language="python", test_languages=["python"],
+            category="bugfix", timeout_seconds=60,
+            repo_dir=repo, tests_dir=tmp_path / "tests", task_dir=repo.parent,
+        ))
+    agent = AgentConfig(name="a", command="echo", args=[], model=None, timeout_seconds=60)
+    return build_schedule(tasks, [agent])
+
+
+def test_pool_prewarms_upcoming_workspaces(tmp_path):
+    pairs = _pairs(tmp_path, 4)
+
+    async def scenario():
+        pool = WorkspacePool(pairs, WorkspaceProvider("copy"), size=2)
+        pool.start()
+        await asyncio.sleep(0.2)
+        assert sorted(pool._provisioning) == [("t0", "a"), ("t1", "a")]
+        workspace = await pool.acquire("t0", "a")
+        assert (workspace.path / "main.py").read_text() == "task 0"
+        assert workspace.strategy == "copy"
+        assert pool.hits == 1
+        assert pool.describe() == "1 hits, 0 misses (100% ready on claim)"
+        assert sorted(pool._provisioning) == [("t1", "a"), ("t2", "a")]
+        await pool.close()
+        return workspace.path
+
+    # Claimed workspaces belong to the caller and survive the pool
+    workspace = asyncio.run(scenario())
+    assert workspace.exists()
+    shutil.rmtree(workspace)
+
+
+def test_pool_evicts_unclaimed_workspaces_on_close(tmp_path):
+    pairs = _pairs(tmp_path, 3)
+
+    async def scenario():
+        pool = WorkspacePool(pairs, WorkspaceProvider("copy"), size=3)
+        pool.start()
+        tasks = list(pool._provisioning.values())
+        await asyncio.gather(*tasks)
+        paths = [t.result().path for t in tasks]
+        await pool.close()
+        return paths
+
+    paths = asyncio.run(scenario())
+    assert paths and not any(p.exists() for p in paths)
+
+
+def test_eviction_discards_off_the_event_loop(tmp_path):
+    pairs = _pairs(tmp_path, 2)
+    provider = WorkspaceProvider("copy")
+    on_loop = []
+
+    def discard(path):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        shutil.rmtree(path)
+
+    provider.discard = discard
+
+    async def scenario():
+        pool = WorkspacePool(pairs, provider, size=2)
+        pool.start()
+        await pool.close()
+
+    asyncio.run(scenario())
+    assert on_loop == [False, False]